@@ -0,0 +1,180 @@
+# benchmarks/fixtures.py
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+# Время пар (как в ответах API: дата-время с фиктивной датой)
+PAIR_TIMES = {
+    1: ("09:00", "10:20"),
+    2: ("10:30", "11:50"),
+    3: ("12:00", "13:20"),
+    4: ("13:30", "14:50"),
+    5: ("15:00", "16:20"),
+    6: ("16:30", "17:50"),
+    7: ("18:00", "19:20"),
+    8: ("19:30", "20:50"),
+}
+CLASS_TYPES = ["Лек", "Пр", "Лаб"]
+SEMESTR = "Весенний семестр 2024-2025 г."
+
+Fixtures = Tuple[List[str], Dict[str, Dict[str, Any]]]
+
+
+def _teacher(rnd: random.Random, n: int) -> Tuple[str, str]:
+    surname = f"Преподаватель{n}"
+    first, middle = rnd.choice("АБВГДЕИКЛМНОПС"), rnd.choice("АБВГДЕИКЛМНОПС")
+    return f"{surname} {first}.{middle}.", f"{surname} {first}имя {middle}отчество"
+
+
+def _item(
+    group_name: str,
+    slot: Tuple[int, int, int],
+    name: str,
+    teacher: Tuple[str, str],
+    room: str,
+    is_distant: bool = False,
+) -> Dict[str, Any]:
+    day_number, day, code = slot
+    time_from, time_to = PAIR_TIMES[code]
+    if is_distant:
+        name = f"[ДСТ] {name}"
+    return {
+        "Day": day,
+        "DayNumber": day_number,
+        "Time": {
+            "Time": f"{code} пара",
+            "Code": code,
+            "TimeFrom": f"0001-01-01T{time_from}:00",
+            "TimeTo": f"0001-01-01T{time_to}:00",
+        },
+        "Class": {
+            "Code": name,
+            "Name": name,
+            "TeacherFull": teacher[1],
+            "Teacher": teacher[0],
+            "Form": is_distant,
+        },
+        "Group": {"Code": group_name, "Name": group_name},
+        "Room": {"Code": 0, "Name": room},
+    }
+
+
+def _random_slot(rnd: random.Random) -> Tuple[int, int, int]:
+    # Вечерние пары (7-8) редки, как и в настоящем расписании
+    code = rnd.randint(7, 8) if rnd.random() < 0.05 else rnd.randint(1, 6)
+    return rnd.randrange(4), rnd.randint(1, 6), code
+
+
+def synthesize(
+    groups: int = 400,
+    lessons_per_group: int = 60,
+    teachers: int = 600,
+    rooms: int = 250,
+    subjects: int = 150,
+    seed: int = 42,
+    stream_size: int = 4,
+    shared_lectures: int = 8,
+) -> Fixtures:
+    """
+    Генерирует ответы API groups/data в масштабе университета.
+    Группы одного направления объединены в потоки по stream_size: у потока
+    shared_lectures общих лекций (один преподаватель, аудитория и слот).
+    Встречаются и вечерние пары 7-8.
+    Возвращает (список групп, {группа: ответ data}).
+    """
+    if lessons_per_group > 4 * 6 * len(PAIR_TIMES):
+        raise ValueError("lessons_per_group больше числа слотов в цикле")
+    rnd = random.Random(seed)
+    prefixes = ["ИВТ", "ПИН", "ЭН", "МП", "БИ", "Д"]
+    group_names = [
+        f"{prefixes[i % len(prefixes)]}-{i // len(prefixes) + 11}" for i in range(groups)
+    ]
+    teacher_names = [_teacher(rnd, n) for n in range(teachers)]
+    room_names = [f"{rnd.randint(1, 4)}{rnd.randint(1, 4)}{rnd.randint(0, 3)}{n % 10}" for n in range(rooms)]
+    subject_names = [f"Дисциплина {n}" for n in range(subjects)]
+
+    # Потоки: подряд идущие группы одного направления
+    streams: List[List[str]] = []
+    for prefix in prefixes:
+        same = [name for name in group_names if name.startswith(f"{prefix}-")]
+        streams.extend(same[i : i + stream_size] for i in range(0, len(same), stream_size))
+
+    responses: Dict[str, Dict[str, Any]] = {}
+    for stream in streams:
+        lectures = {}
+        while len(lectures) < min(shared_lectures, lessons_per_group):
+            lectures[_random_slot(rnd)] = (
+                f"{rnd.choice(subject_names)} [Лек]",
+                rnd.choice(teacher_names),
+                rnd.choice(room_names),
+            )
+        for group_name in stream:
+            data = [
+                _item(group_name, slot, name, teacher, room)
+                for slot, (name, teacher, room) in lectures.items()
+            ]
+            slots = set(lectures)
+            while len(data) < lessons_per_group:
+                slot = _random_slot(rnd)
+                if slot in slots:
+                    continue
+                slots.add(slot)
+                data.append(
+                    _item(
+                        group_name,
+                        slot,
+                        f"{rnd.choice(subject_names)} [{rnd.choice(CLASS_TYPES)}]",
+                        rnd.choice(teacher_names),
+                        rnd.choice(room_names),
+                        is_distant=rnd.random() < 0.1,
+                    )
+                )
+            responses[group_name] = {"Times": [], "Data": data, "Semestr": SEMESTR}
+    responses = {name: responses[name] for name in group_names}
+    return group_names, responses
+
+
+def save(fixtures: Fixtures, directory: str) -> None:
+    """Сохраняет ответы в каталог: groups.json и data/<номер>.json."""
+    group_names, responses = fixtures
+    os.makedirs(os.path.join(directory, "data"), exist_ok=True)
+    with open(os.path.join(directory, "groups.json"), "w", encoding="utf-8") as f:
+        json.dump(group_names, f, ensure_ascii=False)
+    for n, group_name in enumerate(group_names):
+        if group_name not in responses:
+            continue
+        path = os.path.join(directory, "data", f"{n}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(responses[group_name], f, ensure_ascii=False)
+
+
+def load(directory: str) -> Fixtures:
+    """Загружает ответы, сохранённые save() или record()."""
+    with open(os.path.join(directory, "groups.json"), encoding="utf-8") as f:
+        group_names = json.load(f)
+    responses = {}
+    for n, group_name in enumerate(group_names):
+        path = os.path.join(directory, "data", f"{n}.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                responses[group_name] = json.load(f)
+    return group_names, responses
+
+
+def record(directory: str, limit: Optional[int] = None) -> Fixtures:
+    """Записывает настоящие ответы API МИЭТ (первые limit групп) для последующего воспроизведения."""
+    from miet_schedule_api import MietScheduleClient
+
+    client = MietScheduleClient()
+    group_names = client.get_all_groups() or []
+    if limit is not None:
+        group_names = group_names[:limit]
+    responses = {
+        result.group: result.data
+        for result in client.get_schedules_for_groups(group_names)
+        if result.ok
+    }
+    fixtures = (group_names, responses)
+    save(fixtures, directory)
+    return fixtures
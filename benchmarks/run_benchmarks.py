@@ -0,0 +1,397 @@
+# benchmarks/run_benchmarks.py
+"""
+Бенчмарки клиента расписания и функций форматирования.
+
+Запуск из корня репозитория:
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --fixtures fixtures/ --stages crawl,index_query
+
+Результаты (пропускная способность, перцентили задержек, пиковая память)
+выводятся в JSON, чтобы сравнивать прогоны между собой.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import fixtures as fixtures_module
+from benchmarks.stand_in_server import StandInServer
+from miet_schedule_api import (GroupSchedule, MietScheduleClient,
+                               _default_format_schedule_item,
+                               display_formatted_schedule, parse_lessons)
+from request_scheduler import RequestScheduler
+from schedule_cache import ScheduleCache
+from schedule_cli import GROUPS_KEY, group_cache_key, snapshot_path
+from schedule_index import ScheduleIndex
+from schedule_render import render_groups
+from schedule_snapshot import write_snapshot
+
+DEFAULT_STAGES = [
+    "crawl",
+    "crawl_latency",
+    "scan",
+    "parse",
+    "index_build",
+    "index_query",
+    "group_index",
+    "filter_today",
+    "format_items",
+    "display",
+    "render_pages",
+    "cli_startup",
+]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Ответ sch-parse для виджета в приглашении shell должен укладываться в это время
+CLI_STARTUP_BUDGET_MS = 100.0
+
+
+def summarize(latencies: List[float], items: Optional[int] = None) -> Dict[str, Any]:
+    """Перцентили задержек (мс) и пропускная способность (элементов в секунду)."""
+    ordered = sorted(latencies)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    result: Dict[str, Any] = {
+        "runs": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "min_ms": ordered[0] * 1000,
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+    if items is not None:
+        result["items"] = items
+        result["throughput_per_s"] = items / statistics.fmean(ordered)
+    return result
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> List[float]:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    """Пиковый объём памяти (байт), выделенной Python за один вызов fn."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class BenchmarkRunner:
+    def __init__(self, args: argparse.Namespace, fixtures: fixtures_module.Fixtures):
+        self.args = args
+        self.group_names, self.responses = fixtures
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.budget_failures: List[str] = []
+        self.total_lessons = sum(len(data.get("Data", [])) for data in self.responses.values())
+        # Готовые структуры для этапов, которые не должны включать их построение
+        self.lessons = [
+            lesson
+            for name, data in self.responses.items()
+            for lesson in parse_lessons(data, name)
+        ]
+        self.group_schedules = [
+            GroupSchedule.from_response(name, data) for name, data in self.responses.items()
+        ]
+        self.index = ScheduleIndex.from_schedules(self.responses.items())
+
+    def run_stage(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        items: Optional[int] = None,
+        repeat: Optional[int] = None,
+        latencies: Optional[List[float]] = None,
+    ) -> None:
+        if latencies is None:
+            fn()  # Прогрев
+            latencies = measure(fn, repeat or self.args.repeat)
+        result = summarize(latencies, items)
+        if not self.args.no_memory:
+            result["peak_memory_bytes"] = peak_memory(fn)
+        self.results[name] = result
+        print(f"{name}: p50 {result['p50_ms']:.2f} мс", file=sys.stderr)
+
+    def _client(self, server: StandInServer) -> MietScheduleClient:
+        # Без повторов: бенчмарк должен видеть ошибки, а не маскировать их
+        return MietScheduleClient(
+            base_url=server.base_url, scheduler=RequestScheduler(max_retries=0)
+        )
+
+    def stage_crawl(self) -> None:
+        with StandInServer(
+            (self.group_names, self.responses), latency=self.args.latency
+        ) as server:
+            client = self._client(server)
+
+            def crawl():
+                results = list(
+                    client.get_schedules_for_groups(
+                        self.group_names, max_concurrency=self.args.concurrency
+                    )
+                )
+                failed = [result.group for result in results if not result.ok]
+                if failed:
+                    raise RuntimeError(f"Обход завершился с ошибками: {failed[:5]}")
+
+            self.run_stage("crawl", crawl, items=len(self.group_names), repeat=1)
+            self.results["crawl"]["concurrency"] = self.args.concurrency
+
+    def stage_crawl_latency(self) -> None:
+        """Задержка одного запроса data (последовательно, выборка групп)."""
+        sample = self.group_names[: self.args.latency_sample]
+        with StandInServer(
+            (self.group_names, self.responses), latency=self.args.latency
+        ) as server:
+            client = self._client(server)
+            latencies = []
+            for group_name in sample:
+                started = time.perf_counter()
+                client.get_schedule_for_group(group_name)
+                latencies.append(time.perf_counter() - started)
+            self.run_stage(
+                "crawl_latency",
+                lambda: client.get_schedule_for_group(sample[0]),
+                latencies=latencies,
+            )
+
+    def stage_scan(self) -> None:
+        """Потоковый обход с фильтром по преподавателю."""
+        teacher = self.lessons[0].teacher_full.split()[0] if self.lessons else ""
+        with StandInServer(
+            (self.group_names, self.responses), latency=self.args.latency
+        ) as server:
+            client = self._client(server)
+
+            def scan():
+                for _ in client.scan_groups(
+                    self.group_names,
+                    predicate=lambda lesson: teacher in lesson.teacher_full,
+                    max_concurrency=self.args.concurrency,
+                ):
+                    pass
+
+            self.run_stage("scan", scan, items=len(self.group_names), repeat=1)
+
+    def stage_parse(self) -> None:
+        def parse():
+            for name, data in self.responses.items():
+                parse_lessons(data, name)
+
+        self.run_stage("parse", parse, items=self.total_lessons)
+
+    def stage_index_build(self) -> None:
+        self.run_stage(
+            "index_build",
+            lambda: ScheduleIndex.from_schedules(self.responses.items()),
+            items=self.total_lessons,
+        )
+
+    def stage_index_query(self) -> None:
+        teachers = self.index.teachers()
+        # Запросы — фрагменты реальных имён: фамилия целиком и её середина
+        queries = [name.split()[0] for name in teachers[:: max(1, len(teachers) // 50)]]
+        queries += [query[2:7] for query in queries]
+        latencies = []
+        for query in queries:
+            started = time.perf_counter()
+            self.index.find_by_teacher(query)
+            latencies.append(time.perf_counter() - started)
+        self.run_stage(
+            "index_query",
+            lambda: [self.index.find_by_teacher(query) for query in queries],
+            latencies=latencies,
+        )
+        self.results["index_query"]["queries"] = len(queries)
+
+    def stage_group_index(self) -> None:
+        self.run_stage(
+            "group_index",
+            lambda: [
+                GroupSchedule.from_response(name, data)
+                for name, data in self.responses.items()
+            ],
+            items=len(self.responses),
+        )
+
+    def stage_filter_today(self) -> None:
+        """Занятия на каждый день четырёхнедельного цикла для всех групп."""
+        days = [date(2025, 1, 6) + timedelta(days=n) for n in range(28)]
+
+        def filter_today():
+            for schedule in self.group_schedules:
+                for day in days:
+                    schedule.lessons_on(day)
+
+        self.run_stage(
+            "filter_today", filter_today, items=len(self.group_schedules) * len(days)
+        )
+
+    def stage_format_items(self) -> None:
+        self.run_stage(
+            "format_items",
+            lambda: [_default_format_schedule_item(lesson) for lesson in self.lessons],
+            items=len(self.lessons),
+        )
+
+    def stage_display(self) -> None:
+        def display():
+            with contextlib.redirect_stdout(io.StringIO()):
+                for schedule in self.group_schedules:
+                    display_formatted_schedule(schedule, schedule.semestr or "")
+
+        self.run_stage("display", display, items=len(self.lessons))
+
+    def stage_render_pages(self) -> None:
+        """Страницы всех групп в HTML за один проход (как для статического сайта)."""
+        pages = [(schedule.group, schedule) for schedule in self.group_schedules]
+        self.run_stage(
+            "render_pages",
+            lambda: render_groups(pages, "html"),
+            items=len(pages),
+        )
+
+    def stage_cli_startup(self) -> None:
+        """
+        Запуск sch-parse отдельным процессом (как из виджета shell или cron) на
+        локальной копии расписания, без сети. overhead_ms — разница с пустым
+        запуском интерпретатора, т. е. цена импортов и самой команды.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, "schedule.sqlite3")
+            cache = ScheduleCache(cache_path)
+            cache.set(GROUPS_KEY, "groups", self.group_names)
+            for name, data in self.responses.items():
+                cache.set(group_cache_key(name), "data", data)
+            cache.close()
+            # Снимок для teacher и room, как после "sch-parse sync"
+            write_snapshot(snapshot_path(cache_path), self.responses.items())
+
+            cli = [sys.executable, "-m", "schedule_cli", "--offline", "--cache", cache_path]
+            lesson = self.lessons[0]
+            commands = {
+                "python": [sys.executable, "-c", "pass"],
+                "today": cli + ["today", self.group_names[0]],
+                "teacher": cli + ["teacher", lesson.teacher_full.split()[0]],
+                "room": cli + ["room", lesson.room],
+            }
+            results: Dict[str, Any] = {}
+            for name, argv in commands.items():
+                run = lambda: subprocess.run(
+                    argv, cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL
+                )
+                run()  # Прогрев (и компиляция .pyc)
+                results[name] = summarize(measure(run, self.args.repeat))
+            baseline = results["python"]["p50_ms"]
+            for name in ("today", "teacher", "room"):
+                results[name]["overhead_ms"] = results[name]["p50_ms"] - baseline
+            results["budget_ms"] = CLI_STARTUP_BUDGET_MS
+            for name in ("today", "teacher", "room"):
+                within = results[name]["overhead_ms"] < CLI_STARTUP_BUDGET_MS
+                results[f"{name}_within_budget"] = within
+                if not within:
+                    self.budget_failures.append(
+                        f"cli_startup {name}: +{results[name]['overhead_ms']:.1f} мс "
+                        f"(бюджет {CLI_STARTUP_BUDGET_MS:.0f} мс)"
+                    )
+        self.results["cli_startup"] = results
+        print(
+            "cli_startup: "
+            + ", ".join(
+                f"{name} +{results[name]['overhead_ms']:.1f} мс"
+                for name in ("today", "teacher", "room")
+            )
+            + " к запуску python",
+            file=sys.stderr,
+        )
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", help="Каталог с записанными ответами (см. fixtures.save/record)")
+    parser.add_argument("--groups", type=int, default=400, help="Число групп для генерации")
+    parser.add_argument("--lessons-per-group", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--latency", type=float, default=0.005, help="Задержка сервера, с")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency-sample", type=int, default=50)
+    parser.add_argument("--stages", default=",".join(DEFAULT_STAGES))
+    parser.add_argument("--no-memory", action="store_true", help="Не замерять пиковую память")
+    parser.add_argument("--output", help="Файл для JSON-результатов (по умолчанию stdout)")
+    args = parser.parse_args(argv)
+
+    if args.fixtures:
+        fixtures = fixtures_module.load(args.fixtures)
+    else:
+        fixtures = fixtures_module.synthesize(
+            groups=args.groups, lessons_per_group=args.lessons_per_group, seed=args.seed
+        )
+
+    runner = BenchmarkRunner(args, fixtures)
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    for stage in stages:
+        method = getattr(runner, f"stage_{stage}", None)
+        if method is None:
+            parser.error(f"Неизвестный этап: {stage}")
+        method()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "groups": len(runner.group_names),
+            "lessons": runner.total_lessons,
+            "latency_s": args.latency,
+            "fixtures": args.fixtures or "synthetic",
+        },
+        "results": runner.results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    if runner.budget_failures:
+        parser.exit(1, "Превышен бюджет:\n" + "\n".join(runner.budget_failures) + "\n")
+    return report
+
+
+if __name__ == "__main__":
+    main()
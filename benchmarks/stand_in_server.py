@@ -0,0 +1,113 @@
+# benchmarks/stand_in_server.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+
+from benchmarks.fixtures import Fixtures
+
+
+class StandInServer:
+    """
+    Локальная замена https://miet.ru/schedule: отдаёт записанные или
+    сгенерированные ответы groups и data с искусственной задержкой.
+    Адрес для MietScheduleClient(base_url=...) — в поле base_url.
+    """
+
+    def __init__(
+        self,
+        fixtures: Fixtures,
+        latency: float = 0.0,
+        port: int = 0,
+        delays: Optional[Dict[str, float]] = None,
+    ):
+        """
+        :param latency: Задержка ответа в секундах (имитация сети и сервера).
+        :param port: Порт; 0 — выбрать свободный.
+        :param delays: Задержка ответа data для отдельных групп (вместо latency).
+        """
+        group_names, responses = fixtures
+        self.latency = latency
+        self.delays = delays or {}
+        self.requests = 0
+        # Сколько запросов обрабатывается сейчас и сколько обрабатывалось одновременно
+        self.active = 0
+        self.max_active = 0
+        self._groups_body = json.dumps(group_names, ensure_ascii=False).encode("utf-8")
+        # Тела ответов кодируем заранее, чтобы сервер не влиял на замеры клиента
+        self._data_bodies: Dict[str, bytes] = {
+            name: json.dumps(data, ensure_ascii=False).encode("utf-8")
+            for name, data in responses.items()
+        }
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/schedule"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело пишутся отдельно: без TCP_NODELAY каждый ответ
+            # ждёт ~40 мс из-за алгоритма Нейгла и отложенного ACK
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes, delay: Optional[float] = None) -> None:
+                with server._lock:
+                    server.requests += 1
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+                try:
+                    delay = server.latency if delay is None else delay
+                    if delay:
+                        time.sleep(delay)
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/schedule/groups"):
+                    return self._reply(200, server._groups_body)
+                self._reply(404, b'{"error": "not found"}')
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = parse_qs(self.rfile.read(length).decode("utf-8"))
+                group = payload.get("group", [""])[0]
+                body = server._data_bodies.get(group)
+                delay = server.delays.get(group)
+                if not self.path.rstrip("/").endswith("/schedule/data") or body is None:
+                    return self._reply(404, b'{"error": "not found"}', delay)
+                self._reply(200, body, delay)
+
+        return Handler
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -1,34 +1,35 @@
 # get_today_schedule.py
 from datetime import datetime
 from miet_schedule_api import (
+    GroupSchedule,
+    Lesson,
     MietScheduleClient,
     display_formatted_schedule,  # Эта функция теперь использует _default_format_schedule_item
 )
-from typing import Dict, Any  # Для аннотаций типов
+from schedule_cache import ScheduleCache, default_cache_path
 
 # Имя группы, для которой нужно получить расписание
 TARGET_GROUP_NAME = "ИВТ-13"  # Можете изменить на любую другую группу
 
 
 def main():
-    client = MietScheduleClient()
+    # Повторные запуски берут расписание из дискового кэша
+    client = MietScheduleClient(cache=ScheduleCache(default_cache_path()))
 
     print(f"Получение расписания для группы: {TARGET_GROUP_NAME}")
-    full_schedule_data: Dict[str, Any] | None = client.get_schedule_for_group(
-        TARGET_GROUP_NAME
-    )
+    # Расписание сразу разложено по (неделя, день) и отсортировано по парам
+    group_schedule: GroupSchedule | None = client.load_group_schedule(TARGET_GROUP_NAME)
 
-    if not full_schedule_data:
+    if group_schedule is None:
         print(
             f"Не удалось получить расписание для группы {TARGET_GROUP_NAME}. "
             "Проверьте имя группы или доступность API."
         )
         return
 
-    all_lessons_for_group: list[Dict[str, Any]] = full_schedule_data.get("Data", [])
-    semestr_name: str = full_schedule_data.get("Semestr", "Текущий семестр")
+    semestr_name: str = group_schedule.semestr or "Текущий семестр"
 
-    if not all_lessons_for_group:
+    if not group_schedule.lessons:
         print(
             f"Нет данных о расписании для группы {TARGET_GROUP_NAME} в семестре {semestr_name}."
         )
@@ -44,16 +45,8 @@ def main():
         current_week_number
     )
 
-    # Фильтруем занятия на сегодня (правильный день и правильная неделя)
-    todays_lessons: list[Dict[str, Any]] = []
-    for lesson in all_lessons_for_group:
-        # "Day" - это код дня недели (1-7) из API
-        # "DayNumber" - это номер недели (0-3) из API
-        if (
-            lesson.get("Day") == today_api_day_code
-            and lesson.get("DayNumber") == current_week_number
-        ):
-            todays_lessons.append(lesson)
+    # Занятия на сегодня (правильный день и правильная неделя) — одно обращение к индексу
+    todays_lessons: list[Lesson] = group_schedule.lessons_on(today_date)
 
     today_day_string = MietScheduleClient.get_day_string_by_day_code(today_api_day_code)
 
@@ -1,95 +1,76 @@
 # main.py (или твой основной скрипт)
-from typing import Any, Dict, List, Optional
+from typing import Optional
 
 from miet_schedule_api import (  # Импортируем класс и функции
-    MietScheduleClient, MietScheduleError, display_formatted_schedule,
-    format_schedule_item_info)
+    MietScheduleClient, display_formatted_schedule)
+from schedule_cache import ScheduleCache, default_cache_path
+from schedule_index import ScheduleIndex
+from schedule_names import TEACHER, NameResolver
 
 
-def find_teacher_schedule(teacher_name_part: str):
-    """
-    Находит и выводит расписание для указанного преподавателя по всем группам.
-    """
-    client = MietScheduleClient()
-    print(f"Поиск расписания для преподавателя, содержащего: '{teacher_name_part}'")
-
+def build_schedule_index(
+    client: MietScheduleClient, max_concurrency: int = 8
+) -> Optional[ScheduleIndex]:
+    """Обходит все группы один раз и строит индекс для поиска по преподавателям и аудиториям."""
     all_groups = client.get_all_groups()
     if not all_groups:
         print("Не удалось получить список групп.")
-        return
+        return None
 
-    teacher_schedule_items: List[Dict[str, Any]] = []
-    processed_groups = 0
     total_groups = len(all_groups)
-
     print(f"Всего групп для обработки: {total_groups}")
 
-    for i, group_name in enumerate(all_groups):
-        # Для примера можно ограничить количество групп для теста
-        # if i >= 10: # Убери или настрой для полного сканирования
-        #     print("Достигнут лимит тестовых групп.")
-        #     break
-
-        print(f"Обработка группы {i+1}/{total_groups}: {group_name}...")
-        group_schedule_data = client.get_schedule_for_group(group_name)
-
-        if group_schedule_data and "Data" in group_schedule_data:
-            for item in group_schedule_data["Data"]:
-                class_info = item.get("Class", {})
-                teacher_short = class_info.get("Teacher", "")
-                teacher_full = class_info.get("TeacherFull", "")
+    def crawl():
+        # Группы загружаются параллельно и приходят в порядке готовности
+        for i, result in enumerate(
+            client.get_schedules_for_groups(all_groups, max_concurrency=max_concurrency)
+        ):
+            print(f"Обработана группа {i+1}/{total_groups}: {result.group}")
+            if not result.ok:
+                print(f"  Ошибка: {result.error}")
+            yield result.group, result.data
+
+    index = ScheduleIndex.from_schedules(crawl())
+    if index.failed_groups:
+        print(
+            f"Не удалось загрузить расписание для {len(index.failed_groups)} групп: "
+            f"{', '.join(sorted(index.failed_groups))}"
+        )
+    return index
 
-                # Проверяем и краткое, и полное имя преподавателя
-                if (
-                    teacher_name_part.lower() in teacher_short.lower()
-                    or teacher_name_part.lower() in teacher_full.lower()
-                ):
-                    # Добавляем информацию о группе в элемент расписания для удобства
-                    item_copy = (
-                        item.copy()
-                    )  # Копируем, чтобы не изменять исходные данные
-                    item_copy["Group"] = {
-                        "Name": group_name
-                    }  # Или взять из item.get("Group", {}).get("Name") если есть
-                    teacher_schedule_items.append(item_copy)
-        processed_groups += 1
 
+def find_teacher_schedule(
+    teacher_name_part: str, index: Optional[ScheduleIndex] = None
+):
+    """
+    Находит и выводит расписание для указанного преподавателя по всем группам.
+    Если индекс не передан, он строится полным обходом групп.
+    """
+    print(f"Поиск расписания для преподавателя, содержащего: '{teacher_name_part}'")
+    if index is None:
+        # Дисковый кэш: повторный поиск не обходит заново все группы на сайте
+        client = MietScheduleClient(cache=ScheduleCache(default_cache_path()))
+        index = build_schedule_index(client)
+        if index is None:
+            return
+
+    # Занятия в индексе уже отсортированы по дню, номеру недели и времени
+    teacher_schedule_items = index.find_by_teacher(teacher_name_part)
     if not teacher_schedule_items:
         print(f"Занятия для преподавателя '{teacher_name_part}' не найдены.")
+        # Возможно, в имени опечатка: предлагаем близкие имена
+        matches = NameResolver.from_lessons(index.lessons).resolve(teacher_name_part, TEACHER)
+        if matches:
+            print("Возможно, вы искали:")
+            for match in matches:
+                print(f"- {match.name}")
         return
 
     print(f"\n--- Найдено расписание для преподавателя '{teacher_name_part}' ---")
-
-    # Можно отсортировать по дню, потом по номеру недели, потом по времени
-    # Day (1-6), DayNumber (0-3), Time.Code (1-8)
-    teacher_schedule_items_sorted = sorted(
-        teacher_schedule_items,
-        key=lambda x: (
-            x.get("Day", 0),
-            x.get("DayNumber", 0),
-            x.get("Time", {}).get("Code", 0),
-        ),
+    display_formatted_schedule(
+        teacher_schedule_items, semestr=index.semestr or "не определен"
     )
 
-    # Отображение (можно создать свою функцию для этого или адаптировать display_formatted_schedule)
-    # Для простоты, сгруппируем как в display_formatted_schedule
-    # Семестр может быть разным, если преподаватель ведет в разных семестрах (маловероятно для одного запроса, но...)
-    # Возьмем семестр из первого найденного расписания, если есть
-    example_semestr = "не определен"
-    if teacher_schedule_items_sorted:
-        # Пытаемся получить семестр из данных группы, если он там есть
-        first_item_group_name = (
-            teacher_schedule_items_sorted[0].get("Group", {}).get("Name")
-        )
-        if first_item_group_name:
-            first_group_data = client.get_schedule_for_group(
-                first_item_group_name
-            )  # Повторный запрос, не оптимально
-            if first_group_data and "Semestr" in first_group_data:
-                example_semestr = first_group_data["Semestr"]
-
-    display_formatted_schedule(teacher_schedule_items_sorted, semestr=example_semestr)
-
 
 if __name__ == "__main__":
     client = MietScheduleClient()
@@ -109,11 +90,11 @@ if __name__ == "__main__":
     #
     #     my_group_input = input("Введите название вашей группы: ").strip()
     #
-    #     found_group_name = None
-    #     for g_name in all_groups_list:
-    #         if g_name.upper() == my_group_input.upper():
-    #             found_group_name = g_name
-    #             break
+    #     # Индекс имён строится один раз; он находит группу и с опечаткой,
+    #     # и в английской раскладке ("bdn-13" -> "ИВТ-13")
+    #     group_names = NameResolver.from_names(groups=all_groups_list)
+    #     match = group_names.best(my_group_input, GROUP)
+    #     found_group_name = match.name if match else None
     #
     #     if found_group_name:
     #         print(f"\nПолучение расписания для группы: {found_group_name}...")
@@ -1,17 +1,34 @@
 # miet_schedule_api.py
-import json
-from datetime import datetime, timedelta
+import itertools
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
 from typing import (  # Добавил Callable для будущей гибкости, если понадобится
-    Any, Callable, Dict, List, Optional)
+    Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence,
+    Tuple, TypeVar, Union)
 from urllib.parse import quote
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from request_coalescer import SingleFlight, copy_json
+from request_scheduler import (InstrumentedHTTPAdapter, RequestScheduler,
+                               take_connect_time)
+from schedule_cache import ScheduleCache
+from schedule_calendar import DAY_NAMES, WEEK_TEXTS, get_default_calendar
+from schedule_metrics import (CACHE_LOOKUPS_TOTAL, REQUEST_ERRORS_TOTAL,
+                              REQUEST_PHASE_SECONDS, REQUESTS_TOTAL,
+                              RESPONSE_BYTES_TOTAL, MetricsRegistry,
+                              get_default_registry)
+from schedule_models import (GroupSchedule, Lesson, LessonLike, PairTimeTable,
+                             as_lesson, find_shared_pair_times, parse_lessons,
+                             remember_pair_times)
+from schedule_render import TextRenderer, format_lesson_line
+from schedule_stream import ScheduleStream
 
 # Константы
 BASE_URL = "https://miet.ru/schedule"
-SCHEDULE_START_DATE_STR = (
-    "2025-01-06"  # Понедельник (Примерная дата, установите актуальную)
-)
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/115.0",
@@ -28,6 +45,11 @@ HEADERS = {
     "Sec-Fetch-Site": "same-origin",
 }
 
+# Число параллельных запросов при массовой загрузке расписаний по умолчанию
+DEFAULT_MAX_CONCURRENCY = 8
+
+T = TypeVar("T")
+
 
 class MietScheduleError(Exception):
     """Базовый класс для ошибок этого API клиента."""
@@ -47,40 +69,309 @@ class MietApiError(MietScheduleError):
     pass
 
 
+class GroupScheduleResult(NamedTuple):
+    """Результат загрузки расписания одной группы при массовом обходе."""
+
+    group: str
+    data: Optional[Dict[str, Any]]
+    error: Optional[MietScheduleError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class GroupLessonsResult(NamedTuple):
+    """Отфильтрованные занятия одной группы при потоковом обходе."""
+
+    group: str
+    lessons: List[Lesson]
+    semestr: Optional[str] = None
+    error: Optional[MietScheduleError] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# Размер куска при потоковом чтении ответа
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
 class MietScheduleClient:
-    def __init__(self, session: Optional[requests.Session] = None):
+    # Номера клиентов для метки client у датчиков в общем реестре метрик
+    _client_ids = itertools.count(1)
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        base_url: str = BASE_URL,
+        cache: Optional[ScheduleCache] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        singleflight: Optional[SingleFlight] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
         """
         Инициализирует клиент.
         :param session: Опциональная сессия requests для повторного использования соединений.
+        :param base_url: Адрес API расписания (можно подменить, например, на локальный сервер).
+        :param cache: Опциональный кэш ответов API (см. schedule_cache.ScheduleCache).
+        :param scheduler: Таймауты, повторы и ограничение частоты запросов
+            (см. request_scheduler.RequestScheduler). По умолчанию — таймауты и повторы без лимита частоты.
+        :param metrics: Реестр метрик (см. schedule_metrics): время фаз запросов, байты и
+            число вызовов по эндпоинтам. По умолчанию — реестр из enable_metrics(), если он задан;
+            без реестра запросы не замеряются.
+        :param singleflight: Объединение одновременных одинаковых запросов (см.
+            request_coalescer.SingleFlight). По умолчанию одновременные запросы одной
+            группы выполняются один раз; SingleFlight(fresh_for=..., stale_for=...)
+            дополнительно ненадолго переиспользует готовый результат.
+        :param max_concurrency: Размер пула соединений собственной сессии; пул растёт,
+            если массовому обходу нужно больше параллельных запросов.
         """
+        if metrics is None:
+            metrics = get_default_registry()
+        owns_session = session is None
         self.session = session or requests.Session()
+        self._pool_size = 0
+        if owns_session:
+            self._mount_adapter(metrics, max_concurrency)
         self.session.headers.update(HEADERS)  # Устанавливаем заголовки для сессии
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.scheduler = scheduler or RequestScheduler()
+        self.metrics = metrics
+        self.singleflight = singleflight or SingleFlight()
+        self.client_id = str(next(self._client_ids))
+        self._owns_session = owns_session
+        if metrics is not None:
+            # Реестр держит метод слабой ссылкой, так что клиент не живёт вечно
+            metrics.add_collector(self._collect_gauges, client=self.client_id)
+
+    def _mount_adapter(self, metrics: Optional[MetricsRegistry], pool_size: int) -> None:
+        # Пул соединений должен вмещать все потоки массового обхода,
+        # иначе лишние соединения будут закрываться после каждого запроса.
+        # С метриками соединения дополнительно замеряют время connect.
+        adapter_cls = HTTPAdapter if metrics is None else InstrumentedHTTPAdapter
+        adapter = adapter_cls(pool_maxsize=pool_size)
+        previous = self.session.get_adapter("https://") if self._pool_size else None
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool_size = pool_size
+        if previous is not None:
+            # Занятые соединения старого пула закроются, когда запросы их вернут
+            previous.close()
+
+    def _ensure_pool(self, max_concurrency: int) -> None:
+        """Увеличивает пул соединений собственной сессии до max_concurrency."""
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency должен быть не меньше 1")
+        if self._owns_session and max_concurrency > self._pool_size:
+            self._mount_adapter(self.metrics, max_concurrency)
+
+    def _run_bounded(
+        self, fn: Callable[[str], T], groups: Iterable[str], max_concurrency: int
+    ) -> Iterator[Tuple[str, "Future[T]"]]:
+        """
+        Выполняет fn для групп в пуле потоков и выдаёт (группа, future) по мере готовности.
+        Группы берутся из итератора по одной по мере освобождения мест, так что в
+        работе не больше max_concurrency запросов, а выданные результаты не копятся.
+        """
+        self._ensure_pool(max_concurrency)
+        remaining = iter(groups)
+        pending: Dict["Future[T]", str] = {}
+        with ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="miet-schedule"
+        ) as executor:
+
+            def submit_next() -> bool:
+                for group_name in remaining:
+                    pending[executor.submit(fn, group_name)] = group_name
+                    return True
+                return False
+
+            try:
+                while len(pending) < max_concurrency and submit_next():
+                    pass
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        group_name = pending.pop(future)
+                        # Место освободилось — следующий запрос идёт, пока потребитель
+                        # обрабатывает этот результат
+                        submit_next()
+                        yield group_name, future
+            finally:
+                # Если потребитель прервал обход, не дожидаемся оставшихся запросов
+                for future in pending:
+                    future.cancel()
+
+    def close(self) -> None:
+        """Убирает датчики клиента из реестра метрик и закрывает созданную им сессию."""
+        if self.metrics is not None:
+            self.metrics.remove_collector(self._collect_gauges)
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "MietScheduleClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _collect_gauges(self) -> Dict[str, float]:
+        """Счётчики планировщика и кэша в виде метрик-датчиков."""
+        gauges = {
+            f"miet_scheduler_{name}": value
+            for name, value in self.scheduler.stats.as_dict().items()
+        }
+        gauges.update(
+            (f"miet_singleflight_{name}", value)
+            for name, value in self.singleflight.stats.as_dict().items()
+        )
+        if self.cache is not None:
+            gauges.update(
+                (f"miet_cache_{name}", value)
+                for name, value in self.cache.stats.as_dict().items()
+            )
+        return gauges
 
     def _request(self, method: str, endpoint: str, **kwargs) -> Any:
-        """Внутренний метод для выполнения запросов."""
-        url = f"{BASE_URL}/{endpoint}"
+        """
+        Внутренний метод для выполнения запросов. Одновременные одинаковые запросы
+        (метод, эндпоинт, тело) из разных потоков выполняются один раз.
+        Результат общий для объединённых вызовов (и для кэша), поэтому каждый
+        вызывающий получает свою копию и может изменять её.
+        """
+        key = ScheduleCache.make_key(method, endpoint, kwargs.get("data"))
+        return copy_json(
+            self.singleflight.do(key, lambda: self._cached_request(key, method, endpoint, **kwargs))
+        )
+
+    def _cached_request(self, key: str, method: str, endpoint: str, **kwargs) -> Any:
+        """Выполняет запрос через кэш, если он задан."""
+        if self.cache is None:
+            return self._send(method, endpoint, **kwargs)
+
+        entry = self.cache.get(key)
+        if entry is not None and entry.fresh:
+            if self.metrics is not None:
+                self.metrics.inc(CACHE_LOOKUPS_TOTAL, endpoint=endpoint, result="hit")
+            return entry.value
+
+        # Устаревшую запись перепроверяем условным запросом
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        response = self._send(method, endpoint, headers=headers, raw=True, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            if self.metrics is not None:
+                self.metrics.inc(CACHE_LOOKUPS_TOTAL, endpoint=endpoint, result="revalidated")
+            self.cache.touch(key, endpoint)
+            return entry.value
+
+        if self.metrics is not None:
+            self.metrics.inc(CACHE_LOOKUPS_TOTAL, endpoint=endpoint, result="miss")
+        value = self._decode(response, endpoint)
+        self.cache.set(
+            key,
+            endpoint,
+            value,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        return value
+
+    def _send(self, method: str, endpoint: str, raw: bool = False, **kwargs) -> Any:
+        """
+        Выполняет HTTP-запрос к API.
+        :param raw: Вернуть объект ответа requests вместо декодированного JSON.
+        """
+        url = f"{self.base_url}/{endpoint}"
+        kwargs.setdefault("timeout", self.scheduler.timeout)
         try:
-            response = self.session.request(method, url, **kwargs)
+            if self.metrics is None:
+                response = self.scheduler.run(
+                    lambda: self.session.request(method, url, **kwargs)
+                )
+            else:
+                response = self._timed_request(method, endpoint, url, kwargs)
             response.raise_for_status()  # Вызовет исключение для 4xx/5xx ошибок
-            return response.json()
+            if raw:
+                return response
+            return self._decode(response, endpoint)
         except requests.exceptions.HTTPError as e:
-            error_text = e.response.text if e.response else "Нет тела ответа"
+            # Response с кодом 4xx/5xx ложен в булевом контексте, поэтому сравниваем с None
+            has_response = e.response is not None
+            status = e.response.status_code if has_response else "N/A"
+            if self.metrics is not None:
+                self.metrics.inc(REQUEST_ERRORS_TOTAL, endpoint=endpoint, status=status)
+            error_text = e.response.text[:200] if has_response else "Нет тела ответа"
             raise MietNetworkError(
-                f"HTTP ошибка при запросе к {url}: {e.response.status_code if e.response else 'N/A'} - {error_text}"
+                f"HTTP ошибка при запросе к {url}: {status} - {error_text}"
             ) from e
         except requests.exceptions.RequestException as e:
+            if self.metrics is not None:
+                # Ответа нет: вместо кода — признак сетевой ошибки
+                self.metrics.inc(REQUEST_ERRORS_TOTAL, endpoint=endpoint, status="network")
             raise MietNetworkError(f"Ошибка сети при запросе к {url}: {e}") from e
-        except json.JSONDecodeError as e:
+
+    def _timed_request(
+        self, method: str, endpoint: str, url: str, kwargs: Dict[str, Any]
+    ) -> requests.Response:
+        """
+        Выполняет запрос с замером фаз: connect (TCP/TLS новых соединений),
+        wait (отправка запроса и ожидание заголовков ответа, включая повторы)
+        и download (чтение тела; для потоковых запросов не замеряется).
+        """
+        metrics = self.metrics
+        stream = kwargs.pop("stream", False)
+        take_connect_time()  # Сбрасываем остаток от предыдущих запросов потока
+        started = time.perf_counter()
+        response = self.scheduler.run(
+            lambda: self.session.request(method, url, stream=True, **kwargs)
+        )
+        headers_at = time.perf_counter()
+        connect = take_connect_time()
+        metrics.inc(REQUESTS_TOTAL, endpoint=endpoint, status=response.status_code)
+        metrics.observe(REQUEST_PHASE_SECONDS, connect, endpoint=endpoint, phase="connect")
+        metrics.observe(
+            REQUEST_PHASE_SECONDS, headers_at - started - connect, endpoint=endpoint, phase="wait"
+        )
+        if not stream:
+            body = response.content
+            metrics.observe(
+                REQUEST_PHASE_SECONDS,
+                time.perf_counter() - headers_at,
+                endpoint=endpoint,
+                phase="download",
+            )
+            metrics.inc(RESPONSE_BYTES_TOTAL, len(body), endpoint=endpoint)
+        return response
+
+    def _decode(self, response: requests.Response, endpoint: Optional[str] = None) -> Any:
+        """Декодирует JSON-ответ API."""
+        started = time.perf_counter() if self.metrics is not None else 0.0
+        try:
+            value = response.json()
+        except requests.exceptions.JSONDecodeError as e:
             # Если сервер вернул не JSON
-            # 'response' может быть не определена, если ошибка произошла до получения ответа
-            resp_text = kwargs.get("response", None)
-            if resp_text and hasattr(resp_text, "text"):
-                resp_text_snippet = resp_text.text[:200]
-            else:
-                resp_text_snippet = "Ответ не получен или не содержит текст"
+            resp_text_snippet = response.text[:200] if response.text else "Пустой ответ"
             raise MietApiError(
-                f"Ошибка декодирования JSON ответа от {url}: {e}. Ответ: {resp_text_snippet}..."
+                f"Ошибка декодирования JSON ответа от {response.url}: {e}. Ответ: {resp_text_snippet}..."
             ) from e
+        if self.metrics is not None:
+            self.metrics.observe(
+                REQUEST_PHASE_SECONDS,
+                time.perf_counter() - started,
+                endpoint=endpoint or "unknown",
+                phase="decode",
+            )
+        return value
 
     def get_all_groups(self) -> Optional[List[str]]:
         """Получает список всех групп с сайта МИЭТ."""
@@ -91,215 +382,238 @@ class MietScheduleClient:
             print(f"Ошибка при получении списка групп: {e}")
             return None
 
+    def _fetch_schedule(self, group_name: str) -> Dict[str, Any]:
+        """Запрашивает расписание группы, пробрасывая ошибки MietScheduleError."""
+        payload_str = f"group={quote(group_name.encode('utf-8'))}"
+        data = self._request("POST", "data", data=payload_str)
+        if not isinstance(data, dict):
+            raise MietApiError(
+                f"Неожиданный формат расписания для группы {group_name}: {type(data).__name__}"
+            )
+        # Общая таблица звонков семестра (для get_pair_time_info): каждая группа
+        # учитывается один раз, повторные загрузки из кэша её не трогают
+        remember_pair_times(data.get("Semestr"), data.get("Data", []), source=group_name)
+        return data
+
     def get_schedule_for_group(self, group_name: str) -> Optional[Dict[str, Any]]:
         """
         Получает расписание для указанной группы.
         Возвращает полный JSON-объект ответа.
         """
-        payload_str = f"group={quote(group_name.encode('utf-8'))}"
         try:
-            return self._request("POST", "data", data=payload_str)
+            return self._fetch_schedule(group_name)
         except MietScheduleError as e:
             # Можно логировать ошибку или обрабатывать специфичнее
             print(f"Ошибка при получении расписания для группы {group_name}: {e}")
             return None
 
+    def stream_schedule_for_group(
+        self,
+        group_name: str,
+        predicate: Optional[Callable[[Lesson], bool]] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> ScheduleStream:
+        """
+        Загружает расписание группы потоково: массив Data разбирается по мере
+        получения ответа, и занятия выдаются по одному (только подходящие под predicate).
+        Полный ответ в памяти не хранится, кэш не используется.
+        Ошибки соединения пробрасываются сразу (MietNetworkError), ошибки разбора
+        и обрыва потока — во время итерации (MietApiError, MietNetworkError).
+        """
+        payload_str = f"group={quote(group_name.encode('utf-8'))}"
+        response = self._send("POST", "data", raw=True, stream=True, data=payload_str)
+        url = response.url
+        metrics = self.metrics
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                if metrics is None:
+                    yield from response.iter_content(chunk_size)
+                    return
+                # Загрузка перемежается с разбором, поэтому считаем только байты
+                for chunk in response.iter_content(chunk_size):
+                    metrics.inc(RESPONSE_BYTES_TOTAL, len(chunk), endpoint="data")
+                    yield chunk
+            except requests.exceptions.RequestException as e:
+                raise MietNetworkError(f"Обрыв ответа от {url}: {e}") from e
+
+        return ScheduleStream(
+            chunks(),
+            group_name,
+            predicate,
+            on_close=response.close,
+            wrap_error=lambda e: MietApiError(f"Ошибка разбора ответа от {url}: {e}"),
+        )
+
+    def scan_groups(
+        self,
+        groups: Iterable[str],
+        predicate: Optional[Callable[[Lesson], bool]] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> Iterator[GroupLessonsResult]:
+        """
+        Потоковый обход групп: для каждой группы в памяти остаются только занятия,
+        прошедшие predicate. Результаты выдаются по мере готовности.
+        """
+
+        def scan(group_name: str) -> GroupLessonsResult:
+            stream = self.stream_schedule_for_group(group_name, predicate)
+            lessons = list(stream)
+            return GroupLessonsResult(group_name, lessons, stream.semestr)
+
+        for group_name, future in self._run_bounded(scan, groups, max_concurrency):
+            try:
+                yield future.result()
+            except MietScheduleError as e:
+                yield GroupLessonsResult(group_name, [], None, e)
+
+    def load_group_schedule(self, group_name: str) -> Optional[GroupSchedule]:
+        """
+        Получает расписание группы и строит по нему индексы по датам и неделям
+        (см. GroupSchedule). Возвращает None при ошибке, как get_schedule_for_group.
+        """
+        data = self.get_schedule_for_group(group_name)
+        if data is None:
+            return None
+        return GroupSchedule.from_response(group_name, data)
+
+    def get_schedules_for_groups(
+        self,
+        groups: Iterable[str],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> Iterator[GroupScheduleResult]:
+        """
+        Загружает расписания нескольких групп параллельно (пул потоков поверх общей сессии).
+        Результаты выдаются по мере готовности, а не в порядке groups.
+        Ошибка по отдельной группе не прерывает обход: она возвращается в поле error.
+        groups может быть ленивым итератором: одновременно в работе не больше
+        max_concurrency групп.
+        """
+        for group_name, future in self._run_bounded(self._fetch_schedule, groups, max_concurrency):
+            try:
+                yield GroupScheduleResult(group_name, future.result())
+            except MietScheduleError as e:
+                yield GroupScheduleResult(group_name, None, e)
+
     @staticmethod
     def get_current_week_day_number(target_date: Optional[datetime] = None) -> int:
         """
         Вычисляет номер текущей недели (0-3) для указанной даты.
         0: 1-й числитель, 1: 1-й знаменатель, 2: 2-й числитель, 3: 2-й знаменатель.
+        Использует календарь семестра по умолчанию (см. schedule_calendar).
         """
-        if target_date is None:
-            target_date = datetime.now()
-
-        start_date_obj = datetime.strptime(SCHEDULE_START_DATE_STR, "%Y-%m-%d")
-
-        # Приводим обе даты к началу их недель (понедельнику)
-        start_of_target_week = target_date - timedelta(days=target_date.weekday())
-        start_of_start_date_week = start_date_obj - timedelta(
-            days=start_date_obj.weekday()
-        )
-
-        week_diff = (start_of_target_week - start_of_start_date_week).days // 7
-        return week_diff % 4
+        return get_default_calendar().week_number(target_date)
 
     @staticmethod
     def get_week_text_by_day_number(day_number_val: int) -> str:
         """Возвращает текстовое описание недели по ее номеру (0-3)."""
-        week_map = {
-            0: "1-й числитель",
-            1: "1-й знаменатель",
-            2: "2-й числитель",
-            3: "2-й знаменатель",
-        }
-        return week_map.get(day_number_val, f"Неизвестная неделя ({day_number_val})")
+        return WEEK_TEXTS.get(day_number_val, f"Неизвестная неделя ({day_number_val})")
 
     @staticmethod
     def get_day_string_by_day_code(day_code: int) -> str:
         """Возвращает строковое представление дня недели по его коду (1-7)."""
-        days_map = {
-            1: "Понедельник",
-            2: "Вторник",
-            3: "Среда",
-            4: "Четверг",
-            5: "Пятница",
-            6: "Суббота",
-            7: "Воскресенье",
-        }
-        return days_map.get(day_code, f"День {day_code}")
+        return DAY_NAMES.get(day_code, f"День {day_code}")
 
     @staticmethod
     def get_pair_time_info(
-        lessons_data: List[Dict[str, Any]],
+        lessons_data: Union[GroupSchedule, PairTimeTable, Sequence[LessonLike]],
         pair_identifier: Any,  # Может быть int (код пары) или str ("1 пара")
+        semestr: Optional[str] = None,
     ) -> Optional[Dict[str, Optional[str]]]:
         """
-        Находит информацию о времени (TimeFrom, TimeTo) для указанной пары
-        из предоставленного списка данных о занятиях.
-        Ищет первое совпадение.
+        Находит информацию о времени (TimeFrom, TimeTo) для указанной пары.
+        Сначала — в собственных данных группы: для GroupSchedule и PairTimeTable это
+        поиск в таблице звонков за O(1); список занятий (Lesson или записи API)
+        один раз сводится в такую таблицу (для многих поисков по одному списку
+        постройте её сами — PairTimeTable.from_lessons).
+        Только если пары там нет и указан semestr (или он известен GroupSchedule),
+        проверяется общая таблица звонков семестра (пополняется при загрузке расписаний).
         """
-        if not lessons_data:
-            return None
-
-        for lesson in lessons_data:
-            time_data = lesson.get("Time")
-            if not isinstance(time_data, dict):
-                continue
-
-            match_found = False
-            if (
-                isinstance(pair_identifier, int)
-                and time_data.get("Code") == pair_identifier
-            ):
-                match_found = True
-            elif (
-                isinstance(pair_identifier, str)
-                and time_data.get("Time") == pair_identifier
-            ):
-                match_found = True
-
-            if match_found:
-                return {
-                    "TimeFrom": time_data.get("TimeFrom"),
-                    "TimeTo": time_data.get("TimeTo"),
-                }
-        return None
+        if isinstance(lessons_data, GroupSchedule):
+            return lessons_data.pair_time(pair_identifier)
+        if isinstance(lessons_data, PairTimeTable):
+            table = lessons_data
+        else:
+            table = PairTimeTable.from_lessons(lessons_data or ())
+        times = table.lookup(pair_identifier)
+        if times is None:
+            shared = find_shared_pair_times(semestr)
+            if shared is not None:
+                times = shared.lookup(pair_identifier)
+        return times
 
 
 # --- Вспомогательные функции для форматирования и отображения ---
 
 
-def _default_format_schedule_item(item: Dict[str, Any]) -> str:
+def _default_format_schedule_item(item: LessonLike) -> str:
     """
-    Базовая функция форматирования одной записи расписания.
+    Базовая функция форматирования одной записи расписания (Lesson или записи API).
     Включает время начала и конца пары.
     """
-    time_data = item.get("Time", {})
-    class_info = item.get("Class", {})
-    room_info = item.get("Room", {})
-
-    pair_text = time_data.get("Time", "N/A")  # "1 пара"
-    time_from = time_data.get("TimeFrom", "")  # "09:00"
-    time_to = time_data.get("TimeTo", "")  # "10:20"
-
-    time_str_display = pair_text
-    if time_from and time_to:
-        time_str_display = f"{pair_text} ({time_from}-{time_to})"
-    elif time_from:  # Если есть только время начала
-        time_str_display = f"{pair_text} (с {time_from})"
-    elif time_to:  # Если есть только время конца (маловероятно, но для полноты)
-        time_str_display = f"{pair_text} (до {time_to})"
-    # Если нет ни TimeFrom, ни TimeTo, останется просто pair_text
-
-    subject_full_name = class_info.get("Name", "N/A")
-    is_distant = class_info.get("Form", False)
-    distant_str = ""
-
-    if is_distant:
-        distant_str = "[ДСТ] "
-        if subject_full_name.startswith("[ДСТ]"):
-            subject_full_name = subject_full_name[len("[ДСТ]") :].lstrip()
-
-    class_type = ""
-    subject_name = subject_full_name
-    if "[" in subject_full_name and "]" in subject_full_name:
-        start_bracket = subject_full_name.rfind("[")
-        end_bracket = subject_full_name.rfind("]")
-        if start_bracket != -1 and end_bracket != -1 and start_bracket < end_bracket:
-            potential_type = subject_full_name[start_bracket + 1 : end_bracket]
-            if (
-                len(potential_type) <= 5
-                and potential_type.isalpha()
-                and potential_type.upper() == potential_type
-            ):  # Тип обычно в верхнем регистре
-                class_type = potential_type
-                subject_name = subject_full_name[:start_bracket].strip()
-
-    room = room_info.get("Name", "N/A")
-    teacher = class_info.get("Teacher", "N/A")  # Краткое имя
-
-    day_number_val = item.get("DayNumber")  # Это номер недели (0-3)
-    week_type_str = MietScheduleClient.get_week_text_by_day_number(day_number_val)
-
-    class_type_display = f" [{class_type}]" if class_type else ""
-
-    group_name_info = item.get("Group", {})  # Безопасное извлечение
-    group_name = group_name_info.get("Name", "N/A") if group_name_info else "N/A"
-
-    return (
-        f"{time_str_display}: {distant_str}{subject_name}{class_type_display} - Ауд: {room}, "
-        f"Преп: {teacher} ({week_type_str}) [Группа: {group_name}]"
-    )
+    return format_lesson_line(as_lesson(item))
+
+
+# Общий отрисовщик для форматирования по умолчанию: его кэш строк переживает вызовы
+_default_text_renderer = TextRenderer()
+
+
+class _CompatibleFormatter:
+    """
+    Обёртка над пользовательским item_formatter: форматтеры, написанные под записи
+    API (item.get(...), item["Time"]), получают словарь Lesson.to_item().
+    Что ждёт форматтер, выясняется на первом занятии: если вызов с Lesson падает
+    с AttributeError или TypeError, дальше форматтеру передаются словари.
+    """
+
+    def __init__(self, item_formatter: Callable[[Any], str]):
+        self.item_formatter = item_formatter
+        self.takes_dicts: Optional[bool] = None
+
+    def __call__(self, lesson: Lesson) -> str:
+        if self.takes_dicts:
+            return self.item_formatter(lesson.to_item())
+        if self.takes_dicts is None:
+            try:
+                line = self.item_formatter(lesson)
+            except (AttributeError, TypeError):
+                line = self.item_formatter(lesson.to_item())
+                self.takes_dicts = True
+            else:
+                self.takes_dicts = False
+            return line
+        return self.item_formatter(lesson)
 
 
 def display_formatted_schedule(
-    schedule_items: List[Dict[str, Any]],
+    schedule_items: Union[GroupSchedule, Sequence[LessonLike]],
     semestr: str,
     current_week_text: Optional[str] = None,
-    item_formatter: Callable[[Dict[str, Any]], str] = _default_format_schedule_item,
+    item_formatter: Callable[[Any], str] = _default_format_schedule_item,
 ):
-    """Отображает отформатированный список занятий, сгруппированный по дням."""
-    if not schedule_items:
-        # Это сообщение может быть избыточным, если фильтрация происходит до вызова.
-        # print("Нет занятий для отображения.")
-        return
-
-    print(f"\n--- Расписание на {semestr} ---")
-    if current_week_text:
-        print(f"--- (Неделя: {current_week_text}) ---")
-
-    schedule_by_day: Dict[int, List[Dict[str, Any]]] = {}
-    for item in schedule_items:
-        day_code = item.get("Day")
-        if day_code is None:  # Пропускаем занятия без указания дня
-            continue
-        if day_code not in schedule_by_day:
-            schedule_by_day[day_code] = []
-        schedule_by_day[day_code].append(item)
-
-    if not schedule_by_day:
-        # Это сообщение актуально, если schedule_items не пуст,
-        # но после группировки по дням (или из-за фильтра day_code is None) ничего не осталось.
-        print(
-            "Нет занятий для отображения по текущим фильтрам (возможно, не указаны дни)."
-        )
-        return
-
-    for day_code in sorted(schedule_by_day.keys()):
-        day_name = MietScheduleClient.get_day_string_by_day_code(day_code)
-        print(f"\n--- {day_name} ---")
-
-        # Сортировка занятий внутри дня по их коду времени
-        day_items_sorted = sorted(
-            schedule_by_day[day_code], key=lambda x: x.get("Time", {}).get("Code", 0)
-        )
-        for item in day_items_sorted:
-            print(f"  {item_formatter(item)}")
+    """
+    Отображает отформатированный список занятий, сгруппированный по дням.
+    Для GroupSchedule используется его готовая разбивка по дням.
+    Записи API разбираются в Lesson один раз; item_formatter получает Lesson,
+    а форматтер под записи API (со словарём) — запись формата API (Lesson.to_item).
+    Вывод собирается целиком и пишется в stdout одним вызовом (см. schedule_render).
+    """
+    if item_formatter is _default_format_schedule_item:
+        renderer = _default_text_renderer
+    else:
+        renderer = TextRenderer(_CompatibleFormatter(item_formatter))
+    renderer.render_to(sys.stdout, schedule_items, semestr, current_week_text)
 
 
 # Пример использования (можно закомментировать или удалить, если модуль только для импорта)
 if __name__ == "__main__":
+    # python -m miet_schedule_api serve [--port ...] — локальный HTTP API (см. schedule_server)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from schedule_server import main as serve_main
+
+        serve_main(sys.argv[2:])
+        sys.exit(0)
+
     client = MietScheduleClient()
 
     # 1. Получение списка всех групп
@@ -315,7 +629,7 @@ if __name__ == "__main__":
     schedule_data = client.get_schedule_for_group(test_group)
 
     if schedule_data:
-        lessons = schedule_data.get("Data", [])
+        lessons = parse_lessons(schedule_data)  # Разбираем записи один раз
         semestr = schedule_data.get("Semestr", "Текущий семестр")
 
         # Определение текущей недели для фильтрации (показываем только одну неделю для примера)
@@ -327,7 +641,7 @@ if __name__ == "__main__":
         print(f"Фильтруем расписание для недели: {current_week_text_for_display}")
 
         filtered_lessons_for_current_week = [
-            lesson for lesson in lessons if lesson.get("DayNumber") == current_week_num
+            lesson for lesson in lessons if lesson.day_number == current_week_num
         ]
 
         if filtered_lessons_for_current_week:
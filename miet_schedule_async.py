@@ -0,0 +1,194 @@
+# miet_schedule_async.py
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from urllib.parse import quote
+
+import httpx
+
+from miet_schedule_api import (BASE_URL, HEADERS, GroupScheduleResult,
+                               MietApiError, MietNetworkError,
+                               MietScheduleError)
+from request_coalescer import AsyncSingleFlight, copy_json
+from request_scheduler import RequestScheduler
+from schedule_cache import ScheduleCache
+from schedule_models import GroupSchedule, remember_pair_times
+
+# Одновременных запросов к API с одного клиента по умолчанию.
+# Запросы сверх лимита ждут семафор, а не открывают новые соединения.
+DEFAULT_ASYNC_CONCURRENCY = 32
+# Сколько секунд держать простаивающее keep-alive соединение
+KEEPALIVE_EXPIRY = 60.0
+
+# Ошибки соединения и таймауты, после которых запрос повторяется
+_RETRY_EXCEPTIONS = (httpx.TransportError,)
+
+
+def _httpx_timeout(timeout: Any) -> httpx.Timeout:
+    """Таймаут в формате requests (секунды или пара соединение/чтение) -> httpx.Timeout."""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class AsyncMietScheduleClient:
+    """
+    Асинхронный клиент API расписания для asyncio (например, для ботов).
+    Все запросы идут через один httpx.AsyncClient с пулом keep-alive соединений;
+    число одновременных запросов ограничено семафором. Ошибки — те же, что у
+    MietScheduleClient (MietNetworkError, MietApiError).
+
+    Использование:
+        async with AsyncMietScheduleClient() as client:
+            data = await client.get_schedule_for_group("ИВТ-13")
+    """
+
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        base_url: str = BASE_URL,
+        max_concurrency: int = DEFAULT_ASYNC_CONCURRENCY,
+        scheduler: Optional[RequestScheduler] = None,
+        http2: bool = False,
+        singleflight: Optional[AsyncSingleFlight] = None,
+    ):
+        """
+        :param client: Готовый httpx.AsyncClient (заголовки и лимиты тогда задаёт вызывающий).
+        :param base_url: Адрес API расписания.
+        :param max_concurrency: Максимум одновременных запросов (и соединений в пуле).
+        :param scheduler: Таймауты, повторы и ограничение частоты (см. RequestScheduler).
+        :param http2: Использовать HTTP/2 (мультиплексирование запросов в одном
+            соединении); требует пакета h2 (httpx[http2]).
+        :param singleflight: Объединение одновременных одинаковых запросов (см.
+            request_coalescer.AsyncSingleFlight); по умолчанию включено без
+            переиспользования готовых результатов.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency должен быть не меньше 1")
+        self.scheduler = scheduler or RequestScheduler()
+        if client is None:
+            client = httpx.AsyncClient(
+                headers=HEADERS,
+                timeout=_httpx_timeout(self.scheduler.timeout),
+                limits=httpx.Limits(
+                    max_connections=max_concurrency,
+                    max_keepalive_connections=max_concurrency,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                http2=http2,
+            )
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.singleflight = singleflight or AsyncSingleFlight()
+
+    async def __aenter__(self) -> "AsyncMietScheduleClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Закрывает соединения пула."""
+        await self.client.aclose()
+
+    async def _request(self, method: str, endpoint: str, **kwargs) -> Any:
+        """
+        Выполняет запрос; одновременные одинаковые запросы выполняются один раз.
+        Каждый вызывающий получает свою копию общего результата.
+        """
+        key = ScheduleCache.make_key(method, endpoint, kwargs.get("content"))
+        return copy_json(
+            await self.singleflight.do(key, lambda: self._send(method, endpoint, **kwargs))
+        )
+
+    async def _send(self, method: str, endpoint: str, **kwargs) -> Any:
+        """Выполняет запрос к API и декодирует JSON (с повторами и лимитом одновременности)."""
+        url = f"{self.base_url}/{endpoint}"
+        try:
+            async with self._semaphore:
+                response = await self.scheduler.arun(
+                    lambda: self.client.request(method, url, **kwargs), _RETRY_EXCEPTIONS
+                )
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise MietNetworkError(
+                f"HTTP ошибка при запросе к {url}: {e.response.status_code} - {e.response.text[:200]}"
+            ) from e
+        except httpx.HTTPError as e:
+            raise MietNetworkError(f"Ошибка сети при запросе к {url}: {e!r}") from e
+
+        try:
+            return response.json()
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            resp_text_snippet = response.text[:200] if response.text else "Пустой ответ"
+            raise MietApiError(
+                f"Ошибка декодирования JSON ответа от {url}: {e}. Ответ: {resp_text_snippet}..."
+            ) from e
+
+    async def get_all_groups(self) -> Optional[List[str]]:
+        """Получает список всех групп с сайта МИЭТ."""
+        try:
+            return await self._request("GET", "groups")
+        except MietScheduleError as e:
+            print(f"Ошибка при получении списка групп: {e}")
+            return None
+
+    async def _fetch_schedule(self, group_name: str) -> Dict[str, Any]:
+        """Запрашивает расписание группы, пробрасывая ошибки MietScheduleError."""
+        payload_str = f"group={quote(group_name.encode('utf-8'))}"
+        data = await self._request(
+            "POST",
+            "data",
+            content=payload_str,
+            headers={"Content-Type": HEADERS["Content-Type"]},
+        )
+        if not isinstance(data, dict):
+            raise MietApiError(
+                f"Неожиданный формат расписания для группы {group_name}: {type(data).__name__}"
+            )
+        remember_pair_times(data.get("Semestr"), data.get("Data", []), source=group_name)
+        return data
+
+    async def get_schedule_for_group(self, group_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Получает расписание для указанной группы.
+        Возвращает полный JSON-объект ответа или None при ошибке.
+        """
+        try:
+            return await self._fetch_schedule(group_name)
+        except MietScheduleError as e:
+            print(f"Ошибка при получении расписания для группы {group_name}: {e}")
+            return None
+
+    async def load_group_schedule(self, group_name: str) -> Optional[GroupSchedule]:
+        """Расписание группы с индексами по датам и неделям (см. GroupSchedule)."""
+        data = await self.get_schedule_for_group(group_name)
+        if data is None:
+            return None
+        return GroupSchedule.from_response(group_name, data)
+
+    async def get_schedules_for_groups(
+        self, groups: Iterable[str]
+    ) -> AsyncIterator[GroupScheduleResult]:
+        """
+        Загружает расписания нескольких групп конкурентно (не больше max_concurrency
+        запросов одновременно). Результаты выдаются по мере готовности.
+        """
+
+        async def fetch(group_name: str) -> GroupScheduleResult:
+            try:
+                return GroupScheduleResult(group_name, await self._fetch_schedule(group_name))
+            except MietScheduleError as e:
+                return GroupScheduleResult(group_name, None, e)
+
+        tasks = [asyncio.ensure_future(fetch(group_name)) for group_name in groups]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Если потребитель прервал обход, отменяем оставшиеся запросы
+            for task in tasks:
+                task.cancel()
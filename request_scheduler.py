@@ -0,0 +1,259 @@
+# request_scheduler.py
+import asyncio
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# (таймаут соединения, таймаут чтения) в секундах
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+# Ответы, после которых есть смысл повторить запрос
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты запросов ("ведро с токенами"), общий для всех потоков.
+    rate — токенов в секунду, burst — ёмкость ведра (допустимый всплеск).
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate должен быть положительным")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Забирает один токен без ожидания и возвращает, сколько нужно подождать
+        перед запросом (для асинхронного кода, который ждёт сам).
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # Токен "занимается в долг": ожидание вне блокировки, следующие потоки встают в очередь
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """Забирает один токен, при необходимости ожидая. Возвращает время ожидания."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+@dataclass
+class SchedulerStats:
+    """Счётчики планировщика запросов."""
+
+    requests: int = 0  # Попыток (включая повторные)
+    retries: int = 0
+    failures: int = 0  # Запросов, для которых исчерпаны повторы
+    throttled: int = 0  # Попыток, которым пришлось ждать токен
+    throttle_delay: float = 0.0  # Суммарное ожидание токенов, секунд
+    backoff_delay: float = 0.0  # Суммарные паузы между повторами, секунд
+
+    def as_dict(self) -> Dict[str, Union[int, float]]:
+        return asdict(self)
+
+
+class RequestScheduler:
+    """
+    Выполняет HTTP-запросы с таймаутом, повторами с экспоненциальной задержкой
+    (full jitter) при ошибках соединения и ответах 5xx/429, и общим ограничением
+    частоты запросов. Один экземпляр можно использовать из нескольких потоков.
+    """
+
+    def __init__(
+        self,
+        timeout: Union[float, Tuple[float, float], None] = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None,
+    ):
+        """
+        :param timeout: Таймаут запроса для requests (секунды или пара соединение/чтение).
+        :param max_retries: Сколько раз повторять запрос после первой неудачи.
+        :param backoff_base: Базовая задержка; перед n-м повтором ждём до base * 2**n.
+        :param backoff_max: Верхняя граница задержки между повторами.
+        :param rate_limit: Максимум запросов в секунду (None — без ограничения).
+        :param burst: Допустимый всплеск запросов сверх rate_limit.
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.stats = SchedulerStats()
+        self._stats_lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """Задержка перед повтором номер attempt (с нуля): случайная в [0, base * 2**attempt]."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    @staticmethod
+    def _retry_after(response: Any) -> Optional[float]:
+        """Пауза из заголовка Retry-After (ответ requests или httpx)."""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _count(self, **increments: float) -> None:
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def run(self, send: Callable[[], requests.Response]) -> requests.Response:
+        """
+        Выполняет send() с повторами. Возвращает последний ответ (возможно, с ошибочным
+        статусом, если повторы исчерпаны) или пробрасывает последнее исключение requests.
+        """
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                waited = self.bucket.acquire()
+                if waited > 0:
+                    self._count(throttled=1, throttle_delay=waited)
+            self._count(requests=1)
+
+            delay: Optional[float] = None
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    self._count(failures=1)
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if attempt >= self.max_retries:
+                    self._count(failures=1)
+                    return response
+                delay = self._retry_after(response)
+                response.close()  # Возвращаем соединение в пул до паузы
+
+            if delay is None:
+                delay = self.backoff(attempt)
+            delay = min(delay, self.backoff_max)
+            self._count(retries=1, backoff_delay=delay)
+            time.sleep(delay)
+            attempt += 1
+
+    async def arun(
+        self,
+        send: Callable[[], Awaitable[Any]],
+        retry_exceptions: Tuple[Type[BaseException], ...],
+    ) -> Any:
+        """
+        Асинхронный вариант run для httpx и подобных клиентов: паузы не блокируют
+        цикл событий. retry_exceptions — ошибки соединения и таймауты клиента,
+        после которых запрос повторяется.
+        """
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                waited = self.bucket.reserve()
+                if waited > 0:
+                    self._count(throttled=1, throttle_delay=waited)
+                    await asyncio.sleep(waited)
+            self._count(requests=1)
+
+            delay: Optional[float] = None
+            try:
+                response = await send()
+            except retry_exceptions:
+                if attempt >= self.max_retries:
+                    self._count(failures=1)
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if attempt >= self.max_retries:
+                    self._count(failures=1)
+                    return response
+                delay = self._retry_after(response)
+                await response.aclose()  # Возвращаем соединение в пул до паузы
+
+            if delay is None:
+                delay = self.backoff(attempt)
+            delay = min(delay, self.backoff_max)
+            self._count(retries=1, backoff_delay=delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# --- Замер времени установления соединения ---
+
+_connect_time = threading.local()
+
+
+def take_connect_time() -> float:
+    """
+    Время установления соединений (TCP и TLS) в текущем потоке с прошлого вызова, секунд.
+    Учитываются только соединения сессий с InstrumentedHTTPAdapter.
+    """
+    value = getattr(_connect_time, "total", 0.0)
+    _connect_time.total = 0.0
+    return value
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            _connect_time.total = getattr(_connect_time, "total", 0.0) + (
+                time.perf_counter() - started
+            )
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter, соединения которого замеряют время connect (см. take_connect_time)."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
@@ -0,0 +1,353 @@
+# schedule_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Время жизни записей по эндпоинтам (в секундах).
+# Список групп меняется редко, само расписание — чаще.
+DEFAULT_TTLS: Dict[str, float] = {
+    "groups": 24 * 60 * 60,
+    "data": 30 * 60,
+}
+DEFAULT_TTL = 10 * 60
+
+DEFAULT_MEMORY_MAX_ENTRIES = 256
+DEFAULT_DISK_MAX_ENTRIES = 5000
+
+
+def default_cache_path() -> str:
+    """Путь к файлу кэша по умолчанию (~/.cache/sch_parse/schedule.sqlite3)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "sch_parse", "schedule.sqlite3")
+
+
+@dataclass
+class CacheEntry:
+    """Закэшированный ответ API вместе с данными для условной перепроверки."""
+
+    value: Any
+    stored_at: float
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+@dataclass
+class CacheStats:
+    """Счётчики работы кэша."""
+
+    hits: int = 0  # Свежая запись найдена (в памяти или на диске)
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0  # Записи нет или она устарела
+    stale: int = 0  # Из промахов: запись была, но устарела
+    revalidated: int = 0  # Сервер ответил 304, запись продлена
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class ScheduleCache:
+    """
+    Двухуровневый кэш ответов API: LRU в памяти и (опционально) SQLite на диске.
+    Записи не удаляются по истечении TTL: устаревшая запись возвращается
+    вызывающему коду, чтобы он мог перепроверить её условным запросом (ETag/Last-Modified).
+    В памяти хранятся уже разобранные значения, общие для всех вызовов get: их
+    нельзя изменять на месте (клиент отдаёт наружу копию, см. copy_json).
+    Чтение с диска идёт через отдельное соединение SQLite под своей блокировкой,
+    не задерживая запись, а время доступа для вытеснения записывается вместе
+    со следующей записью.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL,
+        memory_max_entries: int = DEFAULT_MEMORY_MAX_ENTRIES,
+        disk_max_entries: int = DEFAULT_DISK_MAX_ENTRIES,
+    ):
+        """
+        :param path: Путь к файлу SQLite. None — только кэш в памяти.
+        :param ttls: Время жизни записей по эндпоинтам, дополняет DEFAULT_TTLS.
+        :param default_ttl: Время жизни для эндпоинтов, не указанных в ttls.
+        :param memory_max_entries: Максимум записей в памяти (LRU-вытеснение).
+        :param disk_max_entries: Максимум записей на диске (вытесняются давно не читанные).
+        """
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_entries = disk_max_entries
+        self.stats = CacheStats()
+        self.path = path
+
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Соединение для чтения (одно на кэш) и отложенные обновления accessed_at
+        self._reader: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}
+        # Меняется при каждой записи: чтение с диска, начатое до неё, не попадает в память
+        self._generation = 0
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT
+                )
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)"
+            )
+            self._db.commit()
+            self._reader = sqlite3.connect(path, check_same_thread=False)
+
+    @staticmethod
+    def make_key(method: str, endpoint: str, payload: Any = None) -> str:
+        """Ключ кэша: метод, эндпоинт и тело запроса (например, "group=...")."""
+        return f"{method.upper()} {endpoint}?{payload or ''}"
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Возвращает запись (свежую или устаревшую) либо None.
+        Свежесть записи проверяется через CacheEntry.fresh.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            generation = self._generation
+            on_disk = self._db is not None
+        from_disk = False
+        if entry is None and on_disk:
+            entry = self._load_from_disk(key)
+            from_disk = entry is not None
+
+        with self._lock:
+            if from_disk:
+                self._accessed[key] = time.time()
+                if generation == self._generation:
+                    self._remember(key, entry)
+            if entry is None:
+                self.stats.misses += 1
+            elif entry.fresh:
+                self.stats.hits += 1
+                if from_disk:
+                    self.stats.disk_hits += 1
+                else:
+                    self.stats.memory_hits += 1
+            else:
+                self.stats.misses += 1
+                self.stats.stale += 1
+        # Своя запись (сроки), но общее значение
+        return replace(entry) if entry is not None else None
+
+    def set(
+        self,
+        key: str,
+        endpoint: str,
+        value: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> CacheEntry:
+        """Сохраняет ответ API в обоих уровнях кэша."""
+        now = time.time()
+        entry = CacheEntry(value, now, now + self.ttl_for(endpoint), etag, last_modified)
+        text = json.dumps(value, ensure_ascii=False) if self._db is not None else None
+        with self._lock:
+            self._generation += 1
+            self._remember(key, entry)
+            if self._db is not None:
+                self._accessed.pop(key, None)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        endpoint,
+                        text,
+                        entry.stored_at,
+                        entry.expires_at,
+                        now,
+                        etag,
+                        last_modified,
+                    ),
+                )
+                self._flush_accessed()
+                self._evict_disk()
+                self._db.commit()
+        return replace(entry)
+
+    def scan(
+        self, endpoint: str, text_filter: Optional[Callable[[str], bool]] = None
+    ) -> Iterator[Tuple[str, CacheEntry]]:
+        """
+        Все записи эндпоинта (свежие и устаревшие) — для ответов без обращения к сети.
+        Не учитывается в статистике и не влияет на вытеснение.
+        :param text_filter: Проверка JSON-текста записи до декодирования: записи,
+            для которых она ложна, пропускаются без разбора JSON.
+        """
+        with self._lock:
+            if self._db is None:
+                # Только память: значения уже разобраны, фильтр получает их JSON
+                memory = [
+                    (key, entry)
+                    for key, entry in self._memory.items()
+                    if key.partition(" ")[2].startswith(f"{endpoint}?")
+                ]
+            else:
+                memory = None
+        if memory is not None:
+            for key, entry in memory:
+                if text_filter is None or text_filter(json.dumps(entry.value, ensure_ascii=False)):
+                    yield key, replace(entry)
+            return
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT key, value, stored_at, expires_at, etag, last_modified "
+                "FROM entries WHERE endpoint = ?",
+                (endpoint,),
+            ).fetchall()
+        for key, value, stored_at, expires_at, etag, last_modified in rows:
+            if text_filter is None or text_filter(value):
+                yield key, CacheEntry(json.loads(value), stored_at, expires_at, etag, last_modified)
+
+    def touch(self, key: str, endpoint: str) -> Optional[CacheEntry]:
+        """Продлевает срок жизни записи после ответа 304 Not Modified."""
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None and self._db is not None:
+            entry = self._load_from_disk(key)
+        if entry is None:
+            return None
+        now = time.time()
+        # Новая запись с тем же значением: выданные раньше записи не меняются
+        entry = replace(entry, stored_at=now, expires_at=now + self.ttl_for(endpoint))
+        with self._lock:
+            self._generation += 1
+            self._remember(key, entry)
+            if self._db is not None:
+                self._accessed.pop(key, None)
+                self._db.execute(
+                    "UPDATE entries SET stored_at = ?, expires_at = ?, accessed_at = ? WHERE key = ?",
+                    (entry.stored_at, entry.expires_at, now, key),
+                )
+                self._flush_accessed()
+                self._db.commit()
+            self.stats.revalidated += 1
+        return replace(entry)
+
+    def invalidate(self, key: str) -> None:
+        """Удаляет одну запись из обоих уровней."""
+        with self._lock:
+            self._generation += 1
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._accessed.pop(key, None)
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Полностью очищает кэш."""
+        with self._lock:
+            self._generation += 1
+            self._memory.clear()
+            if self._db is not None:
+                self._accessed.clear()
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                if self._accessed:
+                    self._flush_accessed()
+                    self._db.commit()
+                self._db.close()
+                self._db = None
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._db is not None:
+                return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return len(self._memory)
+
+    # --- Внутренние методы (вызываются под self._lock) ---
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_entries:
+            self._memory.popitem(last=False)
+            # В памяти вытеснение считаем только без диска: иначе запись не потеряна
+            if self._db is None:
+                self.stats.evictions += 1
+
+    def _flush_accessed(self) -> None:
+        """Записывает накопленные времена доступа (без commit — его делает вызывающий)."""
+        if self._accessed:
+            self._db.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._accessed.items()],
+            )
+            self._accessed.clear()
+
+    # --- Чтение с диска (без self._lock) ---
+
+    def _load_from_disk(self, key: str) -> Optional[CacheEntry]:
+        with self._read_lock:
+            if self._reader is None:
+                return None
+            row = self._reader.execute(
+                "SELECT value, stored_at, expires_at, etag, last_modified "
+                "FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        # JSON разбирается вне блокировок: другие потоки в это время читают и пишут
+        value, stored_at, expires_at, etag, last_modified = row
+        return CacheEntry(json.loads(value), stored_at, expires_at, etag, last_modified)
+
+    def _evict_disk(self) -> None:
+        count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        excess = count - self.disk_max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.stats.evictions += excess
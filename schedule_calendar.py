@@ -0,0 +1,154 @@
+# schedule_calendar.py
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Понедельник первой недели семестра (Примерная дата, установите актуальную)
+SCHEDULE_START_DATE_STR = "2025-01-06"
+
+WEEKS_IN_CYCLE = 4  # 1-й числитель, 1-й знаменатель, 2-й числитель, 2-й знаменатель
+
+WEEK_TEXTS: Dict[int, str] = {
+    0: "1-й числитель",
+    1: "1-й знаменатель",
+    2: "2-й числитель",
+    3: "2-й знаменатель",
+}
+
+DAY_NAMES: Dict[int, str] = {
+    1: "Понедельник",
+    2: "Вторник",
+    3: "Среда",
+    4: "Четверг",
+    5: "Пятница",
+    6: "Суббота",
+    7: "Воскресенье",
+}
+
+DateLike = Union[str, date, datetime]
+
+# 1970-01-01 (нулевой день datetime64[D]) — четверг, т.е. weekday() == 3
+_EPOCH_WEEKDAY = 3
+
+
+def to_date(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        # fromisoformat не загружает модуль _strptime (заметная часть времени запуска CLI)
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+class SemesterCalendar:
+    """
+    Календарь семестра: переводит даты в (номер недели 0-3, код дня 1-7).
+    Опорная дата разбирается один раз при создании.
+    Пакетные методы работают с массивами numpy.datetime64[D].
+    """
+
+    def __init__(self, start: DateLike, end: Optional[DateLike] = None):
+        """
+        :param start: Любой день первой недели семестра (неделя "1-й числитель").
+        :param end: Последний день семестра (нужен только для date_range/expand без явных границ).
+        """
+        self.start = to_date(start)
+        self.end = to_date(end) if end is not None else None
+        # Понедельник первой недели в виде порядкового номера дня
+        self._anchor = self.start.toordinal() - self.start.weekday()
+        self._anchor_epoch_days = self._anchor - date(1970, 1, 1).toordinal()
+
+    def week_number(self, target_date: Optional[DateLike] = None) -> int:
+        """Номер недели (0-3) для даты (по умолчанию — сегодня)."""
+        target = to_date(target_date) if target_date is not None else date.today()
+        monday = target.toordinal() - target.weekday()
+        return ((monday - self._anchor) // 7) % WEEKS_IN_CYCLE
+
+    def week_and_day(self, target_date: Optional[DateLike] = None) -> Tuple[int, int]:
+        """(номер недели 0-3, код дня 1-7) для даты (по умолчанию — сегодня)."""
+        target = to_date(target_date) if target_date is not None else date.today()
+        return self.week_number(target), target.weekday() + 1
+
+    def weeks_and_days(self, dates) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Пакетный вариант week_and_day.
+        :param dates: Массив numpy.datetime64 или последовательность дат.
+        :return: Два массива: номера недель (0-3) и коды дней (1-7).
+        """
+        import numpy as np  # Ленивый импорт: скалярным методам numpy не нужен
+
+        days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+        weekday = (days + _EPOCH_WEEKDAY) % 7
+        weeks = ((days - weekday - self._anchor_epoch_days) // 7) % WEEKS_IN_CYCLE
+        return weeks.astype(np.int8), (weekday + 1).astype(np.int8)
+
+    def date_range(
+        self, start: Optional[DateLike] = None, end: Optional[DateLike] = None
+    ) -> "np.ndarray":
+        """Все даты от start до end включительно (по умолчанию — границы семестра)."""
+        import numpy as np
+
+        first = to_date(start) if start is not None else self.start
+        last = to_date(end) if end is not None else self.end
+        if last is None:
+            raise ValueError("Не задан конец диапазона: укажите end или конец семестра")
+        return np.arange(
+            np.datetime64(first, "D"), np.datetime64(last + timedelta(days=1), "D")
+        )
+
+    def slot_dates(
+        self, start: Optional[DateLike] = None, end: Optional[DateLike] = None
+    ) -> Dict[Tuple[int, int], List[date]]:
+        """
+        Раскладывает даты диапазона по слотам (номер недели, код дня) за один проход.
+        Результат удобно использовать для получения всех дат конкретного занятия.
+        """
+        import numpy as np
+
+        dates = self.date_range(start, end)
+        weeks, days = self.weeks_and_days(dates)
+        slot_ids = weeks.astype(np.int16) * 8 + days
+        order = np.argsort(slot_ids, kind="stable")
+        sorted_ids = slot_ids[order]
+        boundaries = np.flatnonzero(np.diff(sorted_ids)) + 1
+        result: Dict[Tuple[int, int], List[date]] = {}
+        for chunk in np.split(order, boundaries):
+            if not len(chunk):
+                continue
+            slot = int(slot_ids[chunk[0]])
+            result[(slot // 8, slot % 8)] = dates[chunk].astype(object).tolist()
+        return result
+
+    def expand(
+        self,
+        lessons: Iterable,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ) -> List[Tuple[date, object]]:
+        """
+        Конкретные даты занятий за диапазон: список (дата, занятие),
+        отсортированный по дате. Занятия — объекты с полями day и day_number (Lesson).
+        """
+        slots = self.slot_dates(start, end)
+        result = []
+        for lesson in lessons:
+            for lesson_date in slots.get((lesson.day_number, lesson.day), ()):
+                result.append((lesson_date, lesson))
+        result.sort(key=lambda pair: (pair[0], pair[1].time_code))
+        return result
+
+
+_default_calendar = SemesterCalendar(SCHEDULE_START_DATE_STR)
+
+
+def get_default_calendar() -> SemesterCalendar:
+    """Календарь, который используют статические методы MietScheduleClient."""
+    return _default_calendar
+
+
+def set_default_calendar(calendar: SemesterCalendar) -> None:
+    """Переключает календарь по умолчанию (например, на новый семестр)."""
+    global _default_calendar
+    _default_calendar = calendar
@@ -0,0 +1,261 @@
+# schedule_cli.py
+import argparse
+import os
+import sys
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from schedule_cache import ScheduleCache, default_cache_path
+from schedule_calendar import get_default_calendar, to_date
+from schedule_index import normalize_name
+from schedule_models import Lesson, parse_lessons
+from schedule_names import GROUP, NameResolver, normalize_key
+from schedule_render import TextRenderer, day_text, week_text
+from schedule_snapshot import SharedTimetable, write_snapshot
+
+# Команды отвечают из дискового кэша клиента (его заполняют обычные запросы
+# и "sch-parse sync"). Клиент API вместе с requests импортируется только
+# тогда, когда без сети не обойтись (см. _client): короткий запуск для
+# виджета в приглашении shell или cron не должен платить за их загрузку.
+# Поиск по преподавателю и аудитории идёт по снимку всех групп (см.
+# schedule_snapshot), который записывает sync: без разбора JSON при запуске.
+
+GROUPS_KEY = ScheduleCache.make_key("GET", "groups")
+SNAPSHOT_SUFFIX = ".timetable"
+
+
+def group_cache_key(group_name: str) -> str:
+    """Ключ кэша для расписания группы (тело запроса — как в MietScheduleClient)."""
+    return ScheduleCache.make_key("POST", "data", f"group={quote(group_name.encode('utf-8'))}")
+
+
+def _group_from_key(key: str) -> str:
+    return unquote(key.partition("group=")[2])
+
+
+def snapshot_path(cache_path: str) -> str:
+    """Файл снимка всех групп рядом с файлом кэша."""
+    return cache_path + SNAPSHOT_SUFFIX
+
+
+def _client(args: argparse.Namespace, cache: ScheduleCache):
+    from miet_schedule_api import MietScheduleClient
+
+    client_kwargs: Dict[str, Any] = {"cache": cache}
+    if args.base_url:
+        client_kwargs["base_url"] = args.base_url
+    return MietScheduleClient(**client_kwargs)
+
+
+def _group_names(args: argparse.Namespace, cache: ScheduleCache) -> List[str]:
+    entry = cache.get(GROUPS_KEY)
+    groups = entry.value if entry is not None else None
+    if groups is None and not args.offline:
+        groups = _client(args, cache).get_all_groups()
+    return groups or []
+
+
+def _resolve_group(args: argparse.Namespace, cache: ScheduleCache, group_name: str) -> str:
+    """
+    Имя группы в написании сайта по списку групп: без учёта регистра,
+    разделителей и латинских букв вместо кириллических ("ивт13" -> "ИВТ-13").
+    """
+    wanted = normalize_key(group_name)
+    for name in _group_names(args, cache):
+        if normalize_key(name) == wanted:
+            return name
+    return group_name
+
+
+def _cached_value(cache: ScheduleCache, group_name: str) -> Optional[Dict[str, Any]]:
+    entry = cache.get(group_cache_key(group_name))
+    return entry.value if entry is not None else None
+
+
+def _load_group(
+    args: argparse.Namespace, cache: ScheduleCache, group_name: str
+) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Расписание группы: свежая запись кэша, иначе запрос к сайту.
+    Без сети (--offline или при ошибке запроса) — сохранённая запись любой давности.
+    """
+    entry = cache.get(group_cache_key(group_name))
+    if entry is None:
+        group_name = _resolve_group(args, cache, group_name)
+        entry = cache.get(group_cache_key(group_name))
+    if entry is not None and (entry.fresh or args.offline):
+        return group_name, entry.value
+    if args.offline:
+        return None
+    data = _client(args, cache).get_schedule_for_group(group_name)
+    if data is None and entry is not None:
+        print("Сайт недоступен, показано сохранённое расписание.", file=sys.stderr)
+        data = entry.value
+    return (group_name, data) if data is not None else None
+
+
+def _open_snapshot(cache: ScheduleCache) -> Optional[SharedTimetable]:
+    """
+    Снимок последней синхронизации. Если его нет или он другой версии формата
+    (кэш заполнен до появления снимков или без sync), он один раз строится
+    из сохранённых расписаний.
+    """
+    path = snapshot_path(cache.path)
+    if os.path.exists(path):
+        try:
+            return SharedTimetable(path)
+        except ValueError:
+            pass
+    schedules = ((_group_from_key(key), entry.value) for key, entry in cache.scan("data"))
+    if not write_snapshot(path, schedules).groups:
+        os.remove(path)
+        return None
+    return SharedTimetable(path)
+
+
+def _search_lessons(
+    cache: ScheduleCache, query: str, field: str
+) -> Optional[Tuple[List[Lesson], str]]:
+    """
+    Занятия всех сохранённых групп, у которых поле field ("teacher" или "room")
+    содержит query. None — сохранённых расписаний нет.
+    :return: (занятия, семестр).
+    """
+    timetable = _open_snapshot(cache)
+    if timetable is None or not len(timetable):
+        return None
+    needle = normalize_name(query)
+    lessons = timetable.search(field, lambda value: needle in normalize_name(value))
+    lessons.sort(key=lambda lesson: (lesson.sort_key, lesson.group))
+    group = lessons[0].group if lessons else timetable.groups()[0]
+    return lessons, timetable.semestr(group) or ""
+
+
+def _print_lessons(
+    args: argparse.Namespace, lessons: List[Lesson], semestr: str, title: str
+) -> None:
+    """Выводит занятия на дату (по умолчанию — сегодня) или, с --all, за весь цикл."""
+    semestr = semestr or "не определен"
+    if args.all:
+        if not lessons:
+            print(f"{title}: занятий нет")
+            return
+        TextRenderer().render_to(sys.stdout, lessons, semestr, "Все недели", title=title)
+        return
+    target = args.date or date.today()
+    day_number, day = get_default_calendar().week_and_day(target)
+    lessons = [
+        lesson for lesson in lessons if lesson.day_number == day_number and lesson.day == day
+    ]
+    title = f"{title}, {target:%d.%m.%Y} ({day_text(day)})"
+    if not lessons:
+        print(f"{title}: занятий нет ({week_text(day_number)})")
+        return
+    TextRenderer().render_to(sys.stdout, lessons, semestr, week_text(day_number), title=title)
+
+
+def _cmd_today(args: argparse.Namespace, cache: ScheduleCache) -> int:
+    loaded = _load_group(args, cache, args.group)
+    if loaded is None:
+        hint = " (без --offline расписание будет загружено с сайта)" if args.offline else ""
+        print(f"Нет расписания для группы {args.group}{hint}.", file=sys.stderr)
+        matches = NameResolver.from_names(_group_names(args, cache)).resolve(
+            args.group, GROUP, limit=3
+        )
+        if matches:
+            print(f"Возможно: {', '.join(match.name for match in matches)}", file=sys.stderr)
+        return 1
+    group_name, data = loaded
+    _print_lessons(args, parse_lessons(data, group_name), data.get("Semestr") or "", group_name)
+    return 0
+
+
+def _cmd_search(args: argparse.Namespace, cache: ScheduleCache) -> int:
+    found = _search_lessons(cache, args.query, args.command)
+    if found is None:
+        print("Нет сохранённых расписаний: выполните 'sch-parse sync'.", file=sys.stderr)
+        return 1
+    lessons, semestr = found
+    what = "Преподаватель" if args.command == "teacher" else "Аудитория"
+    _print_lessons(args, lessons, semestr, f"{what}: {args.query}")
+    return 0
+
+
+def _cmd_sync(args: argparse.Namespace, cache: ScheduleCache) -> int:
+    client = _client(args, cache)
+    groups = client.get_all_groups()
+    if not groups:
+        print("Не удалось получить список групп.", file=sys.stderr)
+        return 1
+    crawl_kwargs = {"max_concurrency": args.concurrency} if args.concurrency else {}
+    failed = []
+
+    def crawl():
+        for i, result in enumerate(client.get_schedules_for_groups(groups, **crawl_kwargs)):
+            if not result.ok:
+                failed.append(result.group)
+            print(f"\rЗагружено групп: {i + 1}/{len(groups)}", end="", file=sys.stderr, flush=True)
+            yield result.group, result.data
+        print(file=sys.stderr)
+
+    # Группы, которые не удалось загрузить, попадают в снимок из кэша
+    schedules = (
+        (name, data if data is not None else _cached_value(cache, name))
+        for name, data in crawl()
+    )
+    write_snapshot(snapshot_path(cache.path), schedules)
+    if failed:
+        print(f"Не удалось загрузить: {', '.join(sorted(failed))}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="sch-parse", description="Расписание МИЭТ: быстрые ответы из локальной копии."
+    )
+    parser.add_argument("--offline", action="store_true", help="Не обращаться к сайту")
+    parser.add_argument("--cache", default=None, help="Файл кэша (по умолчанию ~/.cache/sch_parse)")
+    parser.add_argument("--base-url", default=None, help="Адрес API расписания")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_date_options(command: argparse.ArgumentParser) -> None:
+        when = command.add_mutually_exclusive_group()
+        when.add_argument("--date", type=to_date, help="Дата, YYYY-MM-DD (по умолчанию — сегодня)")
+        when.add_argument("--all", action="store_true", help="Все недели цикла")
+
+    today = commands.add_parser("today", help="Занятия группы на сегодня")
+    today.add_argument("group")
+    add_date_options(today)
+    today.set_defaults(handler=_cmd_today)
+
+    teacher = commands.add_parser("teacher", help="Занятия преподавателя (по последней синхронизации)")
+    teacher.add_argument("query", metavar="NAME", help="Часть имени преподавателя")
+    add_date_options(teacher)
+    teacher.set_defaults(handler=_cmd_search)
+
+    room = commands.add_parser("room", help="Занятия в аудитории (по последней синхронизации)")
+    room.add_argument("query", metavar="ROOM", help="Аудитория или её часть")
+    add_date_options(room)
+    room.set_defaults(handler=_cmd_search)
+
+    sync = commands.add_parser("sync", help="Сохранить расписания всех групп для поиска без сети")
+    sync.add_argument("--concurrency", type=int, default=None, help="Одновременных запросов")
+    sync.set_defaults(handler=_cmd_sync)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "sync" and args.offline:
+        print("sync несовместим с --offline.", file=sys.stderr)
+        return 2
+    cache = ScheduleCache(args.cache or default_cache_path())
+    try:
+        return args.handler(args, cache)
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# schedule_conflicts.py
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from schedule_models import Lesson, parse_lessons
+
+TEACHER = "teacher"
+ROOM = "room"
+
+# (DayNumber 0-3, Day 1-7, Time.Code)
+Slot = Tuple[int, int, int]
+
+
+@dataclass
+class ConflictEvent:
+    """Одно занятие в слоте; общая лекция нескольких групп — одно событие."""
+
+    subject: str
+    teacher: str
+    room: str
+    groups: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Conflict:
+    """Преподаватель или аудитория заняты в одном слоте несколькими разными событиями."""
+
+    kind: str  # TEACHER или ROOM
+    resource: str  # Имя преподавателя или аудитория
+    slot: Slot
+    events: List[ConflictEvent]
+
+
+_Entry = Tuple[Lesson, List[str]]
+
+
+@dataclass
+class ConflictReport:
+    teacher_conflicts: List[Conflict] = field(default_factory=list)
+    room_conflicts: List[Conflict] = field(default_factory=list)
+    lessons_checked: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.teacher_conflicts or self.room_conflicts)
+
+    def __len__(self) -> int:
+        return len(self.teacher_conflicts) + len(self.room_conflicts)
+
+
+class ConflictDetector:
+    """
+    Ищет двойные бронирования за один проход по занятиям всех групп.
+    Занятия раскладываются по ключам (преподаватель, слот) и (аудитория, слот),
+    внутри ключа — по признаку события:
+      - для преподавателя событие определяется аудиторией и предметом: один
+        предмет в одной аудитории в одном слоте — это общая лекция нескольких
+        групп, разные аудитории или разные предметы — конфликт;
+      - для аудитории событие определяется преподавателем и предметом: разные
+        преподаватели или разные предметы в одной аудитории — конфликт.
+    Отсутствующая аудитория или преподаватель сравниваются как пустая строка.
+    """
+
+    def __init__(self, ignore_rooms: Iterable[str] = ()):
+        """
+        :param ignore_rooms: Аудитории, которые не проверяются на занятость
+            (например, обозначения дистанционных занятий или спортзал).
+        """
+        self.ignore_rooms = frozenset(ignore_rooms)
+        # Ключ -> признак события -> (первое занятие события, группы события).
+        # ConflictEvent строятся только для конфликтов, в отчёте.
+        self._teachers: Dict[Tuple[str, Slot], Dict[Tuple[str, str], _Entry]] = {}
+        self._rooms: Dict[Tuple[str, Slot], Dict[Tuple[str, str], _Entry]] = {}
+        self.lessons_checked = 0
+
+    @classmethod
+    def from_schedules(
+        cls,
+        schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+        ignore_rooms: Iterable[str] = (),
+    ) -> "ConflictDetector":
+        """Проверяет пары (имя группы, ответ API); None-ответы пропускаются."""
+        detector = cls(ignore_rooms)
+        for group_name, data in schedules:
+            if data is not None:
+                detector.add_lessons(parse_lessons(data, group_name))
+        return detector
+
+    @staticmethod
+    def _add(
+        buckets: Dict[Tuple[str, Slot], Dict[Tuple[str, str], _Entry]],
+        key: Tuple[str, Slot],
+        signature: Tuple[str, str],
+        lesson: Lesson,
+    ) -> None:
+        events = buckets.get(key)
+        if events is None:
+            buckets[key] = {signature: (lesson, [lesson.group])}
+            return
+        entry = events.get(signature)
+        if entry is None:
+            events[signature] = (lesson, [lesson.group])
+        elif lesson.group not in entry[1]:
+            entry[1].append(lesson.group)
+
+    def add_lessons(self, lessons: Iterable[Lesson]) -> None:
+        for lesson in lessons:
+            self.lessons_checked += 1
+            if lesson.day is None or lesson.day_number is None:
+                continue
+            slot = (lesson.day_number, lesson.day, lesson.time_code)
+            teacher = lesson.teacher_full or lesson.teacher
+            room = lesson.room
+            subject = lesson.subject.casefold()
+            if teacher:
+                self._add(self._teachers, (teacher, slot), (room, subject), lesson)
+            if room and room not in self.ignore_rooms:
+                self._add(self._rooms, (room, slot), (teacher, subject), lesson)
+
+    @staticmethod
+    def _conflicts(
+        kind: str, buckets: Dict[Tuple[str, Slot], Dict[Tuple[str, str], _Entry]]
+    ) -> List[Conflict]:
+        conflicts = [
+            Conflict(
+                kind,
+                resource,
+                slot,
+                [
+                    ConflictEvent(
+                        lesson.subject,
+                        lesson.teacher_full or lesson.teacher,
+                        lesson.room,
+                        groups,
+                    )
+                    for lesson, groups in events.values()
+                ],
+            )
+            for (resource, slot), events in buckets.items()
+            if len(events) > 1
+        ]
+        conflicts.sort(key=lambda conflict: (conflict.resource, conflict.slot))
+        return conflicts
+
+    def report(self) -> ConflictReport:
+        return ConflictReport(
+            teacher_conflicts=self._conflicts(TEACHER, self._teachers),
+            room_conflicts=self._conflicts(ROOM, self._rooms),
+            lessons_checked=self.lessons_checked,
+        )
+
+
+def find_conflicts(
+    schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+    ignore_rooms: Iterable[str] = (),
+) -> ConflictReport:
+    """Конфликты преподавателей и аудиторий в обходе всех групп."""
+    return ConflictDetector.from_schedules(schedules, ignore_rooms).report()
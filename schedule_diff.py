@@ -0,0 +1,263 @@
+# schedule_diff.py
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+STATE_FORMAT_VERSION = 3
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+def content_hash(value: Any) -> str:
+    """Стабильный хэш JSON-совместимого значения (не зависит от порядка ключей)."""
+    encoded = json.dumps(
+        value, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def lesson_key(item: Dict[str, Any]) -> str:
+    """
+    Слот занятия внутри группы: неделя, день, пара и предмет.
+    Изменение аудитории или преподавателя даёт "changed",
+    изменение предмета — пару "removed" + "added".
+    """
+    time_data = item.get("Time") or {}
+    class_info = item.get("Class") or {}
+    subject = class_info.get("Code") or class_info.get("Name", "")
+    return f"{item.get('DayNumber')}:{item.get('Day')}:{time_data.get('Code')}:{subject}"
+
+
+def _slot_fingerprint(item: Dict[str, Any]) -> str:
+    """Чем различаются занятия одного слота (подгруппы): предмет, аудитория, преподаватель."""
+    class_info = item.get("Class") or {}
+    room = item.get("Room") or {}
+    return content_hash(
+        [class_info.get("Name"), class_info.get("TeacherFull"), room.get("Name")]
+    )[:8]
+
+
+def _lesson_summary(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Сокращённая запись Data для состояния: только то, что нужно для вывода
+    удалённого занятия (неделя, день, пара, предмет, преподаватель, аудитория).
+    """
+    time_data = item.get("Time") or {}
+    class_info = item.get("Class") or {}
+    room = item.get("Room") or {}
+    return {
+        "Day": item.get("Day"),
+        "DayNumber": item.get("DayNumber"),
+        "Time": {"Time": time_data.get("Time"), "Code": time_data.get("Code")},
+        "Class": {"Name": class_info.get("Name"), "TeacherFull": class_info.get("TeacherFull")},
+        "Room": {"Name": room.get("Name")},
+    }
+
+
+def _lesson_hashes(data: Dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+    """
+    Хэши занятий по ключам "слот#отпечаток". Отпечаток (предмет, преподаватель,
+    аудитория) делает ключ независимым от позиции занятия в ответе и от того,
+    сколько занятий в слоте: появление второй подгруппы не меняет ключ первой.
+    """
+    hashes: Dict[str, str] = {}
+    lessons: Dict[str, Dict[str, Any]] = {}
+    for item in sorted(data.get("Data", []), key=content_hash):
+        unique_key = base_key = f"{lesson_key(item)}#{_slot_fingerprint(item)}"
+        n = 1
+        while unique_key in hashes:
+            n += 1
+            unique_key = f"{base_key}#{n}"
+        hashes[unique_key] = content_hash(item)
+        lessons[unique_key] = item
+    return hashes, lessons
+
+
+def _slot_of(key: str) -> str:
+    return key.partition("#")[0]
+
+
+@dataclass
+class GroupState:
+    """
+    Сохранённое состояние группы: хэш всего ответа, хэши занятий и их сокращённые
+    записи (см. _lesson_summary) — для вывода удалённых занятий.
+    """
+
+    payload_hash: str
+    lessons: Dict[str, str] = field(default_factory=dict)
+    summaries: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class LessonChange:
+    kind: str  # ADDED, REMOVED или CHANGED
+    group: str
+    key: str
+    # Новая версия занятия; для REMOVED — сокращённая запись последней известной
+    lesson: Optional[Dict[str, Any]] = None
+    previous: Optional[Dict[str, Any]] = None  # Сокращённая прежняя версия (для CHANGED)
+
+
+@dataclass
+class Changeset:
+    """Изменения между предыдущим и текущим обходом."""
+
+    changes: List[LessonChange] = field(default_factory=list)
+    changed_groups: List[str] = field(default_factory=list)
+    unchanged_groups: List[str] = field(default_factory=list)
+    removed_groups: List[str] = field(default_factory=list)
+    skipped_groups: List[str] = field(default_factory=list)  # Не удалось загрузить
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    def by_kind(self, kind: str) -> List[LessonChange]:
+        return [change for change in self.changes if change.kind == kind]
+
+
+class ScheduleDiffer:
+    """
+    Сравнивает очередной обход расписаний с предыдущим.
+    Группы, ответ которых не изменился (по хэшу), не разбираются по занятиям.
+    Состояние можно хранить в JSON-файле между запусками.
+    """
+
+    def __init__(self, state_path: Optional[str] = None):
+        self.state_path = state_path
+        self.groups: Dict[str, GroupState] = {}
+        if state_path is not None and os.path.exists(state_path):
+            self.load(state_path)
+
+    def load(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        if raw.get("version") != STATE_FORMAT_VERSION:
+            # Состояние старого формата считаем отсутствующим: следующий обход — полный
+            self.groups = {}
+            return
+        self.groups = {
+            name: GroupState(state["payload_hash"], state["lessons"], state["summaries"])
+            for name, state in raw["groups"].items()
+        }
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Атомарно сохраняет состояние (по умолчанию в state_path)."""
+        path = path or self.state_path
+        if path is None:
+            raise ValueError("Не указан путь для сохранения состояния")
+        raw = {
+            "version": STATE_FORMAT_VERSION,
+            "groups": {
+                name: {
+                    "payload_hash": state.payload_hash,
+                    "lessons": state.lessons,
+                    "summaries": state.summaries,
+                }
+                for name, state in self.groups.items()
+            },
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def is_unchanged(self, group_name: str, data: Dict[str, Any]) -> bool:
+        """Совпадает ли ответ API для группы с сохранённым."""
+        state = self.groups.get(group_name)
+        return state is not None and state.payload_hash == content_hash(data)
+
+    def update(
+        self,
+        schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+        complete: bool = False,
+    ) -> Changeset:
+        """
+        Применяет новый обход и возвращает изменения относительно предыдущего.
+        :param schedules: Пары (имя группы, ответ API); None — группу не удалось загрузить,
+            её прежнее состояние сохраняется.
+        :param complete: Обход охватывал все группы; группы, которых в нём нет,
+            считаются удалёнными вместе со всеми занятиями. По умолчанию выключено:
+            частичный обход не должен удалять остальные группы.
+        """
+        changeset = Changeset()
+        seen = set()
+
+        for group_name, data in schedules:
+            seen.add(group_name)
+            if data is None:
+                changeset.skipped_groups.append(group_name)
+                continue
+
+            payload_hash = content_hash(data)
+            previous = self.groups.get(group_name)
+            if previous is not None and previous.payload_hash == payload_hash:
+                changeset.unchanged_groups.append(group_name)
+                continue
+
+            hashes, lessons = _lesson_hashes(data)
+            previous = previous or GroupState(payload_hash)
+            added = [key for key in hashes if key not in previous.lessons]
+            removed = [key for key in previous.lessons if key not in hashes]
+            # Слот, где одно занятие исчезло и одно появилось, — то же занятие
+            # с другой аудиторией или преподавателем
+            added_by_slot: Dict[str, List[str]] = {}
+            removed_by_slot: Dict[str, List[str]] = {}
+            for key in added:
+                added_by_slot.setdefault(_slot_of(key), []).append(key)
+            for key in removed:
+                removed_by_slot.setdefault(_slot_of(key), []).append(key)
+            replaced = {
+                slot: keys[0]
+                for slot, keys in removed_by_slot.items()
+                if len(keys) == 1 and len(added_by_slot.get(slot, ())) == 1
+            }
+
+            for key, lesson_hash in hashes.items():
+                old_hash = previous.lessons.get(key)
+                if old_hash is None:
+                    old_key = replaced.get(_slot_of(key))
+                    if old_key is None:
+                        changeset.changes.append(
+                            LessonChange(ADDED, group_name, key, lessons[key])
+                        )
+                    else:
+                        changeset.changes.append(
+                            LessonChange(
+                                CHANGED,
+                                group_name,
+                                key,
+                                lessons[key],
+                                previous.summaries.get(old_key),
+                            )
+                        )
+                elif old_hash != lesson_hash:
+                    changeset.changes.append(
+                        LessonChange(
+                            CHANGED, group_name, key, lessons[key], previous.summaries.get(key)
+                        )
+                    )
+            for key in removed:
+                if _slot_of(key) not in replaced:
+                    changeset.changes.append(
+                        LessonChange(REMOVED, group_name, key, previous.summaries.get(key))
+                    )
+
+            summaries = {key: _lesson_summary(item) for key, item in lessons.items()}
+            self.groups[group_name] = GroupState(payload_hash, hashes, summaries)
+            changeset.changed_groups.append(group_name)
+
+        if complete:
+            for group_name in sorted(self.groups.keys() - seen):
+                state = self.groups.pop(group_name)
+                for key in state.lessons:
+                    changeset.changes.append(
+                        LessonChange(REMOVED, group_name, key, state.summaries.get(key))
+                    )
+                changeset.removed_groups.append(group_name)
+
+        return changeset
@@ -0,0 +1,343 @@
+# schedule_ics.py
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import IO, Any, Dict, Iterable, List, Optional, Tuple
+
+from schedule_calendar import (DateLike, SemesterCalendar,
+                               get_default_calendar, to_date)
+from schedule_diff import content_hash
+from schedule_models import Lesson, parse_lessons, parse_time_of_day
+from schedule_render import safe_file_name, week_text
+from schedule_teachers import partition_by_teacher
+
+PRODID = "-//sch_parse//MIET schedule//RU"
+# Длительность семестра, если у календаря не задан конец
+DEFAULT_SEMESTER_WEEKS = 18
+# Москва живёт по UTC+3 без перехода на летнее время, поэтому хватает одного STANDARD
+TIMEZONE_ID = "Europe/Moscow"
+_VTIMEZONE = (
+    "BEGIN:VTIMEZONE\r\n"
+    f"TZID:{TIMEZONE_ID}\r\n"
+    "BEGIN:STANDARD\r\n"
+    "DTSTART:19700101T000000\r\n"
+    "TZOFFSETFROM:+0300\r\n"
+    "TZOFFSETTO:+0300\r\n"
+    "TZNAME:MSK\r\n"
+    "END:STANDARD\r\n"
+    "END:VTIMEZONE\r\n"
+)
+STATE_FILE_NAME = ".ics-state.json"
+STATE_FORMAT_VERSION = 1
+
+
+def escape_text(value: str) -> str:
+    """Экранирование значения TEXT по RFC 5545."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line: str) -> str:
+    """
+    Переносит строку длиннее 75 байт (RFC 5545, 3.1), не разрывая символы UTF-8.
+    Возвращает строку с завершающим CRLF.
+    """
+    if len(line) <= 37 or len(line.encode("utf-8")) <= 75:  # Кириллица — 2 байта на символ
+        return line + "\r\n"
+    parts: List[str] = []
+    current: List[str] = []
+    size = 0
+    limit = 75
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if size + char_size > limit:
+            parts.append("".join(current))
+            current, size = [], 0
+            limit = 74  # Продолжение начинается с пробела
+        current.append(char)
+        size += char_size
+    parts.append("".join(current))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+class IcsExporter:
+    """
+    Разворачивает занятия по датам семестра (через SemesterCalendar) и пишет
+    их событиями VEVENT. Даты слотов (неделя, день) вычисляются один раз
+    на экспортёр и переиспользуются для всех групп.
+    """
+
+    def __init__(
+        self,
+        calendar: Optional[SemesterCalendar] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+    ):
+        """
+        :param calendar: Календарь семестра (по умолчанию — календарь по умолчанию).
+        :param start: Первый день выгрузки (по умолчанию — начало семестра).
+        :param end: Последний день выгрузки (по умолчанию — конец семестра или
+            DEFAULT_SEMESTER_WEEKS недель от начала).
+        """
+        self.calendar = calendar or get_default_calendar()
+        self.start = to_date(start) if start is not None else self.calendar.start
+        if end is not None:
+            self.end = to_date(end)
+        elif self.calendar.end is not None:
+            self.end = self.calendar.end
+        else:
+            monday = self.calendar.start - timedelta(days=self.calendar.start.weekday())
+            self.end = monday + timedelta(weeks=DEFAULT_SEMESTER_WEEKS, days=-1)
+        self._slots = self.calendar.slot_dates(self.start, self.end)
+        self.dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    @property
+    def fingerprint(self) -> str:
+        """Параметры выгрузки, от которых зависит содержимое файлов."""
+        return f"{self.calendar.start}:{self.start}:{self.end}"
+
+    def _event(self, lesson: Lesson, lesson_date: date, starts, ends) -> str:
+        day = lesson_date.strftime("%Y%m%d")
+        uid_parts = (
+            lesson.group,
+            day,
+            str(lesson.time_code),
+            lesson.class_name,
+            lesson.teacher_full,
+            lesson.room,
+        )
+        uid = hashlib.blake2b("|".join(uid_parts).encode("utf-8"), digest_size=12).hexdigest()
+
+        summary = lesson.subject or lesson.class_name
+        if lesson.class_type:
+            summary = f"{summary} [{lesson.class_type}]"
+        if lesson.is_distant:
+            summary = f"[ДСТ] {summary}"
+        description = "\n".join(
+            part
+            for part in (
+                lesson.teacher_full or lesson.teacher,
+                f"Группа: {lesson.group}" if lesson.group else "",
+                f"{lesson.time_label}, {week_text(lesson.day_number)}",
+            )
+            if part
+        )
+
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{uid}@sch-parse",
+            f"DTSTAMP:{self.dtstamp}",
+            f"DTSTART;TZID={TIMEZONE_ID}:{day}T{starts.strftime('%H%M%S')}",
+            f"DTEND;TZID={TIMEZONE_ID}:{day}T{ends.strftime('%H%M%S')}",
+            f"SUMMARY:{escape_text(summary)}",
+        ]
+        if lesson.room:
+            lines.append(f"LOCATION:{escape_text(lesson.room)}")
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+        if lesson.class_type:
+            lines.append(f"CATEGORIES:{escape_text(lesson.class_type)}")
+        lines.append("END:VEVENT")
+        return "".join(fold_line(line) for line in lines)
+
+    def write(self, out: IO[str], lessons: Iterable[Lesson], name: str) -> int:
+        """
+        Пишет календарь из занятий в out (события — по мере разворачивания).
+        Занятия без времени начала или конца пропускаются.
+        :return: Число записанных событий.
+        """
+        out.write(
+            "BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"
+            f"PRODID:{PRODID}\r\nCALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n"
+        )
+        out.write(fold_line(f"X-WR-CALNAME:{escape_text(name)}"))
+        out.write(f"X-WR-TIMEZONE:{TIMEZONE_ID}\r\n")
+        out.write(_VTIMEZONE)
+        count = 0
+        for lesson in lessons:
+            dates = self._slots.get((lesson.day_number, lesson.day))
+            if not dates:
+                continue
+            starts = parse_time_of_day(lesson.time_from)
+            ends = parse_time_of_day(lesson.time_to)
+            if starts is None or ends is None:
+                continue
+            for lesson_date in dates:
+                out.write(self._event(lesson, lesson_date, starts, ends))
+                count += 1
+        out.write("END:VCALENDAR\r\n")
+        return count
+
+    def write_file(self, path: str, lessons: Iterable[Lesson], name: str) -> int:
+        """Пишет календарь в файл атомарно (через временный файл)."""
+        tmp_path = f"{path}.tmp"
+        # newline="" — CRLF из формата не должен преобразовываться
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            count = self.write(f, lessons, name)
+        os.replace(tmp_path, path)
+        return count
+
+
+@dataclass
+class ExportResult:
+    """Итог выгрузки: какие файлы записаны, пропущены без изменений и удалены."""
+
+    written: Dict[str, str] = field(default_factory=dict)  # Группа -> путь к файлу
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)  # Не удалось загрузить
+    events: int = 0
+
+
+def _load_state(path: str) -> Dict[str, Dict[str, str]]:
+    """Состояние выгрузки: группа -> {"hash": хэш ответа, "file": имя файла}."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    if raw.get("version") != STATE_FORMAT_VERSION:
+        # Другой формат (в том числе старое состояние ScheduleDiffer) — выгрузка с нуля
+        return {}
+    return raw["groups"]
+
+
+def _save_state(path: str, groups: Dict[str, Dict[str, str]]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": STATE_FORMAT_VERSION, "groups": groups}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def export_groups(
+    schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+    output_dir: str,
+    exporter: Optional[IcsExporter] = None,
+    incremental: bool = True,
+    complete: bool = True,
+) -> ExportResult:
+    """
+    Выгружает .ics для каждой группы за один потоковый проход: группы
+    обрабатываются по одной, поэтому schedules может быть генератором обхода
+    (например, get_schedules_for_groups — тогда в памяти, кроме текущей группы,
+    только ответы, ещё загружаемые обходом, не больше его max_concurrency).
+    :param schedules: Пары (имя группы, ответ API); None — группу не удалось загрузить,
+        её файл не трогается.
+    :param incremental: Перезаписывать только файлы групп, чьё расписание изменилось
+        (по хэшу ответа; состояние — хэш и имя файла на группу — в output_dir/.ics-state.json).
+        Без него перезаписываются все файлы, но состояние всё равно обновляется.
+    :param complete: В schedules все группы: файлы исчезнувших групп удаляются.
+    """
+    exporter = exporter or IcsExporter()
+    os.makedirs(output_dir, exist_ok=True)
+    # Состояние ведётся и при полной перезаписи: по нему находятся файлы,
+    # записанные прошлыми запусками, и следующий инкрементальный запуск
+    # не перезаписывает всё заново
+    state_path = os.path.join(output_dir, STATE_FILE_NAME)
+    state = _load_state(state_path)
+    result = ExportResult()
+    seen = set()
+
+    for group_name, data in schedules:
+        seen.add(group_name)
+        if data is None:
+            result.skipped.append(group_name)
+            continue
+        file_name = f"{safe_file_name(group_name)}.ics"
+        path = os.path.join(output_dir, file_name)
+        # Хэш учитывает и параметры выгрузки: смена дат семестра перезаписывает всё
+        payload_hash = content_hash({**data, "_ics": exporter.fingerprint})
+        previous = state.get(group_name)
+        if (
+            incremental
+            and previous is not None
+            and previous["hash"] == payload_hash
+            and previous["file"] == file_name
+            and os.path.exists(path)
+        ):
+            result.unchanged.append(group_name)
+            continue
+        result.events += exporter.write_file(path, parse_lessons(data, group_name), group_name)
+        result.written[group_name] = path
+        # Состояние обновляем только после успешной записи файла
+        state[group_name] = {"hash": payload_hash, "file": file_name}
+
+    if complete:
+        for group_name in sorted(set(state) - seen):
+            path = os.path.join(output_dir, state.pop(group_name)["file"])
+            if os.path.exists(path):
+                os.remove(path)
+            result.removed.append(group_name)
+    _save_state(state_path, state)
+    return result
+
+
+def export_teachers(
+    lessons: Iterable[Lesson],
+    output_dir: str,
+    exporter: Optional[IcsExporter] = None,
+) -> Dict[str, str]:
+    """
+    Выгружает .ics для каждого преподавателя (по полному имени).
+    :param lessons: Занятия всех групп (например, ScheduleIndex.lessons).
+    :return: Преподаватель -> путь к файлу.
+    """
+    exporter = exporter or IcsExporter()
+    os.makedirs(output_dir, exist_ok=True)
+    paths: Dict[str, str] = {}
+    for teacher, teacher_lessons in partition_by_teacher(lessons).items():
+        path = os.path.join(output_dir, f"{safe_file_name(teacher)}.ics")
+        exporter.write_file(path, teacher_lessons, teacher)
+        paths[teacher] = path
+    return paths
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from miet_schedule_api import DEFAULT_MAX_CONCURRENCY, MietScheduleClient
+    from schedule_cache import ScheduleCache, default_cache_path
+
+    parser = argparse.ArgumentParser(
+        prog="python -m schedule_ics",
+        description="Выгрузка расписания групп МИЭТ в файлы iCalendar (.ics).",
+    )
+    parser.add_argument("output_dir", help="Каталог для .ics файлов")
+    parser.add_argument("groups", nargs="*", help="Группы (по умолчанию — все)")
+    parser.add_argument("--start", help="Первый день выгрузки, YYYY-MM-DD")
+    parser.add_argument("--end", help="Последний день выгрузки, YYYY-MM-DD")
+    parser.add_argument("--full", action="store_true", help="Перезаписать все файлы")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--base-url", default=None, help="Адрес API расписания")
+    args = parser.parse_args(argv)
+
+    client_kwargs: Dict[str, Any] = {"cache": ScheduleCache(default_cache_path())}
+    if args.base_url:
+        client_kwargs["base_url"] = args.base_url
+    client = MietScheduleClient(**client_kwargs)
+    groups = args.groups or client.get_all_groups()
+    if not groups:
+        parser.exit(1, "Не удалось получить список групп.\n")
+
+    results = client.get_schedules_for_groups(groups, max_concurrency=args.concurrency)
+    result = export_groups(
+        ((r.group, r.data) for r in results),
+        args.output_dir,
+        IcsExporter(start=args.start, end=args.end),
+        incremental=not args.full,
+        complete=not args.groups,
+    )
+    print(
+        f"Записано: {len(result.written)} (событий: {result.events}), "
+        f"без изменений: {len(result.unchanged)}, удалено: {len(result.removed)}"
+    )
+    if result.skipped:
+        print(f"Не удалось загрузить: {', '.join(sorted(result.skipped))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# schedule_index.py
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from schedule_metrics import span
+from schedule_models import GroupSchedule, Lesson, parse_lessons
+
+if TYPE_CHECKING:
+    # Клиент тянет requests; для поиска по готовым данным он не нужен
+    from miet_schedule_api import MietScheduleClient
+
+NGRAM_SIZE = 3
+
+
+def normalize_name(text: Optional[str]) -> str:
+    """Нормализует имя для поиска: нижний регистр, ё -> е, одиночные пробелы."""
+    if not text:
+        return ""
+    return " ".join(text.lower().replace("ё", "е").split())
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i : i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class _FieldIndex:
+    """
+    Инвертированный индекс одного поля: нормализованный ключ -> номера занятий.
+    Для поиска подстроки используются триграммы ключей, для поиска префикса —
+    отсортированный список ключей.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}
+        self._keys: List[str] = []
+        self._ngrams: Dict[str, Set[int]] = {}
+
+    def add(self, value: Optional[str], record_id: int) -> None:
+        key = normalize_name(value)
+        if key:
+            self._postings.setdefault(key, set()).add(record_id)
+
+    def freeze(self) -> None:
+        """Строит отсортированный список ключей и триграммный индекс."""
+        self._keys = sorted(self._postings)
+        self._ngrams = {}
+        for key_id, key in enumerate(self._keys):
+            for gram in _ngrams(key):
+                self._ngrams.setdefault(gram, set()).add(key_id)
+
+    def keys(self) -> List[str]:
+        return list(self._keys)
+
+    def matching_keys(self, query: str, prefix: bool = False) -> List[str]:
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        if prefix:
+            start = bisect_left(self._keys, query)
+            result = []
+            for key in self._keys[start:]:
+                if not key.startswith(query):
+                    break
+                result.append(key)
+            return result
+
+        if len(query) < NGRAM_SIZE:
+            # Слишком короткий запрос для триграмм — проверяем все ключи
+            return [key for key in self._keys if query in key]
+
+        candidates: Optional[Set[int]] = None
+        for gram in sorted(_ngrams(query), key=lambda g: len(self._ngrams.get(g, ()))):
+            key_ids = self._ngrams.get(gram)
+            if not key_ids:
+                return []
+            candidates = set(key_ids) if candidates is None else candidates & key_ids
+            if not candidates:
+                return []
+        # Триграммы дают кандидатов, подстроку проверяем явно
+        return [self._keys[i] for i in sorted(candidates) if query in self._keys[i]]
+
+    def lookup(self, query: str, prefix: bool = False) -> Set[int]:
+        record_ids: Set[int] = set()
+        for key in self.matching_keys(query, prefix):
+            record_ids |= self._postings[key]
+        return record_ids
+
+
+class ScheduleIndex:
+    """
+    Индекс занятий всех групп по преподавателю (краткое и полное имя),
+    аудитории (Room.Name) и предмету (Class.Name).
+    Строится один раз по результатам обхода, после чего каждый запрос —
+    это поиск по индексу без обращений к API.
+    """
+
+    def __init__(self):
+        self.lessons: List[Lesson] = []
+        self.semestr: Optional[str] = None
+        self.groups: List[str] = []
+        self.failed_groups: List[str] = []
+        self._teachers = _FieldIndex()
+        self._rooms = _FieldIndex()
+        self._subjects = _FieldIndex()
+        self._frozen = False
+
+    @classmethod
+    def from_schedules(
+        cls, schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]]
+    ) -> "ScheduleIndex":
+        """Строит индекс из пар (имя группы, ответ API для группы)."""
+        index = cls()
+        for group_name, data in schedules:
+            if data is None:
+                index.failed_groups.append(group_name)
+            else:
+                index.add_group(group_name, data)
+        index.freeze()
+        return index
+
+    @classmethod
+    def from_group_schedules(cls, schedules: Iterable[GroupSchedule]) -> "ScheduleIndex":
+        """Строит индекс из уже разобранных расписаний групп (занятия не разбираются заново)."""
+        index = cls()
+        for schedule in schedules:
+            index.add_lessons(schedule.group, schedule.lessons, schedule.semestr)
+        index.freeze()
+        return index
+
+    @classmethod
+    def from_client(
+        cls,
+        client: "MietScheduleClient",
+        groups: Optional[Iterable[str]] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> "ScheduleIndex":
+        """
+        Обходит все группы (или указанные) и строит по ним индекс.
+        :param max_concurrency: По умолчанию — DEFAULT_MAX_CONCURRENCY клиента.
+        """
+        from miet_schedule_api import DEFAULT_MAX_CONCURRENCY
+
+        if max_concurrency is None:
+            max_concurrency = DEFAULT_MAX_CONCURRENCY
+        if groups is None:
+            groups = client.get_all_groups() or []
+        results = client.get_schedules_for_groups(groups, max_concurrency=max_concurrency)
+        return cls.from_schedules((result.group, result.data) for result in results)
+
+    def add_group(self, group_name: str, data: Dict[str, Any]) -> None:
+        """Добавляет занятия группы в индекс."""
+        self.add_lessons(group_name, parse_lessons(data, group_name), data.get("Semestr"))
+
+    def add_lessons(
+        self, group_name: str, lessons: Iterable[Lesson], semestr: Optional[str] = None
+    ) -> None:
+        """Добавляет уже разобранные занятия группы."""
+        if self.semestr is None:
+            self.semestr = semestr
+        self.groups.append(group_name)
+        self.lessons.extend(lessons)
+        self._frozen = False
+
+    def freeze(self) -> None:
+        """Сортирует занятия и строит индексы полей. Вызывается автоматически."""
+        with span("index"):
+            # Day (1-6), DayNumber (0-3), Time.Code (1-8)
+            self.lessons.sort(key=lambda lesson: lesson.sort_key)
+            self._teachers = _FieldIndex()
+            self._rooms = _FieldIndex()
+            self._subjects = _FieldIndex()
+            for record_id, lesson in enumerate(self.lessons):
+                self._teachers.add(lesson.teacher, record_id)
+                self._teachers.add(lesson.teacher_full, record_id)
+                self._rooms.add(lesson.room, record_id)
+                self._subjects.add(lesson.class_name, record_id)
+            for field in (self._teachers, self._rooms, self._subjects):
+                field.freeze()
+        self._frozen = True
+
+    def _select(self, field: _FieldIndex, query: str, prefix: bool) -> List[Lesson]:
+        if not self._frozen:
+            self.freeze()
+        # Номера записей соответствуют порядку сортировки занятий
+        return [self.lessons[i] for i in sorted(field.lookup(query, prefix))]
+
+    def find_by_teacher(self, query: str, prefix: bool = False) -> List[Lesson]:
+        """Занятия преподавателя по подстроке (или префиксу) краткого либо полного имени."""
+        return self._select(self._teachers, query, prefix)
+
+    def find_by_room(self, query: str, prefix: bool = False) -> List[Lesson]:
+        """Занятия в аудиториях, название которых содержит query (или начинается с него)."""
+        return self._select(self._rooms, query, prefix)
+
+    def find_by_subject(self, query: str, prefix: bool = False) -> List[Lesson]:
+        """Занятия по предметам, название которых содержит query (или начинается с него)."""
+        return self._select(self._subjects, query, prefix)
+
+    def teachers(self) -> List[str]:
+        """Все нормализованные имена преподавателей (краткие и полные)."""
+        if not self._frozen:
+            self.freeze()
+        return self._teachers.keys()
+
+    def rooms(self) -> List[str]:
+        if not self._frozen:
+            self.freeze()
+        return self._rooms.keys()
+
+    def subjects(self) -> List[str]:
+        if not self._frozen:
+            self.freeze()
+        return self._subjects.keys()
@@ -0,0 +1,238 @@
+# schedule_metrics.py
+import inspect
+import json
+import threading
+import time
+import weakref
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Имена метрик клиента
+REQUESTS_TOTAL = "miet_requests_total"
+REQUEST_ERRORS_TOTAL = "miet_request_errors_total"
+RESPONSE_BYTES_TOTAL = "miet_response_bytes_total"
+REQUEST_PHASE_SECONDS = "miet_request_phase_seconds"
+CACHE_LOOKUPS_TOTAL = "miet_cache_lookups_total"
+STAGE_SECONDS = "miet_stage_seconds"
+
+_HELP = {
+    REQUESTS_TOTAL: "HTTP-запросы к API по эндпоинтам",
+    REQUEST_ERRORS_TOTAL: "Запросы, завершившиеся ошибкой (status=код HTTP|network)",
+    RESPONSE_BYTES_TOTAL: "Байт тела ответов",
+    REQUEST_PHASE_SECONDS: "Время фаз запроса: connect, wait, download, decode",
+    CACHE_LOOKUPS_TOTAL: "Обращения к кэшу ответов (result=hit|miss|revalidated)",
+    STAGE_SECONDS: "Время этапов обработки (parse, index, filter, format)",
+}
+
+
+Collector = Callable[[], Dict[str, float]]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _collector_ref(collector: Collector) -> Callable[[], Optional[Collector]]:
+    # Метод объекта держим слабой ссылкой: реестр не должен продлевать жизнь клиенту
+    if inspect.ismethod(collector):
+        return weakref.WeakMethod(collector)
+    return lambda: collector
+
+
+class _Summary:
+    __slots__ = ("count", "total", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+
+class MetricsRegistry:
+    """
+    Простой реестр метрик: счётчики и сводки (count/sum/min/max) с метками.
+    Экспорт — в текстовом формате Prometheus или в JSON.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._summaries: Dict[str, Dict[Labels, _Summary]] = {}
+        self._collectors: List[Tuple[Callable[[], Optional[Collector]], Labels]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._summaries.setdefault(name, {})
+            summary = series.get(key)
+            if summary is None:
+                summary = series[key] = _Summary()
+            summary.observe(value)
+
+    @contextmanager
+    def span(self, stage: str, **labels: Any) -> Iterator[None]:
+        """Замеряет время блока и записывает его в miet_stage_seconds{stage=...}."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - started, stage=stage, **labels)
+
+    def add_collector(self, collector: Collector, **labels: Any) -> None:
+        """
+        Добавляет функцию, возвращающую текущие значения метрик-датчиков (gauge).
+        Метод объекта хранится слабой ссылкой и пропадает из реестра вместе с объектом.
+        :param labels: Метки всех датчиков этой функции (например, client=...), чтобы
+            датчики с одним именем от разных источников не смешивались.
+        """
+        with self._lock:
+            self._collectors.append((_collector_ref(collector), _labels(labels)))
+
+    def remove_collector(self, collector: Collector) -> None:
+        """Убирает функцию сбора датчиков (все её регистрации)."""
+        with self._lock:
+            self._collectors = [
+                (ref, labels) for ref, labels in self._collectors if ref() != collector
+            ]
+
+    def _collect(self) -> Dict[str, Dict[Labels, float]]:
+        """Значения датчиков по именам и меткам; заодно забывает умершие функции сбора."""
+        with self._lock:
+            live = [(ref(), labels) for ref, labels in self._collectors]
+            self._collectors = [
+                entry for entry, (collector, _) in zip(self._collectors, live) if collector
+            ]
+        gauges: Dict[str, Dict[Labels, float]] = {}
+        for collector, labels in live:
+            if collector is None:
+                continue
+            for name, value in collector().items():
+                gauges.setdefault(name, {})[labels] = value
+        return gauges
+
+    def counter(self, name: str, **labels: Any) -> float:
+        return self._counters.get(name, {}).get(_labels(labels), 0)
+
+    def summary(self) -> Dict[str, Any]:
+        """Снимок всех метрик в виде словаря (для JSON)."""
+
+        def label_str(key: Labels) -> str:
+            return ",".join(f"{k}={v}" for k, v in key) or "_"
+
+        with self._lock:
+            result: Dict[str, Any] = {
+                "counters": {
+                    name: {label_str(key): value for key, value in series.items()}
+                    for name, series in self._counters.items()
+                },
+                "summaries": {
+                    name: {
+                        label_str(key): {
+                            "count": s.count,
+                            "sum": s.total,
+                            "mean": s.total / s.count if s.count else 0.0,
+                            "min": s.min if s.count else 0.0,
+                            "max": s.max,
+                        }
+                        for key, s in series.items()
+                    }
+                    for name, series in self._summaries.items()
+                },
+            }
+        result["gauges"] = {
+            name: {label_str(key): value for key, value in series.items()}
+            for name, series in self._collect().items()
+        }
+        return result
+
+    def to_json(self, **kwargs: Any) -> str:
+        return json.dumps(self.summary(), ensure_ascii=False, **kwargs)
+
+    def to_prometheus(self) -> str:
+        """Текстовый формат экспозиции Prometheus."""
+
+        def fmt(key: Labels, extra: Labels = ()) -> str:
+            pairs = key + extra
+            if not pairs:
+                return ""
+            escaped = (
+                f'{k}="{v.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                for k, v in pairs
+            )
+            return "{" + ",".join(escaped) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in _HELP:
+                    lines.append(f"# HELP {name} {_HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{fmt(key)} {value:g}")
+            for name, series in sorted(self._summaries.items()):
+                if name in _HELP:
+                    lines.append(f"# HELP {name} {_HELP[name]}")
+                lines.append(f"# TYPE {name} summary")
+                for key, s in sorted(series.items()):
+                    lines.append(f"{name}_sum{fmt(key)} {s.total:.6f}")
+                    lines.append(f"{name}_count{fmt(key)} {s.count}")
+        # Все ряды одного датчика — под одной строкой TYPE
+        for name, series in sorted(self._collect().items()):
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{fmt(key)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+# --- Реестр по умолчанию и спаны этапов ---
+
+_default_registry: Optional[MetricsRegistry] = None
+_NULL_SPAN = nullcontext()
+
+
+def enable_metrics(registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    """
+    Включает сбор метрик: реестр становится реестром по умолчанию для span()
+    и для новых MietScheduleClient, созданных без явного metrics.
+    """
+    global _default_registry
+    _default_registry = registry or MetricsRegistry()
+    return _default_registry
+
+
+def disable_metrics() -> None:
+    global _default_registry
+    _default_registry = None
+
+
+def get_default_registry() -> Optional[MetricsRegistry]:
+    return _default_registry
+
+
+def span(stage: str, **labels: Any):
+    """
+    Контекстный менеджер для замера этапа обработки.
+    Если метрики не включены, возвращается общий пустой контекст (без замеров).
+    """
+    registry = _default_registry
+    if registry is None:
+        return _NULL_SPAN
+    return registry.span(stage, **labels)
+
@@ -0,0 +1,411 @@
+# schedule_models.py
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from schedule_calendar import (WEEKS_IN_CYCLE, DateLike, SemesterCalendar,
+                               get_default_calendar)
+from schedule_metrics import span
+
+DISTANT_PREFIX = "[ДСТ]"
+
+
+def split_subject_name(subject_full_name: str, is_distant: bool = False) -> Tuple[str, str]:
+    """
+    Разбирает Class.Name вида "[ДСТ] Физика [Лек]" на название предмета и тип занятия.
+    Возвращает (название, тип); тип — пустая строка, если он не указан.
+    Префикс "[ДСТ]" отбрасывается для дистанционных занятий.
+    """
+    if is_distant and subject_full_name.startswith(DISTANT_PREFIX):
+        subject_full_name = subject_full_name[len(DISTANT_PREFIX) :].lstrip()
+
+    class_type = ""
+    subject_name = subject_full_name
+    if "[" in subject_full_name and "]" in subject_full_name:
+        start_bracket = subject_full_name.rfind("[")
+        end_bracket = subject_full_name.rfind("]")
+        if start_bracket != -1 and end_bracket != -1 and start_bracket < end_bracket:
+            potential_type = subject_full_name[start_bracket + 1 : end_bracket]
+            if (
+                len(potential_type) <= 5
+                and potential_type.isalpha()
+                and potential_type.upper() == potential_type
+            ):  # Тип обычно в верхнем регистре
+                class_type = potential_type
+                subject_name = subject_full_name[:start_bracket].strip()
+    return subject_name, class_type
+
+
+def _intern(value: Any) -> str:
+    # Имена преподавателей, аудиторий и групп повторяются тысячи раз за обход
+    return sys.intern(value) if isinstance(value, str) else ""
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else ""
+
+
+@dataclass(slots=True, frozen=True)
+class Lesson:
+    """
+    Одно занятие из Data, разобранное один раз.
+    Отсутствующие строковые поля хранятся как пустые строки.
+    """
+
+    group: str
+    day: Optional[int]  # Day: день недели (1-7)
+    day_number: Optional[int]  # DayNumber: номер недели (0-3)
+    time_code: int  # Time.Code: номер пары
+    time_label: str  # Time.Time: "1 пара"
+    time_from: str
+    time_to: str
+    class_name: str  # Class.Name как есть
+    subject: str  # Название предмета без типа и [ДСТ]
+    class_type: str  # Лек, Пр, Лаб...
+    is_distant: bool
+    teacher: str
+    teacher_full: str
+    room: str
+
+    @classmethod
+    def from_item(
+        cls, item: Dict[str, Any], group_name: Optional[str] = None, intern: bool = True
+    ) -> "Lesson":
+        """
+        Создаёт занятие из записи Data ответа API.
+        :param group_name: Имя группы; по умолчанию берётся из item["Group"]["Name"].
+        :param intern: Интернировать строки. Окупается для занятий, которые хранятся
+            долго (индексы, снимки); для разового форматирования — лишняя работа.
+        """
+        text = _intern if intern else _text
+        time_data = item.get("Time") or {}
+        class_info = item.get("Class") or {}
+        room_info = item.get("Room") or {}
+        if group_name is None:
+            group_name = (item.get("Group") or {}).get("Name")
+
+        class_name = class_info.get("Name") or ""
+        is_distant = bool(class_info.get("Form", False))
+        subject, class_type = split_subject_name(class_name, is_distant)
+
+        return cls(
+            group=text(group_name),
+            day=item.get("Day"),
+            day_number=item.get("DayNumber"),
+            time_code=time_data.get("Code") or 0,
+            time_label=text(time_data.get("Time")),
+            time_from=text(time_data.get("TimeFrom")),
+            time_to=text(time_data.get("TimeTo")),
+            class_name=text(class_name),
+            subject=text(subject),
+            class_type=text(class_type),
+            is_distant=is_distant,
+            teacher=text(class_info.get("Teacher")),
+            teacher_full=text(class_info.get("TeacherFull")),
+            room=text(room_info.get("Name")),
+        )
+
+    def to_item(self) -> Dict[str, Any]:
+        """Обратное преобразование в запись формата API."""
+        return {
+            "Day": self.day,
+            "DayNumber": self.day_number,
+            "Time": {
+                "Time": self.time_label,
+                "Code": self.time_code,
+                "TimeFrom": self.time_from,
+                "TimeTo": self.time_to,
+            },
+            "Class": {
+                "Name": self.class_name,
+                "Teacher": self.teacher,
+                "TeacherFull": self.teacher_full,
+                "Form": self.is_distant,
+            },
+            "Group": {"Name": self.group},
+            "Room": {"Name": self.room},
+        }
+
+    @property
+    def sort_key(self) -> Tuple[int, int, int]:
+        """(Day, DayNumber, Time.Code) — порядок вывода расписания."""
+        return (self.day or 0, self.day_number or 0, self.time_code)
+
+
+LessonLike = Union[Lesson, Dict[str, Any]]
+
+
+def as_lesson(item: LessonLike) -> Lesson:
+    """
+    Возвращает Lesson как есть, запись API — разбирает для разового использования
+    (без интернирования строк). Чтобы узнать одно поле записи, дешевле прочитать его из словаря.
+    """
+    return item if isinstance(item, Lesson) else Lesson.from_item(item, intern=False)
+
+
+def parse_lessons(
+    items: Union[Dict[str, Any], Iterable[LessonLike]], group_name: Optional[str] = None
+) -> List[Lesson]:
+    """
+    Разбирает занятия из ответа API (словарь с ключом "Data") или из списка записей.
+    :param group_name: Имя группы для всех занятий (если его нет в записях).
+    """
+    if isinstance(items, dict):
+        items = items.get("Data", [])
+    with span("parse"):
+        return [
+            item if isinstance(item, Lesson) else Lesson.from_item(item, group_name)
+            for item in items
+        ]
+
+
+def parse_time_of_day(value: Optional[str]) -> Optional[time]:
+    """
+    Время начала/конца пары из TimeFrom/TimeTo.
+    Понимает "09:00", "09:00:00" и дату-время вида "0001-01-01T09:00:00".
+    """
+    if not value:
+        return None
+    if "T" in value:
+        value = value.split("T", 1)[1]
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class PairTimeTable:
+    """
+    Таблица звонков: код пары (Time.Code) и её название (Time.Time) -> (TimeFrom, TimeTo).
+    Для каждой пары запоминается первое встреченное время.
+    """
+
+    def __init__(self):
+        self._by_code: Dict[int, Tuple[str, str]] = {}
+        self._by_label: Dict[str, Tuple[str, str]] = {}
+        self._sources: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_lessons(cls, lessons: Iterable[LessonLike]) -> "PairTimeTable":
+        """Таблица по занятиям (Lesson или записям API) — для многих поисков по одному списку."""
+        table = cls()
+        table.update(lessons)
+        return table
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def add(self, code: Any, label: Any, time_from: Any, time_to: Any) -> None:
+        if not time_from and not time_to:
+            return
+        times = (time_from or "", time_to or "")
+        with self._lock:
+            if isinstance(code, int):
+                self._by_code.setdefault(code, times)
+            if isinstance(label, str) and label:
+                self._by_label.setdefault(label, times)
+
+    def update(self, lessons: Iterable[LessonLike], source: Optional[str] = None) -> None:
+        """
+        Добавляет времена пар из занятий (Lesson или записей API).
+        Записи просматриваются без блокировки, таблица пополняется одним захватом.
+        :param source: Откуда данные (например, имя группы): данные одного источника
+            учитываются один раз, повторная загрузка того же расписания ничего не стоит.
+        """
+        if source is not None and source in self._sources:
+            return
+        by_code: Dict[int, Tuple[str, str]] = {}
+        by_label: Dict[str, Tuple[str, str]] = {}
+        for item in lessons:
+            if isinstance(item, Lesson):
+                code, label = item.time_code, item.time_label
+                time_from, time_to = item.time_from, item.time_to
+            else:
+                time_data = item.get("Time")
+                if not isinstance(time_data, dict):
+                    continue
+                code, label = time_data.get("Code"), time_data.get("Time")
+                time_from, time_to = time_data.get("TimeFrom"), time_data.get("TimeTo")
+            if not time_from and not time_to:
+                continue
+            times = (time_from or "", time_to or "")
+            if isinstance(code, int):
+                by_code.setdefault(code, times)
+            if isinstance(label, str) and label:
+                by_label.setdefault(label, times)
+        with self._lock:
+            for code, times in by_code.items():
+                self._by_code.setdefault(code, times)
+            for label, times in by_label.items():
+                self._by_label.setdefault(label, times)
+            if source is not None:
+                self._sources.add(source)
+
+    def merge(self, other: "PairTimeTable") -> None:
+        """Добавляет пары из другой таблицы (уже известные пары не перезаписываются)."""
+        with self._lock:
+            for code, times in other._by_code.items():
+                self._by_code.setdefault(code, times)
+            for label, times in other._by_label.items():
+                self._by_label.setdefault(label, times)
+
+    def lookup(self, pair_identifier: Any) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Время пары по коду (int) или названию (str, "1 пара").
+        Формат результата как у MietScheduleClient.get_pair_time_info.
+        """
+        if isinstance(pair_identifier, int):
+            times = self._by_code.get(pair_identifier)
+        elif isinstance(pair_identifier, str):
+            times = self._by_label.get(pair_identifier)
+        else:
+            times = None
+        if times is None:
+            return None
+        return {"TimeFrom": times[0] or None, "TimeTo": times[1] or None}
+
+
+# Звонки одинаковы для всего университета, поэтому таблица общая для всех групп
+# и хранится отдельно для каждого семестра. Пополняется загрузчиками расписания
+# (MietScheduleClient и др.), а не самими моделями.
+_shared_pair_times: Dict[str, PairTimeTable] = {}
+_shared_pair_times_lock = threading.Lock()
+
+
+def shared_pair_times(semestr: str) -> PairTimeTable:
+    """Общая таблица звонков семестра (создаётся при первом обращении)."""
+    with _shared_pair_times_lock:
+        table = _shared_pair_times.get(semestr)
+        if table is None:
+            table = _shared_pair_times[semestr] = PairTimeTable()
+        return table
+
+
+def find_shared_pair_times(semestr: Optional[str]) -> Optional[PairTimeTable]:
+    """Общая таблица звонков семестра или None, если для него ничего не загружалось."""
+    if semestr is None:
+        return None
+    return _shared_pair_times.get(semestr)
+
+
+def remember_pair_times(
+    semestr: Optional[str], lessons: Iterable[LessonLike], source: Optional[str] = None
+) -> None:
+    """
+    Пополняет общую таблицу звонков семестра временами пар из загруженного расписания.
+    Без семестра ничего не делает: таблица без семестра была бы случайной смесью.
+    """
+    if semestr:
+        shared_pair_times(semestr).update(lessons, source)
+
+
+class GroupSchedule:
+    """
+    Расписание одной группы с заранее построенными индексами:
+    занятия разложены по слотам (DayNumber, Day) и отсортированы по Time.Code,
+    так что выборка на дату или неделю — это обращение к словарю.
+    """
+
+    def __init__(
+        self,
+        group: str,
+        lessons: Iterable[Lesson],
+        semestr: Optional[str] = None,
+        calendar: Optional[SemesterCalendar] = None,
+    ):
+        """
+        :param calendar: Календарь семестра; по умолчанию — get_default_calendar() на момент запроса.
+        """
+        self.group = group
+        self.semestr = semestr
+        self.calendar = calendar
+        # Day, DayNumber, Time.Code — порядок сортировки и внутри всех корзин
+        self.lessons: List[Lesson] = sorted(lessons, key=lambda lesson: lesson.sort_key)
+
+        self._slots: Dict[Tuple[int, int], List[Lesson]] = {}
+        self._weeks: Dict[int, List[Lesson]] = {}
+        self._days: Dict[int, List[Lesson]] = {}
+        for lesson in self.lessons:
+            if lesson.day is None:
+                continue
+            self._days.setdefault(lesson.day, []).append(lesson)
+            if lesson.day_number is not None:
+                self._slots.setdefault((lesson.day_number, lesson.day), []).append(lesson)
+                self._weeks.setdefault(lesson.day_number, []).append(lesson)
+        for day_lessons in self._days.values():
+            # Внутри дня — по времени (недели перемешиваются, как в display_formatted_schedule)
+            day_lessons.sort(key=lambda lesson: lesson.time_code)
+
+        self.pair_times = PairTimeTable.from_lessons(self.lessons)
+
+    @classmethod
+    def from_response(
+        cls,
+        group: str,
+        data: Dict[str, Any],
+        calendar: Optional[SemesterCalendar] = None,
+    ) -> "GroupSchedule":
+        """Строит расписание из ответа API для группы."""
+        return cls(group, parse_lessons(data, group), data.get("Semestr"), calendar)
+
+    def __len__(self) -> int:
+        return len(self.lessons)
+
+    def __iter__(self) -> Iterator[Lesson]:
+        return iter(self.lessons)
+
+    def _calendar(self) -> SemesterCalendar:
+        return self.calendar or get_default_calendar()
+
+    def lessons_in_slot(self, day_number: int, day: int) -> List[Lesson]:
+        """Занятия недели day_number (0-3) в день day (1-7), по порядку пар."""
+        return self._slots.get((day_number, day), [])
+
+    def lessons_on(self, target_date: Optional[DateLike] = None) -> List[Lesson]:
+        """Занятия на дату (по умолчанию — сегодня), по порядку пар."""
+        day_number, day = self._calendar().week_and_day(target_date)
+        return self.lessons_in_slot(day_number, day)
+
+    def lessons_in_week(self, day_number: int) -> List[Lesson]:
+        """Занятия недели (0-3), отсортированные по дню и паре."""
+        return self._weeks.get(day_number, [])
+
+    def pair_time(self, pair_identifier: Any) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Время пары по коду или названию. Если в расписании группы такой пары нет,
+        используется общая таблица звонков семестра группы (см. remember_pair_times).
+        """
+        times = self.pair_times.lookup(pair_identifier)
+        if times is None:
+            shared = find_shared_pair_times(self.semestr)
+            if shared is not None:
+                times = shared.lookup(pair_identifier)
+        return times
+
+    def by_day(self) -> Dict[int, List[Lesson]]:
+        """Занятия по дням недели (все недели вместе), дни по возрастанию."""
+        return {day: self._days[day] for day in sorted(self._days)}
+
+    def next_lesson(self, now: Optional[datetime] = None) -> Optional[Tuple[datetime, Lesson]]:
+        """
+        Ближайшее занятие, которое начинается после now (по умолчанию — сейчас).
+        Возвращает (дата и время начала, занятие) или None, если занятий нет
+        либо у них не указано время начала.
+        """
+        if now is None:
+            now = datetime.now()
+        calendar = self._calendar()
+        # Полный цикл — 4 недели, дальше расписание повторяется
+        for offset in range(WEEKS_IN_CYCLE * 7 + 1):
+            day_date = now.date() + timedelta(days=offset)
+            for lesson in self.lessons_in_slot(*calendar.week_and_day(day_date)):
+                start = parse_time_of_day(lesson.time_from)
+                if start is None:
+                    continue
+                start_at = datetime.combine(day_date, start)
+                if start_at > now:
+                    return start_at, lesson
+        return None
@@ -0,0 +1,247 @@
+# schedule_names.py
+import re
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schedule_models import Lesson
+
+GROUP = "group"
+TEACHER = "teacher"
+
+DEFAULT_LIMIT = 5
+DEFAULT_MIN_SCORE = 0.6
+# Сколько имён с наибольшим числом общих триграмм уточняется расстоянием редактирования
+FUZZY_CANDIDATES = 16
+# Сколько имён, начинающихся с запроса, рассматривается (коротким запросам подходят сотни)
+PREFIX_CANDIDATES = 16
+# Множитель оценки для запроса, набранного в английской раскладке
+LAYOUT_PENALTY = 0.95
+
+# Латинские буквы, неотличимые от кириллических в нижнем регистре или в заглавном
+# написании ("ИBT-13" с латинской B), и разделители, которые в ключе не учитываются
+_KEY_TABLE = str.maketrans(
+    {
+        **dict(zip("abcehkmoptxy", "авсенкмортху")),
+        "ё": "е",
+        **{separator: None for separator in " \t-_.,;:'\"()/\\"},
+    }
+)
+# Набор в английской раскладке вместо русской: "bdn-13" -> "ивт-13"
+_LAYOUT_TABLE = str.maketrans(
+    "`qwertyuiop[]asdfghjkl;'zxcvbnm,.", "ёйцукенгшщзхъфывапролджэячсмитьбю"
+)
+
+
+def normalize_key(text: str) -> str:
+    """
+    Ключ для поиска имени: нижний регистр, ё -> е, латинские двойники -> кириллица,
+    без пробелов и знаков препинания ("ИВТ-13", "ивт 13" и "ИBT13" дают один ключ).
+    """
+    return text.casefold().translate(_KEY_TABLE)
+
+
+def _grams(key: str) -> List[str]:
+    # Отступ в начале, как в pg_trgm: первые буквы весят больше, префиксы находятся сразу
+    padded = f"  {key} "
+    return list({padded[i : i + 3] for i in range(len(padded) - 2)})
+
+
+def _pattern_masks(pattern: str) -> Dict[str, int]:
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def _search_distance(masks: Dict[str, int], length: int, text: str) -> int:
+    """
+    Наименьшее расстояние Левенштейна от образца (заданного masks и length) до
+    подстроки text. Бит-параллельный алгоритм Майерса: один проход по text
+    с несколькими операциями над целыми на символ.
+    """
+    all_bits = (1 << length) - 1
+    high = 1 << (length - 1)
+    pv, mv = all_bits, 0
+    score = best = length
+    get = masks.get
+    for char in text:
+        eq = get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+            if score < best:
+                best = score
+        # Сдвиг без установки младшего бита: совпадение может начинаться в любом месте text
+        ph <<= 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & all_bits
+        mv = ph & xv & all_bits
+    return best
+
+
+@dataclass
+class NameMatch:
+    name: str  # Имя группы или полное имя преподавателя
+    kind: str  # GROUP или TEACHER
+    score: float  # 0-1, 1 — точное совпадение ключа
+    matched: str  # Вариант имени, с которым совпал запрос (например, краткое имя)
+
+
+class NameResolver:
+    """
+    Нечёткий поиск групп и преподавателей по имени с опечатками.
+    Имена приводятся к ключу (см. normalize_key) и раскладываются по триграммам.
+    Кандидаты — имена, начинающиеся с запроса, и имена с наибольшим числом общих
+    триграмм; их оценка — расстояние редактирования от запроса до лучшей
+    подстроки имени с поправкой на то, какую часть имени покрывает запрос.
+    Строится один раз, после чего запрос проверяет несколько десятков имён.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._entries: List[Tuple[str, str, str]] = []  # (kind, name, matched)
+        self._seen: Dict[Tuple[str, str, str], int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        self._sorted: List[Tuple[str, int]] = []
+        self._frozen = True
+
+    @classmethod
+    def from_names(
+        cls, groups: Iterable[str] = (), teachers: Iterable[str] = ()
+    ) -> "NameResolver":
+        resolver = cls()
+        for group in groups:
+            resolver.add(group, GROUP)
+        for teacher in teachers:
+            resolver.add(teacher, TEACHER)
+        return resolver
+
+    @classmethod
+    def from_lessons(
+        cls, lessons: Iterable[Lesson], groups: Iterable[str] = ()
+    ) -> "NameResolver":
+        """
+        Группы и преподаватели из занятий: и краткое (Class.Teacher), и полное
+        (Class.TeacherFull) имя ведут к полному.
+        :param groups: Дополнительные группы (например, группы без занятий).
+        """
+        resolver = cls()
+        for group in groups:
+            resolver.add(group, GROUP)
+        for lesson in lessons:
+            resolver.add(lesson.group, GROUP)
+            teacher = lesson.teacher_full or lesson.teacher
+            resolver.add(lesson.teacher_full, TEACHER)
+            resolver.add(lesson.teacher, TEACHER, canonical=teacher)
+        return resolver
+
+    def add(self, name: str, kind: str, canonical: Optional[str] = None) -> None:
+        """
+        Добавляет вариант имени.
+        :param canonical: Имя, которое возвращается при совпадении (по умолчанию — name).
+        """
+        if not name:
+            return
+        entry = (kind, canonical or name, name)
+        if entry in self._seen:
+            return
+        key = normalize_key(name)
+        if not key:
+            return
+        entry_id = self._seen[entry] = len(self._keys)
+        self._keys.append(key)
+        self._entries.append(entry)
+        for gram in _grams(key):
+            self._postings.setdefault(gram, []).append(entry_id)
+        self._frozen = False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _freeze(self) -> None:
+        self._sorted = sorted((key, entry_id) for entry_id, key in enumerate(self._keys))
+        self._frozen = True
+
+    def _candidates(self, query: str, kind: Optional[str]) -> Iterator[int]:
+        if not self._frozen:
+            self._freeze()
+        # Имена, начинающиеся с запроса
+        position = bisect_left(self._sorted, (query,))
+        taken = 0
+        for key, entry_id in self._sorted[position:]:
+            if not key.startswith(query) or taken >= PREFIX_CANDIDATES:
+                break
+            if kind is None or self._entries[entry_id][0] == kind:
+                taken += 1
+                yield entry_id
+        # Имена с наибольшим числом общих триграмм (Counter считает списки на C)
+        counts = Counter(
+            chain.from_iterable(self._postings.get(gram, ()) for gram in _grams(query))
+        )
+        if kind is not None:
+            counts = Counter({i: n for i, n in counts.items() if self._entries[i][0] == kind})
+        for entry_id, _ in counts.most_common(FUZZY_CANDIDATES):
+            yield entry_id
+
+    def _scores(self, query: str, kind: Optional[str]) -> Iterator[Tuple[int, float]]:
+        length = len(query)
+        masks = _pattern_masks(query)
+        seen = set()
+        for entry_id in self._candidates(query, kind):
+            if entry_id in seen:
+                continue
+            seen.add(entry_id)
+            key = self._keys[entry_id]
+            similarity = 1 - _search_distance(masks, length, key) / length
+            if similarity <= 0:
+                continue
+            # Точное совпадение — 1; запрос, покрывающий малую часть имени, — до 0.75
+            score = similarity * (0.75 + 0.25 * min(1.0, length / len(key)))
+            if not key.startswith(query):
+                score *= 0.95
+            yield entry_id, score
+
+    def resolve(
+        self,
+        query: str,
+        kind: Optional[str] = None,
+        limit: int = DEFAULT_LIMIT,
+        min_score: float = DEFAULT_MIN_SCORE,
+    ) -> List[NameMatch]:
+        """
+        Подходящие имена по убыванию оценки.
+        :param kind: GROUP или TEACHER (None — и те, и другие).
+        """
+        variants = [(normalize_key(query), 1.0)]
+        folded = query.casefold()
+        # Запрос без кириллицы мог быть набран в английской раскладке
+        if re.search("[a-z]", folded) and not re.search("[а-яё]", folded):
+            variants.append((normalize_key(folded.translate(_LAYOUT_TABLE)), LAYOUT_PENALTY))
+
+        best: Dict[Tuple[str, str], NameMatch] = {}
+        for key, factor in variants:
+            if not key:
+                continue
+            for entry_id, score in self._scores(key, kind):
+                score *= factor
+                if score < min_score:
+                    continue
+                entry_kind, name, matched = self._entries[entry_id]
+                current = best.get((entry_kind, name))
+                if current is None or score > current.score:
+                    best[(entry_kind, name)] = NameMatch(name, entry_kind, round(score, 4), matched)
+        matches = sorted(best.values(), key=lambda match: (-match.score, match.name))
+        return matches[:limit]
+
+    def best(self, query: str, kind: Optional[str] = None) -> Optional[NameMatch]:
+        """Лучшее совпадение или None, если подходящих имён нет."""
+        matches = self.resolve(query, kind, limit=1)
+        return matches[0] if matches else None
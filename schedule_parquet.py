@@ -0,0 +1,181 @@
+# schedule_parquet.py
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from miet_schedule_api import DEFAULT_MAX_CONCURRENCY, MietScheduleClient
+from schedule_metrics import span
+from schedule_models import Lesson
+
+# Схема плоской таблицы занятий: одна строка — одна запись из Data.
+# Имена колонок совпадают с полями Lesson.
+SCHEDULE_SCHEMA = pa.schema(
+    [
+        ("group", pa.string()),
+        ("day", pa.int8()),  # Day: день недели (1-7)
+        ("day_number", pa.int8()),  # DayNumber: номер недели (0-3)
+        # Time.Code: номер пары; со знаком и той же ширины, что в schedule_snapshot
+        ("time_code", pa.int16()),
+        ("time_label", pa.string()),  # Time.Time: "1 пара"
+        ("time_from", pa.string()),
+        ("time_to", pa.string()),
+        ("class_name", pa.string()),  # Class.Name как есть
+        ("subject", pa.string()),  # Название предмета без типа и [ДСТ]
+        ("class_type", pa.string()),  # Лек, Пр, Лаб...
+        ("teacher", pa.string()),
+        ("teacher_full", pa.string()),
+        ("room", pa.string()),
+        ("is_distant", pa.bool_()),
+    ]
+)
+
+SEMESTR_METADATA_KEY = b"semestr"
+
+
+def schedules_to_table(
+    schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]],
+) -> pa.Table:
+    """
+    Разворачивает ответы API для групп в одну Arrow-таблицу.
+    :param schedules: Пары (имя группы, ответ API); None вместо ответа пропускается.
+    """
+    columns: Dict[str, List[Any]] = {name: [] for name in SCHEDULE_SCHEMA.names}
+    semestr: Optional[str] = None
+
+    for group_name, data in schedules:
+        if not data:
+            continue
+        if semestr is None:
+            semestr = data.get("Semestr")
+        for item in data.get("Data", []):
+            lesson = Lesson.from_item(item, group_name)
+            for name, column in columns.items():
+                column.append(getattr(lesson, name))
+
+    table = pa.Table.from_pydict(columns, schema=SCHEDULE_SCHEMA)
+    if semestr:
+        table = table.replace_schema_metadata({SEMESTR_METADATA_KEY: semestr.encode()})
+    return table
+
+
+def crawl_to_table(
+    client: MietScheduleClient,
+    groups: Optional[Iterable[str]] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> pa.Table:
+    """Обходит все группы (или указанные) и собирает их расписания в таблицу."""
+    if groups is None:
+        groups = client.get_all_groups() or []
+    results = client.get_schedules_for_groups(groups, max_concurrency=max_concurrency)
+    return schedules_to_table((result.group, result.data) for result in results)
+
+
+def write_parquet(table: pa.Table, path: str) -> None:
+    """
+    Сохраняет таблицу в Parquet. Файл заменяется атомарно,
+    так что читатели никогда не увидят недописанный файл.
+    """
+    tmp_path = f"{path}.tmp"
+    # Сортировка по группе и времени улучшает сжатие и статистику row group
+    table = table.sort_by(
+        [("group", "ascending"), ("day_number", "ascending"), ("day", "ascending"),
+         ("time_code", "ascending")]
+    )
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def read_parquet(path: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """Читает файл write_parquet через memory map (без копирования файла в память целиком)."""
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def table_semestr(table: pa.Table) -> Optional[str]:
+    """Название семестра, сохранённое в метаданных таблицы."""
+    metadata = table.schema.metadata or {}
+    value = metadata.get(SEMESTR_METADATA_KEY)
+    return value.decode() if value else None
+
+
+# --- Векторные фильтры ---
+
+
+def filter_lessons(
+    table: pa.Table,
+    group: Optional[str] = None,
+    day: Optional[int] = None,
+    day_number: Optional[int] = None,
+    teacher: Optional[str] = None,
+    room: Optional[str] = None,
+) -> pa.Table:
+    """
+    Отбирает занятия по условиям (все условия объединяются через И).
+    teacher — подстрока краткого или полного имени без учёта регистра,
+    остальные условия — точное совпадение.
+    """
+    mask = None
+
+    def combine(condition):
+        nonlocal mask
+        mask = condition if mask is None else pc.and_(mask, condition)
+
+    if group is not None:
+        combine(pc.equal(table["group"], group))
+    if day is not None:
+        combine(pc.equal(table["day"], day))
+    if day_number is not None:
+        combine(pc.equal(table["day_number"], day_number))
+    if room is not None:
+        combine(pc.equal(table["room"], room))
+    if teacher is not None:
+        combine(
+            pc.or_(
+                pc.match_substring(table["teacher"], teacher, ignore_case=True),
+                pc.match_substring(table["teacher_full"], teacher, ignore_case=True),
+            )
+        )
+
+    if mask is None:
+        return table
+    with span("filter"):
+        return table.filter(pc.fill_null(mask, False))
+
+
+def lessons_on(
+    table: pa.Table, target_date: Optional[datetime] = None, group: Optional[str] = None
+) -> pa.Table:
+    """Занятия на указанную дату (по умолчанию — сегодня)."""
+    if target_date is None:
+        target_date = datetime.now()
+    return filter_lessons(
+        table,
+        group=group,
+        day=target_date.weekday() + 1,
+        day_number=MietScheduleClient.get_current_week_day_number(target_date),
+    )
+
+
+def lessons_in_week(
+    table: pa.Table, target_date: Optional[datetime] = None, group: Optional[str] = None
+) -> pa.Table:
+    """Занятия на неделю, в которую попадает дата (по умолчанию — текущая неделя)."""
+    return filter_lessons(
+        table,
+        group=group,
+        day_number=MietScheduleClient.get_current_week_day_number(target_date),
+    )
+
+
+def table_to_lessons(table: pa.Table) -> List[Lesson]:
+    """
+    Преобразует строки таблицы обратно в занятия
+    (для display_formatted_schedule и других функций, работающих с Lesson).
+    """
+    missing = set(SCHEDULE_SCHEMA.names) - set(table.column_names)
+    if missing:
+        raise ValueError(f"В таблице нет колонок: {', '.join(sorted(missing))}")
+    return [Lesson(**row) for row in table.select(SCHEDULE_SCHEMA.names).to_pylist()]
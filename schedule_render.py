@@ -0,0 +1,410 @@
+# schedule_render.py
+import os
+import re
+from html import escape
+from typing import (IO, Any, Callable, Dict, Iterable, List, Optional, Sequence,
+                    Tuple, Union)
+
+from schedule_calendar import DAY_NAMES, WEEK_TEXTS
+from schedule_metrics import span
+from schedule_models import (GroupSchedule, Lesson, LessonLike, as_lesson,
+                             parse_time_of_day)
+
+# Сбрасываем кэш строк, когда в нём накопилось столько занятий
+# (примерно расписание всех групп за семестр)
+LINE_CACHE_MAX_ENTRIES = 200_000
+
+RENDER_TARGETS = ("text", "html", "markdown")
+
+ScheduleItems = Union[GroupSchedule, Sequence[LessonLike]]
+
+
+def week_text(day_number: Optional[int]) -> str:
+    return WEEK_TEXTS.get(day_number, f"Неизвестная неделя ({day_number})")
+
+
+def day_text(day: int) -> str:
+    return DAY_NAMES.get(day, f"День {day}")
+
+
+def format_lesson_line(lesson: Lesson) -> str:
+    """Строка занятия для текстового вывода (с временем начала и конца пары)."""
+    pair_text = lesson.time_label or "N/A"  # "1 пара"
+    time_from = lesson.time_from  # "09:00"
+    time_to = lesson.time_to  # "10:20"
+
+    if time_from and time_to:
+        time_str_display = f"{pair_text} ({time_from}-{time_to})"
+    elif time_from:  # Если есть только время начала
+        time_str_display = f"{pair_text} (с {time_from})"
+    elif time_to:  # Если есть только время конца (маловероятно, но для полноты)
+        time_str_display = f"{pair_text} (до {time_to})"
+    else:
+        time_str_display = pair_text
+
+    distant_str = "[ДСТ] " if lesson.is_distant else ""
+    subject_name = lesson.subject if lesson.class_name else "N/A"
+    class_type_display = f" [{lesson.class_type}]" if lesson.class_type else ""
+
+    return (
+        f"{time_str_display}: {distant_str}{subject_name}{class_type_display} - "
+        f"Ауд: {lesson.room or 'N/A'}, Преп: {lesson.teacher or 'N/A'} "
+        f"({week_text(lesson.day_number)}) [Группа: {lesson.group or 'N/A'}]"
+    )
+
+
+def group_by_day(schedule_items: ScheduleItems) -> Dict[int, List[Lesson]]:
+    """
+    Занятия по дням недели, дни по возрастанию, внутри дня — по коду пары.
+    Занятия без дня пропускаются.
+    """
+    if isinstance(schedule_items, GroupSchedule):
+        return schedule_items.by_day()  # Уже сгруппировано и отсортировано
+
+    schedule_by_day: Dict[int, List[Lesson]] = {}
+    for item in schedule_items:
+        lesson = as_lesson(item)
+        if lesson.day is None:  # Пропускаем занятия без указания дня
+            continue
+        schedule_by_day.setdefault(lesson.day, []).append(lesson)
+    for day_lessons in schedule_by_day.values():
+        day_lessons.sort(key=lambda lesson: lesson.time_code)
+    return {day: schedule_by_day[day] for day in sorted(schedule_by_day)}
+
+
+class ScheduleRenderer:
+    """
+    Базовый класс отрисовки расписания: весь вывод собирается в один список
+    строк и склеивается один раз, а готовая строка каждого занятия кэшируется
+    (Lesson неизменяем и хэшируем, одно и то же занятие часто встречается
+    на страницах группы, преподавателя и аудитории).
+    """
+
+    target = ""
+    extension = ""
+
+    def __init__(self, show_group: bool = False):
+        """
+        :param show_group: Показывать группу каждого занятия — для страниц, где
+            собраны занятия многих групп (преподаватель, аудитория).
+        """
+        self.show_group = show_group
+        self._lines: Dict[Lesson, str] = {}
+
+    def _columns(self) -> Tuple[str, ...]:
+        columns = ("Пара", "Время", "Предмет", "Тип")
+        if self.show_group:
+            columns += ("Группа",)
+        return columns + ("Аудитория", "Преподаватель", "Неделя")
+
+    def _cells(self, lesson: Lesson) -> Tuple[str, ...]:
+        """Ячейки строки занятия для табличных форматов (в порядке _columns)."""
+        cells = (lesson.time_label, _time_range(lesson), _subject(lesson), lesson.class_type)
+        if self.show_group:
+            cells += (lesson.group,)
+        return cells + (
+            lesson.room,
+            lesson.teacher_full or lesson.teacher,
+            week_text(lesson.day_number),
+        )
+
+    def _format(self, lesson: Lesson) -> str:
+        """Готовая строка занятия (с переводом строки) — переопределяется в наследниках."""
+        raise NotImplementedError
+
+    def _line(self, lesson: Lesson) -> str:
+        line = self._lines.get(lesson)
+        if line is None:
+            if len(self._lines) >= LINE_CACHE_MAX_ENTRIES:
+                self._lines.clear()
+            line = self._lines[lesson] = self._format(lesson)
+        return line
+
+    def _render_parts(
+        self,
+        parts: List[str],
+        schedule_by_day: Dict[int, List[Lesson]],
+        semestr: str,
+        current_week_text: Optional[str],
+        title: Optional[str],
+    ) -> None:
+        raise NotImplementedError
+
+    def render(
+        self,
+        schedule_items: ScheduleItems,
+        semestr: str,
+        current_week_text: Optional[str] = None,
+        title: Optional[str] = None,
+    ) -> str:
+        """
+        Отрисовывает занятия, сгруппированные по дням.
+        Для пустого списка возвращает пустую строку.
+        :param title: Заголовок страницы (например, имя группы).
+        """
+        if not schedule_items:
+            return ""
+        with span("format", target=self.target):
+            parts: List[str] = []
+            self._render_parts(
+                parts, group_by_day(schedule_items), semestr, current_week_text, title
+            )
+            return "".join(parts)
+
+    def render_to(
+        self,
+        out: IO[str],
+        schedule_items: ScheduleItems,
+        semestr: str,
+        current_week_text: Optional[str] = None,
+        title: Optional[str] = None,
+    ) -> None:
+        """Отрисовывает расписание и записывает его в out одним вызовом write."""
+        text = self.render(schedule_items, semestr, current_week_text, title)
+        if text:
+            out.write(text)
+
+
+class TextRenderer(ScheduleRenderer):
+    """Текстовый вывод в формате display_formatted_schedule."""
+
+    target = "text"
+    extension = "txt"
+
+    def __init__(
+        self,
+        item_formatter: Callable[[Lesson], str] = format_lesson_line,
+        show_group: bool = False,
+    ):
+        """
+        :param show_group: Для совместимости с другими форматами: строка по умолчанию
+            (format_lesson_line) всегда содержит группу.
+        """
+        super().__init__(show_group)
+        self.item_formatter = item_formatter
+
+    def _format(self, lesson: Lesson) -> str:
+        return f"  {self.item_formatter(lesson)}\n"
+
+    def _render_parts(self, parts, schedule_by_day, semestr, current_week_text, title):
+        if title:
+            parts.append(f"\n=== {title} ===\n")
+        parts.append(f"\n--- Расписание на {semestr} ---\n")
+        if current_week_text:
+            parts.append(f"--- (Неделя: {current_week_text}) ---\n")
+        if not schedule_by_day:
+            parts.append(
+                "Нет занятий для отображения по текущим фильтрам (возможно, не указаны дни).\n"
+            )
+            return
+        line = self._line
+        for day, lessons in schedule_by_day.items():
+            parts.append(f"\n--- {day_text(day)} ---\n")
+            parts.extend([line(lesson) for lesson in lessons])
+
+
+def _short_time(value: str) -> str:
+    # "0001-01-01T09:00:00" -> "09:00"; нераспознанное значение выводим как есть
+    parsed = parse_time_of_day(value)
+    return parsed.strftime("%H:%M") if parsed is not None else value
+
+
+def _time_range(lesson: Lesson) -> str:
+    if lesson.time_from or lesson.time_to:
+        return f"{_short_time(lesson.time_from)}–{_short_time(lesson.time_to)}"
+    return ""
+
+
+def _subject(lesson: Lesson) -> str:
+    subject = lesson.subject if lesson.class_name else "N/A"
+    return f"[ДСТ] {subject}" if lesson.is_distant else subject
+
+
+class HtmlRenderer(ScheduleRenderer):
+    """HTML-таблица: строка-заголовок на каждый день и строка на каждое занятие."""
+
+    target = "html"
+    extension = "html"
+
+    def __init__(self, standalone: bool = False, show_group: bool = False):
+        """:param standalone: Оборачивать таблицу в полный HTML-документ."""
+        super().__init__(show_group)
+        self.standalone = standalone
+
+    def _format(self, lesson: Lesson) -> str:
+        cells = self._cells(lesson)
+        return "<tr>" + "".join(f"<td>{escape(cell)}</td>" for cell in cells) + "</tr>\n"
+
+    def _render_parts(self, parts, schedule_by_day, semestr, current_week_text, title):
+        caption = escape(title or f"Расписание на {semestr}")
+        if self.standalone:
+            parts.append(
+                '<!DOCTYPE html>\n<html lang="ru">\n<head>\n<meta charset="utf-8">\n'
+                f"<title>{caption}</title>\n</head>\n<body>\n"
+            )
+        parts.append('<table class="schedule">\n')
+        parts.append(f"<caption>{caption}")
+        if title:
+            parts.append(f" — {escape(semestr)}")
+        if current_week_text:
+            parts.append(f" ({escape(current_week_text)})")
+        parts.append("</caption>\n")
+        columns = self._columns()
+        parts.append(
+            "<thead><tr>" + "".join(f"<th>{column}</th>" for column in columns) + "</tr></thead>\n"
+        )
+        line = self._line
+        for day, lessons in schedule_by_day.items():
+            parts.append(
+                f'<tbody>\n<tr class="day"><th colspan="{len(columns)}">'
+                f"{escape(day_text(day))}</th></tr>\n"
+            )
+            parts.extend([line(lesson) for lesson in lessons])
+            parts.append("</tbody>\n")
+        parts.append("</table>\n")
+        if self.standalone:
+            parts.append("</body>\n</html>\n")
+
+
+_MARKDOWN_SPECIAL = re.compile(r"([\\|*_`\[\]])")
+
+
+def _md(text: str) -> str:
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+class MarkdownRenderer(ScheduleRenderer):
+    """Markdown: заголовок на каждый день и таблица занятий."""
+
+    target = "markdown"
+    extension = "md"
+
+    def __init__(self, show_group: bool = False):
+        super().__init__(show_group)
+        columns = self._columns()
+        self._header = f"| {' | '.join(columns)} |\n" + "|---" * len(columns) + "|\n"
+
+    def _format(self, lesson: Lesson) -> str:
+        return "| " + " | ".join(_md(cell) for cell in self._cells(lesson)) + " |\n"
+
+    def _render_parts(self, parts, schedule_by_day, semestr, current_week_text, title):
+        if title:
+            parts.append(f"## {_md(title)}\n\n")
+        parts.append(f"**Расписание на {_md(semestr)}**")
+        if current_week_text:
+            parts.append(f" (неделя: {_md(current_week_text)})")
+        parts.append("\n")
+        line = self._line
+        for day, lessons in schedule_by_day.items():
+            parts.append(f"\n### {day_text(day)}\n\n")
+            parts.append(self._header)
+            parts.extend([line(lesson) for lesson in lessons])
+
+
+_RENDERERS = {
+    "text": TextRenderer,
+    "html": HtmlRenderer,
+    "markdown": MarkdownRenderer,
+}
+
+
+def make_renderer(target: str = "text", **kwargs: Any) -> ScheduleRenderer:
+    """Создаёт отрисовщик для формата target: text, html или markdown."""
+    try:
+        renderer_cls = _RENDERERS[target]
+    except KeyError:
+        raise ValueError(
+            f"Неизвестный формат: {target} (доступны: {', '.join(RENDER_TARGETS)})"
+        ) from None
+    return renderer_cls(**kwargs)
+
+
+# --- Пакетная отрисовка страниц групп ---
+
+# (имя группы, ответ API для группы или готовый GroupSchedule)
+GroupPage = Tuple[str, Union[Dict[str, Any], GroupSchedule]]
+
+
+def safe_file_name(name: str) -> str:
+    # Имена групп вроде "ИВТ-13" допустимы как есть; заменяем только разделители путей
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("._") or "group"
+
+
+def _to_response(schedule: GroupSchedule) -> Dict[str, Any]:
+    return {"Semestr": schedule.semestr, "Data": [lesson.to_item() for lesson in schedule]}
+
+
+def _render_batch(
+    target: str,
+    pages: List[GroupPage],
+    output_dir: Optional[str],
+    renderer_kwargs: Dict[str, Any],
+) -> List[Tuple[str, str]]:
+    """
+    Отрисовывает пачку групп одним отрисовщиком (общий кэш строк).
+    Возвращает пары (имя группы, текст страницы или путь к записанному файлу).
+    """
+    renderer = make_renderer(target, **renderer_kwargs)
+    results: List[Tuple[str, str]] = []
+    for group_name, data in pages:
+        schedule = (
+            data if isinstance(data, GroupSchedule) else GroupSchedule.from_response(group_name, data)
+        )
+        text = renderer.render(schedule, schedule.semestr or "", title=group_name)
+        if output_dir is None:
+            results.append((group_name, text))
+            continue
+        path = os.path.join(output_dir, f"{safe_file_name(group_name)}.{renderer.extension}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        results.append((group_name, path))
+    return results
+
+
+def render_groups(
+    pages: Iterable[GroupPage],
+    target: str = "text",
+    output_dir: Optional[str] = None,
+    processes: Optional[int] = None,
+    batch_size: int = 64,
+    **renderer_kwargs: Any,
+) -> Dict[str, str]:
+    """
+    Отрисовывает страницы многих групп за один проход.
+    :param pages: Пары (имя группы, ответ API или GroupSchedule).
+    :param output_dir: Каталог для файлов страниц (<группа>.txt/.html/.md);
+        если не задан, страницы возвращаются строками.
+    :param processes: Число процессов для параллельной отрисовки (None или 1 — в текущем).
+        В процессы передаются ответы API, а при записи в файлы обратно возвращаются только пути.
+    :return: Имя группы -> текст страницы или путь к файлу.
+    """
+    if target not in _RENDERERS:
+        raise ValueError(f"Неизвестный формат: {target} (доступны: {', '.join(RENDER_TARGETS)})")
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    pages = list(pages)
+    if not processes or processes <= 1 or len(pages) <= batch_size:
+        return dict(_render_batch(target, pages, output_dir, renderer_kwargs))
+
+    # Пул процессов импортируем только здесь: multiprocessing заметно
+    # удлиняет запуск коротких команд, которым нужна только отрисовка
+    from concurrent.futures import ProcessPoolExecutor
+
+    # GroupSchedule содержит блокировки и не сериализуется: передаём записи API
+    pages = [
+        (name, _to_response(data) if isinstance(data, GroupSchedule) else data)
+        for name, data in pages
+    ]
+    batches = [pages[i : i + batch_size] for i in range(0, len(pages), batch_size)]
+    results: Dict[str, str] = {}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for batch_result in executor.map(
+            _render_batch,
+            [target] * len(batches),
+            batches,
+            [output_dir] * len(batches),
+            [renderer_kwargs] * len(batches),
+        ):
+            results.update(batch_result)
+    return results
@@ -0,0 +1,210 @@
+# schedule_rooms.py
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from schedule_calendar import (WEEKS_IN_CYCLE, DateLike, SemesterCalendar,
+                               get_default_calendar)
+from schedule_models import Lesson, parse_lessons
+
+DAYS_IN_WEEK = 7
+PAIRS_PER_DAY = 8  # Time.Code: 1-8
+SLOTS_PER_WEEK = DAYS_IN_WEEK * PAIRS_PER_DAY
+SLOT_COUNT = WEEKS_IN_CYCLE * SLOTS_PER_WEEK
+ALL_SLOTS = (1 << SLOT_COUNT) - 1
+
+# (DayNumber 0-3, Day 1-7, Time.Code 1-8)
+Slot = Tuple[int, int, int]
+
+
+def slot_index(day_number: int, day: int, time_code: int) -> int:
+    """Номер бита слота: недели цикла, внутри — дни, внутри дня — пары."""
+    if not (
+        0 <= day_number < WEEKS_IN_CYCLE
+        and 1 <= day <= DAYS_IN_WEEK
+        and 1 <= time_code <= PAIRS_PER_DAY
+    ):
+        raise ValueError(f"Некорректный слот: неделя {day_number}, день {day}, пара {time_code}")
+    return day_number * SLOTS_PER_WEEK + (day - 1) * PAIRS_PER_DAY + (time_code - 1)
+
+
+def slot_at(index: int) -> Slot:
+    """Обратное преобразование номера бита в (DayNumber, Day, Time.Code)."""
+    day_number, rest = divmod(index, SLOTS_PER_WEEK)
+    day, pair = divmod(rest, PAIRS_PER_DAY)
+    return day_number, day + 1, pair + 1
+
+
+def slots_mask(
+    day_numbers: Optional[Iterable[int]] = None,
+    days: Optional[Iterable[int]] = None,
+    time_codes: Optional[Iterable[int]] = None,
+) -> int:
+    """Маска слотов по неделям, дням и парам (None — все значения)."""
+    mask = 0
+    for day_number in day_numbers if day_numbers is not None else range(WEEKS_IN_CYCLE):
+        for day in days if days is not None else range(1, DAYS_IN_WEEK + 1):
+            for time_code in time_codes if time_codes is not None else range(1, PAIRS_PER_DAY + 1):
+                mask |= 1 << slot_index(day_number, day, time_code)
+    return mask
+
+
+# Учебные дни (Пн-Сб) — область поиска свободного слота по умолчанию
+WORKING_SLOTS = slots_mask(days=range(1, 7))
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Номера установленных битов по возрастанию."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class RoomOccupancy:
+    """
+    Занятость аудиторий по слотам четырёхнедельного цикла.
+    Для каждой аудитории хранится битовая маска занятых слотов (int на
+    4×7×8 = 224 бита), для каждого слота — маска занятых аудиторий
+    (бит — номер аудитории в rooms). Запросы сводятся к нескольким
+    битовым операциям вместо обхода занятий.
+    """
+
+    def __init__(self):
+        self.rooms: List[str] = []
+        self._room_ids: Dict[str, int] = {}
+        self._room_slots: List[int] = []  # Номер аудитории -> занятые слоты
+        self._slot_rooms: List[int] = [0] * SLOT_COUNT  # Слот -> занятые аудитории
+        self.skipped = 0  # Занятия без аудитории или со слотом вне сетки
+
+    @classmethod
+    def from_lessons(cls, lessons: Iterable[Lesson]) -> "RoomOccupancy":
+        occupancy = cls()
+        occupancy.add_lessons(lessons)
+        return occupancy
+
+    @classmethod
+    def from_schedules(
+        cls, schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]]
+    ) -> "RoomOccupancy":
+        """Строит занятость из пар (имя группы, ответ API), например из обхода всех групп."""
+        occupancy = cls()
+        for group_name, data in schedules:
+            if data is not None:
+                occupancy.add_lessons(parse_lessons(data, group_name))
+        return occupancy
+
+    def _room_id(self, room: str) -> int:
+        room_id = self._room_ids.get(room)
+        if room_id is None:
+            room_id = self._room_ids[room] = len(self.rooms)
+            self.rooms.append(room)
+            self._room_slots.append(0)
+        return room_id
+
+    def add_lessons(self, lessons: Iterable[Lesson]) -> None:
+        for lesson in lessons:
+            if not lesson.room or lesson.day is None or lesson.day_number is None:
+                self.skipped += 1
+                continue
+            try:
+                index = slot_index(lesson.day_number, lesson.day, lesson.time_code)
+            except ValueError:
+                self.skipped += 1
+                continue
+            room_id = self._room_id(lesson.room)
+            self._room_slots[room_id] |= 1 << index
+            self._slot_rooms[index] |= 1 << room_id
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+    def __contains__(self, room: str) -> bool:
+        return room in self._room_ids
+
+    def _rooms_mask(self, rooms: Optional[Iterable[str]]) -> int:
+        if rooms is None:
+            return (1 << len(self.rooms)) - 1
+        mask = 0
+        for room in rooms:
+            room_id = self._room_ids.get(room)
+            if room_id is not None:
+                mask |= 1 << room_id
+        return mask
+
+    def busy_mask(self, room: str) -> int:
+        """Маска занятых слотов аудитории (0 для неизвестной аудитории)."""
+        room_id = self._room_ids.get(room)
+        return self._room_slots[room_id] if room_id is not None else 0
+
+    def is_free(self, room: str, day_number: int, day: int, time_code: int) -> bool:
+        return not self.busy_mask(room) >> slot_index(day_number, day, time_code) & 1
+
+    def busy_slots(self, room: str) -> List[Slot]:
+        """Занятые слоты аудитории по порядку (неделя, день, пара)."""
+        return [slot_at(index) for index in _bits(self.busy_mask(room))]
+
+    def free_rooms(
+        self,
+        day_number: int,
+        day: int,
+        time_code: int,
+        rooms: Optional[Iterable[str]] = None,
+    ) -> List[str]:
+        """
+        Аудитории, свободные в слоте, в порядке rooms (повторы и неизвестные
+        аудитории пропускаются). По умолчанию — все известные, в порядке первого
+        появления в расписании. Известны только аудитории, встречающиеся в
+        расписании хотя бы раз.
+        """
+        busy = self._slot_rooms[slot_index(day_number, day, time_code)]
+        if rooms is None:
+            return [self.rooms[room_id] for room_id in _bits(self._rooms_mask(None) & ~busy)]
+        free: List[str] = []
+        taken = busy
+        for room in rooms:
+            room_id = self._room_ids.get(room)
+            if room_id is not None and not taken >> room_id & 1:
+                free.append(room)
+                taken |= 1 << room_id  # Повтор той же аудитории не добавляется
+        return free
+
+    def free_rooms_on(
+        self,
+        target_date: DateLike,
+        time_code: int,
+        rooms: Optional[Iterable[str]] = None,
+        calendar: Optional[SemesterCalendar] = None,
+    ) -> List[str]:
+        """Свободные аудитории на конкретную дату и пару (неделя цикла — по календарю семестра)."""
+        day_number, day = (calendar or get_default_calendar()).week_and_day(target_date)
+        return self.free_rooms(day_number, day, time_code, rooms)
+
+    def first_free_slot(
+        self,
+        rooms: Sequence[str],
+        start: Optional[Slot] = None,
+        require_all: bool = True,
+        within: int = WORKING_SLOTS,
+    ) -> Optional[Slot]:
+        """
+        Первый слот (начиная со start включительно), в который свободны все аудитории
+        rooms (require_all=True) или хотя бы одна из них (require_all=False).
+        :param within: Маска допустимых слотов (по умолчанию — Пн-Сб, все пары; см. slots_mask).
+        :return: (DayNumber, Day, Time.Code) или None, если подходящего слота нет.
+        """
+        masks = [self.busy_mask(room) for room in rooms]
+        if not masks:
+            return None
+        if require_all:
+            busy = 0
+            for mask in masks:
+                busy |= mask
+        else:
+            busy = ALL_SLOTS
+            for mask in masks:
+                busy &= mask
+        free = ~busy & within & ALL_SLOTS
+        if start is not None:
+            free &= ALL_SLOTS << slot_index(*start)
+        if not free:
+            return None
+        return slot_at((free & -free).bit_length() - 1)
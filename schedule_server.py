@@ -0,0 +1,413 @@
+# schedule_server.py
+import argparse
+import hashlib
+import json
+import threading
+import time
+from dataclasses import asdict
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from miet_schedule_api import (DEFAULT_MAX_CONCURRENCY, GroupSchedule, Lesson,
+                               MietScheduleClient)
+from schedule_cache import DEFAULT_TTLS, ScheduleCache, default_cache_path
+from schedule_calendar import get_default_calendar
+from schedule_conflicts import ConflictDetector, ConflictReport
+from schedule_index import ScheduleIndex
+from schedule_names import GROUP, TEACHER, NameResolver
+from schedule_rooms import RoomOccupancy, slot_index
+from schedule_snapshot import write_snapshot
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_REFRESH_INTERVAL = 30 * 60  # секунд
+# Ограничение на число закэшированных ответов в одном снимке
+MAX_CACHED_RESPONSES = 10000
+
+
+def _lesson_to_json(lesson: Lesson) -> Dict[str, Any]:
+    return asdict(lesson)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Совпадает ли ETag с заголовком If-None-Match (RFC 9110, 13.1.2): список
+    через запятую, "*" — любой, слабые W/"..." сравниваются без учёта W/.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class TimetableSnapshot:
+    """Неизменяемый снимок расписания всех групп, который обслуживает запросы."""
+
+    def __init__(self, raw: Dict[str, Dict[str, Any]], version: int):
+        self.raw = raw
+        self.version = version
+        self.loaded_at = datetime.now()
+        self.groups: Dict[str, GroupSchedule] = {
+            name: GroupSchedule.from_response(name, data) for name, data in raw.items()
+        }
+        # Индексы строятся по уже разобранным занятиям групп: каждый ответ
+        # разбирается один раз
+        self.index = ScheduleIndex.from_group_schedules(self.groups.values())
+        self.names = NameResolver.from_lessons(self.index.lessons, self.groups)
+        self.rooms = RoomOccupancy.from_lessons(self.index.lessons)
+        detector = ConflictDetector()
+        for group in self.groups.values():
+            detector.add_lessons(group.lessons)
+        self.conflicts: ConflictReport = detector.report()
+        # Готовые ответы (тело и ETag) по ключу запроса
+        self.responses: Dict[str, Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def cached_response(self, key: str, build) -> Tuple[bytes, str]:
+        response = self.responses.get(key)
+        if response is not None:
+            return response
+        body = json.dumps(build(), ensure_ascii=False).encode("utf-8")
+        etag = f'"{self.version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        response = (body, etag)
+        with self._lock:
+            if len(self.responses) < MAX_CACHED_RESPONSES:
+                self.responses[key] = response
+        return response
+
+
+class TimetableStore:
+    """
+    Расписание всех групп в памяти с фоновым обновлением.
+    Новый снимок строится целиком и подменяется одной операцией присваивания,
+    поэтому запросы никогда не видят наполовину обновлённые данные.
+    """
+
+    def __init__(
+        self,
+        client: MietScheduleClient,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        snapshot_path: Optional[str] = None,
+    ):
+        """
+        :param snapshot_path: Куда после каждого обновления записывать снимок для
+            других процессов (schedule_snapshot.SharedTimetable). None — не записывать.
+        """
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.snapshot_path = snapshot_path
+        self.snapshot: Optional[TimetableSnapshot] = None
+        self.last_error: Optional[str] = None
+        self._version = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> TimetableSnapshot:
+        """Обходит все группы и подменяет снимок. Ошибки по группам не теряют старые данные."""
+        groups = self.client.get_all_groups()
+        previous = self.snapshot.raw if self.snapshot is not None else {}
+        if not groups:
+            if self.snapshot is None:
+                raise RuntimeError("Не удалось получить список групп")
+            self.last_error = "Не удалось получить список групп"
+            return self.snapshot
+
+        raw: Dict[str, Dict[str, Any]] = {}
+        failed: List[str] = []
+        for result in self.client.get_schedules_for_groups(
+            groups, max_concurrency=self.max_concurrency
+        ):
+            if result.ok:
+                raw[result.group] = result.data
+            else:
+                failed.append(result.group)
+                if result.group in previous:
+                    raw[result.group] = previous[result.group]
+
+        self._version += 1
+        self.snapshot = TimetableSnapshot(raw, self._version)
+        if self.snapshot_path is not None:
+            write_snapshot(self.snapshot_path, raw.items())
+        self.last_error = (
+            f"Не удалось загрузить {len(failed)} групп: {', '.join(sorted(failed))}"
+            if failed
+            else None
+        )
+        return self.snapshot
+
+    def start_background_refresh(self, interval: float = DEFAULT_REFRESH_INTERVAL) -> None:
+        """Запускает поток, обновляющий расписание каждые interval секунд."""
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:  # Поток обновления не должен падать
+                    self.last_error = str(e)
+
+        self._thread = threading.Thread(target=loop, name="timetable-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class ScheduleRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON-эндпоинты:
+      /groups
+      /group/<имя>[?week=0-3]
+      /today?group=<имя>[&date=YYYY-MM-DD]
+      /teacher?q=<часть имени>[&prefix=1]
+      /room?q=<аудитория>[&prefix=1]
+      /resolve?q=<имя с опечатками>[&kind=group|teacher][&limit=N]
+      /free-rooms?pair=<1-8>&(date=YYYY-MM-DD | week=<0-3>&day=<1-7>)
+      /conflicts
+      /health
+    """
+
+    store: TimetableStore  # Задаётся в make_server
+    server_version = "MietSchedule/1.0"
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело пишутся отдельно: без TCP_NODELAY каждый ответ
+    # на keep-alive соединении ждёт ~40 мс (алгоритм Нейгла + отложенный ACK)
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # Не засоряем вывод логом каждого запроса
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        path = unquote(url.path).rstrip("/") or "/"
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if path == "/health":
+            return self._send_health()
+
+        snapshot = self.store.snapshot
+        if snapshot is None:
+            return self._send_error(503, "Расписание ещё загружается")
+
+        try:
+            route = self._route(snapshot, path, query)
+        except ValueError as e:
+            return self._send_error(400, str(e))
+        if route is None:
+            return self._send_error(404, f"Неизвестный путь: {path}")
+
+        key, build = route
+        body, etag = snapshot.cached_response(key, build)
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json(200, body, etag)
+
+    def _route(self, snapshot: TimetableSnapshot, path: str, query: Dict[str, str]):
+        """Возвращает (ключ кэша ответа, функция построения ответа) или None."""
+        prefix = query.get("prefix") in ("1", "true")
+
+        if path == "/groups":
+            return path, lambda: sorted(snapshot.groups)
+
+        if path.startswith("/group/"):
+            group = snapshot.groups.get(path[len("/group/") :])
+            if group is None:
+                return None
+            if "week" in query:
+                week = int(query["week"])
+                return (
+                    f"{path}?week={week}",
+                    lambda: self._group_json(group, group.lessons_in_week(week)),
+                )
+            return path, lambda: self._group_json(group, group.lessons)
+
+        if path == "/today":
+            group = snapshot.groups.get(query.get("group", ""))
+            if group is None:
+                return None
+            day = date.fromisoformat(query["date"]) if "date" in query else date.today()
+            return (
+                f"{path}?group={group.group}&date={day.isoformat()}",
+                lambda: {**self._group_json(group, group.lessons_on(day)), "date": day.isoformat()},
+            )
+
+        if path == "/conflicts":
+            return path, lambda: asdict(snapshot.conflicts)
+
+        if path == "/free-rooms":
+            if "pair" not in query:
+                raise ValueError("Не указан параметр pair")
+            pair = int(query["pair"])
+            if "week" in query or "day" in query:
+                if "week" not in query or "day" not in query:
+                    raise ValueError("Параметры week и day указываются вместе")
+                week, day_code = int(query["week"]), int(query["day"])
+            else:
+                day = date.fromisoformat(query["date"]) if "date" in query else date.today()
+                week, day_code = get_default_calendar().week_and_day(day)
+            slot_index(week, day_code, pair)  # Проверка диапазонов (ValueError -> 400)
+            return (
+                f"{path}?week={week}&day={day_code}&pair={pair}",
+                lambda: {
+                    "week": week,
+                    "day": day_code,
+                    "pair": pair,
+                    "rooms": sorted(snapshot.rooms.free_rooms(week, day_code, pair)),
+                },
+            )
+
+        if path in ("/teacher", "/room"):
+            q = query.get("q", "").strip()
+            if not q:
+                raise ValueError("Не указан параметр q")
+            find = (
+                snapshot.index.find_by_teacher
+                if path == "/teacher"
+                else snapshot.index.find_by_room
+            )
+            # Ключ — запрос как есть: тело ответа повторяет его дословно
+            return (
+                f"{path}?q={quote(q)}&prefix={int(prefix)}",
+                lambda: {
+                    "query": q,
+                    "semestr": snapshot.index.semestr,
+                    "lessons": [_lesson_to_json(lesson) for lesson in find(q, prefix)],
+                },
+            )
+
+        if path == "/resolve":
+            q = query.get("q", "").strip()
+            if not q:
+                raise ValueError("Не указан параметр q")
+            kind = query.get("kind") or None
+            if kind not in (None, GROUP, TEACHER):
+                raise ValueError(f"Параметр kind: {GROUP} или {TEACHER}")
+            limit = int(query.get("limit", 5))
+            if not 1 <= limit <= 50:
+                raise ValueError("Параметр limit: от 1 до 50")
+            return (
+                f"{path}?q={quote(q)}&kind={kind or ''}&limit={limit}",
+                lambda: {
+                    "query": q,
+                    "matches": [asdict(match) for match in snapshot.names.resolve(q, kind, limit)],
+                },
+            )
+        return None
+
+    @staticmethod
+    def _group_json(group: GroupSchedule, lessons: List[Lesson]) -> Dict[str, Any]:
+        return {
+            "group": group.group,
+            "semestr": group.semestr,
+            "lessons": [_lesson_to_json(lesson) for lesson in lessons],
+        }
+
+    def _send_health(self) -> None:
+        snapshot = self.store.snapshot
+        payload = {
+            "ready": snapshot is not None,
+            "version": snapshot.version if snapshot else None,
+            "loaded_at": snapshot.loaded_at.isoformat() if snapshot else None,
+            "groups": len(snapshot.groups) if snapshot else 0,
+            "conflicts": len(snapshot.conflicts) if snapshot else 0,
+            "last_error": self.store.last_error,
+        }
+        self._send_json(200, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def _send_error(self, status: int, message: str) -> None:
+        body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+        self._send_json(status, body)
+
+    def _send_json(self, status: int, body: bytes, etag: Optional[str] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(
+    store: TimetableStore, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+) -> ThreadingHTTPServer:
+    """Создаёт HTTP-сервер поверх хранилища расписания (без запуска)."""
+    handler = type("BoundScheduleRequestHandler", (ScheduleRequestHandler,), {"store": store})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m miet_schedule_api serve",
+        description="Локальный HTTP API расписания МИЭТ с расписанием всех групп в памяти.",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--refresh",
+        type=float,
+        default=DEFAULT_REFRESH_INTERVAL,
+        help="Интервал фонового обновления, секунд",
+    )
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--base-url", default=None, help="Адрес API расписания")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Не использовать дисковый кэш ответов"
+    )
+    parser.add_argument(
+        "--snapshot",
+        default=None,
+        help="Записывать снимок расписания для других процессов (SharedTimetable) в этот файл",
+    )
+    args = parser.parse_args(argv)
+
+    client_kwargs: Dict[str, Any] = {}
+    if args.base_url:
+        client_kwargs["base_url"] = args.base_url
+    if not args.no_cache:
+        # TTL кэша меньше интервала обновления, иначе обновление не увидит изменений
+        client_kwargs["cache"] = ScheduleCache(
+            default_cache_path(),
+            ttls={"data": min(args.refresh / 2, DEFAULT_TTLS["data"])},
+        )
+    store = TimetableStore(MietScheduleClient(**client_kwargs), args.concurrency, args.snapshot)
+
+    print("Загрузка расписания всех групп...")
+    started = time.monotonic()
+    snapshot = store.refresh()
+    print(f"Загружено групп: {len(snapshot.groups)} за {time.monotonic() - started:.1f} с")
+    if store.last_error:
+        print(store.last_error)
+    store.start_background_refresh(args.refresh)
+
+    server = make_server(store, args.host, args.port)
+    print(f"Сервер запущен: http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        store.stop()
+
+
+if __name__ == "__main__":
+    main()
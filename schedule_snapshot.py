@@ -0,0 +1,441 @@
+# schedule_snapshot.py
+import argparse
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from schedule_calendar import DateLike, get_default_calendar
+from schedule_models import GroupSchedule, Lesson, parse_lessons
+
+# Снимок расписания всех групп в одном файле, который каждый рабочий процесс
+# отображает в память только для чтения: страницы файла общие для всех
+# процессов (page cache), а не копия разобранного JSON в каждом.
+#
+# Формат (little-endian), разделы идут подряд без выравнивания — размеры
+# всех записей кратны 4:
+#   заголовок        _HEADER
+#   таблица групп    _GROUP_RECORD  x groups (по имени группы)
+#   занятия          _LESSON_RECORD x lessons (группа за группой, по Day, DayNumber, Time.Code)
+#   смещения строк   uint32 x (strings + 1)
+#   строки           UTF-8 подряд; строка 0 — пустая
+
+MAGIC = b"MIETSCH\0"
+FORMAT_VERSION = 2
+DEFAULT_CHECK_INTERVAL = 1.0  # секунд
+
+# magic, версия формата, групп, занятий, строк, время записи (Unix time)
+_HEADER = struct.Struct("<8sIIIId")
+# имя группы (строка), семестр (строка), первое занятие, число занятий
+_GROUP_RECORD = struct.Struct("<IIII")
+# группа (строка), Day, DayNumber (-1 — нет), Time.Code (со знаком), дистанционное,
+# затем строки: Time.Time, TimeFrom, TimeTo, Class.Name, предмет, тип,
+# Teacher, TeacherFull, аудитория
+_LESSON_RECORD = struct.Struct("<IbbhB3x9I")
+# Начало записи занятия: для отбора по дню и неделе без чтения строк
+_LESSON_KEY = struct.Struct("<Ibbh")
+_OFFSET = struct.Struct("<I")
+# Поля для SharedTimetable.search -> номера 4-байтовых слов записи занятия
+# (Teacher, TeacherFull, аудитория — последние три слова)
+SEARCH_FIELDS = {"teacher": (9, 10), "room": (11,)}
+_LESSON_WORDS = _LESSON_RECORD.size // 4
+# Сколько декодированных строк держит в памяти каждый открытый снимок (LRU)
+DEFAULT_STRING_CACHE_SIZE = 4096
+
+
+@dataclass
+class SnapshotSummary:
+    """Итог записи снимка."""
+
+    path: str
+    groups: int = 0
+    lessons: int = 0
+    strings: int = 0
+    size: int = 0  # Байт
+    skipped_groups: List[str] = field(default_factory=list)  # Без данных (не загрузились)
+
+
+def _optional_byte(value: Optional[int]) -> int:
+    # Значения вне поля (в ответах API их не бывает) приводятся к границам, а не
+    # обрывают запись всего снимка ошибкой struct.error
+    return -1 if value is None else min(max(value, 0), 127)
+
+
+def _short(value: int) -> int:
+    return min(max(value, -32768), 32767)
+
+
+def write_snapshot(
+    path: str, schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]]
+) -> SnapshotSummary:
+    """
+    Записывает снимок и атомарно подменяет им файл path: читатели видят либо
+    старый снимок целиком, либо новый, и переходят на новый без перезапуска
+    (см. SharedTimetable).
+    :param schedules: Пары (имя группы, ответ API или None) — например, обход всех групп.
+    """
+    summary = SnapshotSummary(path)
+    strings: Dict[str, int] = {"": 0}
+
+    def string_id(value: str) -> int:
+        found = strings.get(value)
+        if found is None:
+            found = strings[value] = len(strings)
+        return found
+
+    by_group: Dict[str, Tuple[str, List[Lesson]]] = {}
+    for group_name, data in schedules:
+        if data is None:
+            summary.skipped_groups.append(group_name)
+            continue
+        lessons = sorted(parse_lessons(data, group_name), key=lambda lesson: lesson.sort_key)
+        by_group[group_name] = (data.get("Semestr") or "", lessons)
+
+    group_records: List[bytes] = []
+    lesson_records: List[bytes] = []
+    for group_name in sorted(by_group):
+        semestr, lessons = by_group[group_name]
+        group_records.append(
+            _GROUP_RECORD.pack(
+                string_id(group_name), string_id(semestr), len(lesson_records), len(lessons)
+            )
+        )
+        for lesson in lessons:
+            lesson_records.append(
+                _LESSON_RECORD.pack(
+                    string_id(lesson.group),
+                    _optional_byte(lesson.day),
+                    _optional_byte(lesson.day_number),
+                    _short(lesson.time_code),
+                    lesson.is_distant,
+                    string_id(lesson.time_label),
+                    string_id(lesson.time_from),
+                    string_id(lesson.time_to),
+                    string_id(lesson.class_name),
+                    string_id(lesson.subject),
+                    string_id(lesson.class_type),
+                    string_id(lesson.teacher),
+                    string_id(lesson.teacher_full),
+                    string_id(lesson.room),
+                )
+            )
+
+    # Словарь хранит порядок вставки, то есть строки упорядочены по номеру
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(group_records), len(lesson_records), len(encoded), time.time()
+    )
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(b"".join(group_records))
+            f.write(b"".join(lesson_records))
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.write(b"".join(encoded))
+            f.flush()
+            os.fsync(f.fileno())
+            summary.size = f.tell()
+        # Новый файл — новый inode: уже отображённый старый снимок остаётся целым
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    summary.groups = len(group_records)
+    summary.lessons = len(lesson_records)
+    summary.strings = len(encoded)
+    return summary
+
+
+class _MappedSnapshot:
+    """Один отображённый в память файл снимка. Не изменяется после открытия."""
+
+    def __init__(self, path: str, string_cache_size: int = DEFAULT_STRING_CACHE_SIZE):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < _HEADER.size:
+                raise ValueError(f"{path}: не снимок расписания")
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        magic, version, groups, lessons, strings, created_at = _HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path}: не снимок расписания или другая версия формата")
+        self.group_count = groups
+        self.lesson_count = lessons
+        self.string_count = strings
+        self.created_at = created_at
+        self.groups_at = _HEADER.size
+        self.lessons_at = self.groups_at + groups * _GROUP_RECORD.size
+        self.offsets_at = self.lessons_at + lessons * _LESSON_RECORD.size
+        self.strings_at = self.offsets_at + (strings + 1) * _OFFSET.size
+        if len(self.buffer) < self.strings_at or len(self.buffer) != self.strings_at + (
+            _OFFSET.unpack_from(self.buffer, self.offsets_at + strings * _OFFSET.size)[0]
+        ):
+            raise ValueError(f"{path}: файл снимка повреждён")
+
+        # Декодированные строки: имена и время пар повторяются в тысячах занятий.
+        # Кэш ограничен, иначе за время жизни процесса в нём оказались бы все строки снимка
+        self.string_cache_size = string_cache_size
+        self._strings: "OrderedDict[int, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.group_index = {
+            self.string(_GROUP_RECORD.unpack_from(self.buffer, self.group_at(i))[0]): i
+            for i in range(groups)
+        }
+
+    def group_at(self, index: int) -> int:
+        return self.groups_at + index * _GROUP_RECORD.size
+
+    def string(self, string_id: int) -> str:
+        with self._lock:
+            value = self._strings.get(string_id)
+            if value is not None:
+                self._strings.move_to_end(string_id)
+                return value
+        value = self.decode(string_id)
+        with self._lock:
+            self._strings[string_id] = value
+            if len(self._strings) > self.string_cache_size:
+                self._strings.popitem(last=False)
+        return value
+
+    def decode(self, string_id: int) -> str:
+        """Строка без кэширования — для однократного просмотра многих строк."""
+        start, end = struct.unpack_from("<II", self.buffer, self.offsets_at + string_id * 4)
+        return str(self.buffer[self.strings_at + start : self.strings_at + end], "utf-8")
+
+    def lesson(self, index: int) -> Lesson:
+        (
+            group,
+            day,
+            day_number,
+            time_code,
+            is_distant,
+            *texts,
+        ) = _LESSON_RECORD.unpack_from(self.buffer, self.lessons_at + index * _LESSON_RECORD.size)
+        string = self.string
+        return Lesson(
+            string(group),
+            None if day < 0 else day,
+            None if day_number < 0 else day_number,
+            time_code,
+            *(string(text) for text in texts[:6]),
+            bool(is_distant),
+            *(string(text) for text in texts[6:]),
+        )
+
+    def lesson_range(self, group_name: str) -> Optional[Tuple[str, int, int]]:
+        """(семестр, первое занятие, число занятий) группы или None."""
+        index = self.group_index.get(group_name)
+        if index is None:
+            return None
+        _, semestr, first, count = _GROUP_RECORD.unpack_from(self.buffer, self.group_at(index))
+        return self.string(semestr), first, count
+
+    def lesson_key(self, index: int) -> Tuple[int, int]:
+        _, day, day_number, _ = _LESSON_KEY.unpack_from(
+            self.buffer, self.lessons_at + index * _LESSON_RECORD.size
+        )
+        return day, day_number
+
+
+class SharedTimetable:
+    """
+    Снимок расписания всех групп (см. write_snapshot), отображённый в память
+    только для чтения. Каждое занятие — запись фиксированной длины, поэтому
+    запрос читает из файла лишь нужные записи, а строки декодирует по мере
+    надобности (с ограниченным LRU-кэшем в процессе).
+
+    Раз в check_interval секунд проверяется, не подменён ли файл; новый снимок
+    открывается при следующем запросе. Каждый вызов работает с одним снимком
+    целиком, старый освобождается, когда на него не остаётся ссылок.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        string_cache_size: int = DEFAULT_STRING_CACHE_SIZE,
+    ):
+        """
+        :param check_interval: Как часто проверять подмену файла, секунд
+            (0 — при каждом запросе).
+        :param string_cache_size: Сколько декодированных строк держать в памяти.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.string_cache_size = string_cache_size
+        self._snapshot = _MappedSnapshot(path, string_cache_size)
+        self._checked_at = time.monotonic()
+        self._reload_lock = threading.Lock()
+
+    def reload(self) -> bool:
+        """Открывает файл заново, если он был подменён. Возвращает True, если снимок сменился."""
+        with self._reload_lock:
+            self._checked_at = time.monotonic()
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return False  # Продолжаем отвечать по уже открытому снимку
+            if (stat.st_dev, stat.st_ino, stat.st_mtime_ns) == self._snapshot.identity:
+                return False
+            self._snapshot = _MappedSnapshot(self.path, self.string_cache_size)
+            return True
+
+    def _current(self) -> _MappedSnapshot:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.reload()
+        return self._snapshot
+
+    @property
+    def created_at(self) -> float:
+        """Время записи текущего снимка (Unix time)."""
+        return self._current().created_at
+
+    def groups(self) -> List[str]:
+        """Имена групп по алфавиту."""
+        return list(self._current().group_index)
+
+    def __contains__(self, group_name: str) -> bool:
+        return group_name in self._current().group_index
+
+    def __len__(self) -> int:
+        return self._current().group_count
+
+    def semestr(self, group_name: str) -> Optional[str]:
+        found = self._current().lesson_range(group_name)
+        return found[0] if found is not None else None
+
+    def lessons(self, group_name: str) -> List[Lesson]:
+        """Все занятия группы по порядку вывода расписания (пустой список, если группы нет)."""
+        snapshot = self._current()
+        found = snapshot.lesson_range(group_name)
+        if found is None:
+            return []
+        _, first, count = found
+        return [snapshot.lesson(i) for i in range(first, first + count)]
+
+    def _select(self, group_name: str, day_number: int, day: Optional[int]) -> Iterator[Lesson]:
+        snapshot = self._current()
+        found = snapshot.lesson_range(group_name)
+        if found is None:
+            return
+        _, first, count = found
+        for i in range(first, first + count):
+            lesson_day, lesson_day_number = snapshot.lesson_key(i)
+            if lesson_day_number == day_number and (day is None or lesson_day == day):
+                yield snapshot.lesson(i)
+
+    def lessons_in_slot(self, group_name: str, day_number: int, day: int) -> List[Lesson]:
+        """Занятия недели day_number (0-3) в день day (1-7), по порядку пар."""
+        return list(self._select(group_name, day_number, day))
+
+    def lessons_in_week(self, group_name: str, day_number: int) -> List[Lesson]:
+        """Занятия недели (0-3), отсортированные по дню и паре."""
+        return list(self._select(group_name, day_number, None))
+
+    def lessons_on(self, group_name: str, target_date: Optional[DateLike] = None) -> List[Lesson]:
+        """Занятия группы на дату (по умолчанию — сегодня), по порядку пар."""
+        day_number, day = get_default_calendar().week_and_day(target_date)
+        return self.lessons_in_slot(group_name, day_number, day)
+
+    def group_schedule(self, group_name: str) -> Optional[GroupSchedule]:
+        """Полноценное расписание группы (разбирается из снимка при каждом вызове)."""
+        snapshot = self._current()
+        found = snapshot.lesson_range(group_name)
+        if found is None:
+            return None
+        semestr, first, count = found
+        lessons = [snapshot.lesson(i) for i in range(first, first + count)]
+        return GroupSchedule(group_name, lessons, semestr or None)
+
+    def search(self, field: str, match: Callable[[str], bool]) -> List[Lesson]:
+        """
+        Занятия всех групп, у которых значение поля field удовлетворяет match:
+        "teacher" — краткое или полное имя преподавателя, "room" — аудитория.
+        match вызывается один раз на каждое различное значение поля, а записи
+        занятий сравниваются по номерам строк; Lesson строится только для найденных.
+        """
+        positions = SEARCH_FIELDS.get(field)
+        if positions is None:
+            raise ValueError(f"Неизвестное поле: {field} (доступны: {', '.join(SEARCH_FIELDS)})")
+        snapshot = self._current()
+        with memoryview(snapshot.buffer) as view:
+            if sys.byteorder == "little":
+                # Записи занятий как слова прямо в отображённом файле, без копии:
+                # столбец поля — срез с шагом в запись
+                words = view[snapshot.lessons_at : snapshot.offsets_at].cast("I")
+            else:
+                words = array("I", view[snapshot.lessons_at : snapshot.offsets_at])
+                words.byteswap()
+            try:
+                columns = [words[position::_LESSON_WORDS] for position in positions]
+                values = set(columns[0]).union(*columns[1:])
+                wanted = {value for value in values if match(snapshot.decode(value))}
+                found = set()
+                if wanted:
+                    for column in columns:
+                        found.update(
+                            index for index, value in enumerate(column) if value in wanted
+                        )
+            finally:
+                if isinstance(words, memoryview):
+                    for column in columns:
+                        column.release()
+                    words.release()
+        return [snapshot.lesson(index) for index in sorted(found)]
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from miet_schedule_api import DEFAULT_MAX_CONCURRENCY, MietScheduleClient
+    from schedule_cache import ScheduleCache, default_cache_path
+
+    parser = argparse.ArgumentParser(
+        prog="python -m schedule_snapshot",
+        description="Обходит все группы и записывает снимок расписания для SharedTimetable.",
+    )
+    parser.add_argument("path", help="Файл снимка (подменяется атомарно)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--base-url", default=None, help="Адрес API расписания")
+    args = parser.parse_args(argv)
+
+    client_kwargs: Dict[str, Any] = {"cache": ScheduleCache(default_cache_path())}
+    if args.base_url:
+        client_kwargs["base_url"] = args.base_url
+    client = MietScheduleClient(**client_kwargs)
+    groups = client.get_all_groups()
+    if not groups:
+        parser.exit(1, "Не удалось получить список групп.\n")
+
+    def crawl():
+        for i, result in enumerate(
+            client.get_schedules_for_groups(groups, max_concurrency=args.concurrency)
+        ):
+            print(f"\rЗагружено групп: {i + 1}/{len(groups)}", end="", flush=True)
+            yield result.group, result.data
+        print()
+
+    summary = write_snapshot(args.path, crawl())
+    print(
+        f"Снимок {summary.path}: групп {summary.groups}, занятий {summary.lessons}, "
+        f"строк {summary.strings}, {summary.size / 1024:.0f} КБ"
+    )
+    if summary.skipped_groups:
+        print(f"Не удалось загрузить: {', '.join(sorted(summary.skipped_groups))}")
+
+
+if __name__ == "__main__":
+    main()
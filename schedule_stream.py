@@ -0,0 +1,191 @@
+# schedule_stream.py
+import codecs
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from schedule_models import Lesson, PairTimeTable, shared_pair_times
+
+_WHITESPACE = " \t\r\n"
+# Символы, которыми может продолжаться число, оборванное на границе куска
+_NUMBER_TAIL = ".eE+-0123456789"
+
+
+class JsonStreamError(ValueError):
+    """Некорректный или оборванный JSON в потоке."""
+
+
+class _ChunkReader:
+    """Буфер над потоком байтов с разбором JSON-значений по одному."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Дочитывает следующий кусок. Возвращает False, если поток закончился."""
+        if self.eof:
+            return False
+        try:
+            for chunk in self._chunks:
+                if not chunk:
+                    continue
+                text = self._text_decoder.decode(chunk)
+                # Отбрасываем уже разобранную часть буфера
+                self.buf = self.buf[self.pos :] + text
+                self.pos = 0
+                return True
+            text = self._text_decoder.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            raise JsonStreamError(f"Ответ не в кодировке UTF-8: {e}") from e
+        self.buf = self.buf[self.pos :] + text
+        self.pos = 0
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Следующий непробельный символ (не потребляя его)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                raise JsonStreamError("Неожиданный конец JSON")
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise JsonStreamError(f"Ожидался '{char}', получен '{found}' (позиция {self.pos})")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Разбирает одно JSON-значение целиком, дочитывая поток при необходимости."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self.fill():
+                    continue
+                raise JsonStreamError(f"Ошибка разбора JSON: {e}") from e
+            # Число в конце буфера может продолжаться в следующем куске: и целиком
+            # ("7" + "5"), и после недописанной дробной части или порядка ("7." + "5")
+            if (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and not self.buf[end:].strip(_NUMBER_TAIL)
+                and self.fill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+
+def iter_object_array(
+    chunks: Iterable[bytes],
+    array_key: str,
+    meta: Optional[Dict[str, Any]] = None,
+) -> Iterator[Any]:
+    """
+    Потоково разбирает JSON-объект верхнего уровня и выдаёт элементы массива
+    array_key по одному, не строя весь массив в памяти.
+    :param meta: Словарь, в который складываются остальные поля объекта
+        (заполняется по ходу разбора, полностью — после исчерпания итератора).
+    """
+    reader = _ChunkReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise JsonStreamError("Ключ объекта должен быть строкой")
+        reader.expect(":")
+        if key == array_key:
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.peek() == ",":
+                        reader.pos += 1
+                        continue
+                    reader.expect("]")
+                    break
+        else:
+            value = reader.value()
+            if meta is not None:
+                meta[key] = value
+
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("}")
+        return
+
+
+class ScheduleStream:
+    """
+    Занятия группы, разбираемые из ответа API по мере загрузки.
+    Итерация выдаёт Lesson, удовлетворяющие predicate; прочие поля ответа
+    (например, Semestr) доступны в meta после итерации.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        group_name: str,
+        predicate: Optional[Callable[[Lesson], bool]] = None,
+        on_close: Optional[Callable[[], None]] = None,
+        wrap_error: Optional[Callable[[JsonStreamError], Exception]] = None,
+    ):
+        """
+        :param chunks: Куски тела ответа (например, response.iter_content()).
+        :param on_close: Вызывается по окончании или прерывании итерации (закрытие ответа).
+        :param wrap_error: Преобразует ошибку разбора в исключение вызывающего кода.
+        """
+        self.group_name = group_name
+        self.predicate = predicate
+        self.meta: Dict[str, Any] = {}
+        self._chunks = chunks
+        self._on_close = on_close
+        self._wrap_error = wrap_error
+        self._consumed = False
+
+    @property
+    def semestr(self) -> Optional[str]:
+        return self.meta.get("Semestr")
+
+    def __iter__(self) -> Iterator[Lesson]:
+        if self._consumed:
+            raise RuntimeError("Поток расписания можно прочитать только один раз")
+        self._consumed = True
+        # Времена пар собираются локально и попадают в общую таблицу семестра
+        # одним захватом её блокировки в конце
+        pair_times = PairTimeTable()
+        try:
+            for item in iter_object_array(self._chunks, "Data", self.meta):
+                if not isinstance(item, dict):
+                    raise JsonStreamError("Элемент Data должен быть объектом")
+                lesson = Lesson.from_item(item, self.group_name)
+                pair_times.add(lesson.time_code, lesson.time_label, lesson.time_from, lesson.time_to)
+                if self.predicate is None or self.predicate(lesson):
+                    yield lesson
+        except JsonStreamError as e:
+            if self._wrap_error is None:
+                raise
+            raise self._wrap_error(e) from e
+        finally:
+            self.close()
+            if len(pair_times) and self.semestr:
+                shared_pair_times(self.semestr).merge(pair_times)
+
+    def close(self) -> None:
+        if self._on_close is not None:
+            self._on_close()
+            self._on_close = None
@@ -0,0 +1,308 @@
+# schedule_teachers.py
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from schedule_diff import content_hash
+from schedule_models import Lesson, parse_lessons
+from schedule_render import RENDER_TARGETS, make_renderer, safe_file_name
+
+STATE_FILE_NAME = ".teachers-state.json"
+STATE_FORMAT_VERSION = 1
+DEFAULT_BATCH_SIZE = 32
+
+# (преподаватель, имя файла, занятия)
+_Page = Tuple[str, str, List[Lesson]]
+
+
+def partition_by_teacher(lessons: Iterable[Lesson]) -> Dict[str, List[Lesson]]:
+    """
+    Раскладывает занятия всех групп по преподавателям (Class.TeacherFull, если
+    его нет — Class.Teacher). Преподаватели — по алфавиту, занятия — в порядке
+    вывода расписания, общая лекция нескольких групп — по группам.
+    Занятия без преподавателя пропускаются.
+    """
+    by_teacher: Dict[str, List[Lesson]] = {}
+    for lesson in lessons:
+        teacher = lesson.teacher_full or lesson.teacher
+        if teacher:
+            by_teacher.setdefault(teacher, []).append(lesson)
+    for teacher_lessons in by_teacher.values():
+        teacher_lessons.sort(key=lambda lesson: (lesson.sort_key, lesson.group))
+    return {teacher: by_teacher[teacher] for teacher in sorted(by_teacher)}
+
+
+@dataclass
+class MaterializeResult:
+    """Итог выгрузки страниц преподавателей."""
+
+    written: Dict[str, str] = field(default_factory=dict)  # Преподаватель -> путь к файлу
+    unchanged: List[str] = field(default_factory=list)  # Не изменились с прошлого запуска
+    removed: List[str] = field(default_factory=list)  # Пропали из расписания
+    skipped_groups: List[str] = field(default_factory=list)  # Не удалось загрузить
+    lessons: int = 0
+
+
+def _write_batch(
+    target: str,
+    pages: List[_Page],
+    semestr: str,
+    output_dir: str,
+    renderer_kwargs: Dict[str, Any],
+) -> List[Tuple[str, str]]:
+    """
+    Отрисовывает и записывает пачку страниц одним отрисовщиком (общий кэш строк).
+    Файлы пишутся атомарно, чтобы прерванный запуск не оставлял обрезанных страниц.
+    """
+    renderer = make_renderer(target, **renderer_kwargs)
+    written: List[Tuple[str, str]] = []
+    for teacher, file_name, lessons in pages:
+        path = os.path.join(output_dir, file_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            renderer.render_to(f, lessons, semestr, title=teacher)
+        os.replace(tmp_path, path)
+        written.append((teacher, path))
+    return written
+
+
+class TeacherMaterializer:
+    """
+    Строит страницы расписания всех преподавателей по одному обходу всех групп:
+    занятия раскладываются по преподавателям, а отрисовка и запись файлов
+    распределяются пачками по процессам.
+
+    В output_dir хранится контрольная точка (STATE_FILE_NAME): хэш данных каждой
+    записанной страницы. Она сохраняется после каждой пачки, поэтому прерванный
+    запуск продолжается с места остановки, а повторный — перезаписывает только
+    изменившиеся страницы.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        target: str = "html",
+        processes: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        incremental: bool = True,
+        progress: Optional[Callable[[int, int], None]] = None,
+        **renderer_kwargs: Any,
+    ):
+        """
+        :param target: Формат страниц: text, html или markdown.
+        :param processes: Число процессов (None — по числу ядер, 1 — в текущем процессе).
+        :param incremental: Пропускать страницы, не изменившиеся с прошлого запуска.
+        :param progress: Вызывается после каждой пачки с (записано, всего к записи).
+        :param renderer_kwargs: Параметры рендерера; группа занятия показывается
+            по умолчанию (show_group=True) — у преподавателя занятия многих групп.
+        """
+        if target not in RENDER_TARGETS:
+            raise ValueError(
+                f"Неизвестный формат: {target} (доступны: {', '.join(RENDER_TARGETS)})"
+            )
+        self.output_dir = output_dir
+        self.target = target
+        self.processes = processes
+        self.batch_size = batch_size
+        self.incremental = incremental
+        self.progress = progress
+        self.renderer_kwargs = {"show_group": True, **renderer_kwargs}
+        self.state_path = os.path.join(output_dir, STATE_FILE_NAME)
+        # Преподаватель -> {"hash": ..., "file": ...}
+        self.state: Dict[str, Dict[str, str]] = {}
+
+    def load_state(self) -> None:
+        """Читает контрольную точку; при другом формате страниц она не учитывается."""
+        self.state = {}
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, encoding="utf-8") as f:
+            raw = json.load(f)
+        if raw.get("version") == STATE_FORMAT_VERSION and raw.get("target") == self.target:
+            self.state = raw["teachers"]
+
+    def save_state(self) -> None:
+        """Атомарно сохраняет контрольную точку."""
+        raw = {"version": STATE_FORMAT_VERSION, "target": self.target, "teachers": self.state}
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _page_hash(self, teacher: str, semestr: str, lessons: List[Lesson]) -> str:
+        return content_hash(
+            [teacher, semestr, self.renderer_kwargs, [lesson.to_item() for lesson in lessons]]
+        )
+
+    def _file_names(self, teachers: Iterable[str]) -> Dict[str, str]:
+        """Имена файлов страниц; при совпадении безопасных имён добавляется хэш имени."""
+        extension = make_renderer(self.target, **self.renderer_kwargs).extension
+        names: Dict[str, str] = {}
+        used = set()
+        for teacher in teachers:
+            base = safe_file_name(teacher)
+            if base in used:
+                base = f"{base}-{content_hash(teacher)[:8]}"
+            used.add(base)
+            names[teacher] = f"{base}.{extension}"
+        return names
+
+    def run(
+        self, schedules: Iterable[Tuple[str, Optional[Dict[str, Any]]]]
+    ) -> MaterializeResult:
+        """
+        Выгружает страницы преподавателей.
+        :param schedules: Пары (имя группы, ответ API или None) — например, обход всех групп.
+            Если какие-то группы не загрузились, страницы пропавших преподавателей не удаляются.
+        """
+        result = MaterializeResult()
+        lessons: List[Lesson] = []
+        semestr = ""
+        for group_name, data in schedules:
+            if data is None:
+                result.skipped_groups.append(group_name)
+                continue
+            semestr = semestr or data.get("Semestr") or ""
+            lessons.extend(parse_lessons(data, group_name))
+        result.lessons = len(lessons)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Состояние читается и при полной перезаписи — по нему удаляются старые страницы
+        self.load_state()
+
+        by_teacher = partition_by_teacher(lessons)
+        file_names = self._file_names(by_teacher)
+        hashes: Dict[str, str] = {}
+        pending: List[_Page] = []
+        for teacher, teacher_lessons in by_teacher.items():
+            page_hash = hashes[teacher] = self._page_hash(teacher, semestr, teacher_lessons)
+            saved = self.state.get(teacher)
+            if (
+                self.incremental
+                and saved is not None
+                and saved["hash"] == page_hash
+                and saved["file"] == file_names[teacher]
+                and os.path.exists(os.path.join(self.output_dir, saved["file"]))
+            ):
+                result.unchanged.append(teacher)
+                continue
+            pending.append((teacher, file_names[teacher], teacher_lessons))
+
+        try:
+            for written in self._write_pages(pending, semestr):
+                for teacher, path in written:
+                    result.written[teacher] = path
+                    self.state[teacher] = {"hash": hashes[teacher], "file": file_names[teacher]}
+                self.save_state()
+                if self.progress is not None:
+                    self.progress(len(result.written), len(pending))
+        finally:
+            self.save_state()
+
+        if not result.skipped_groups:
+            for teacher in sorted(set(self.state) - set(by_teacher)):
+                path = os.path.join(self.output_dir, self.state.pop(teacher)["file"])
+                if os.path.exists(path):
+                    os.remove(path)
+                result.removed.append(teacher)
+            if result.removed:
+                self.save_state()
+        return result
+
+    def _write_pages(
+        self, pages: List[_Page], semestr: str
+    ) -> Iterable[List[Tuple[str, str]]]:
+        """Записывает страницы пачками; выдаёт итог каждой пачки по мере готовности."""
+        batches = [pages[i : i + self.batch_size] for i in range(0, len(pages), self.batch_size)]
+        if self.processes == 1 or len(batches) <= 1:
+            for batch in batches:
+                yield _write_batch(
+                    self.target, batch, semestr, self.output_dir, self.renderer_kwargs
+                )
+            return
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            futures = [
+                executor.submit(
+                    _write_batch,
+                    self.target,
+                    batch,
+                    semestr,
+                    self.output_dir,
+                    self.renderer_kwargs,
+                )
+                for batch in batches
+            ]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                # При ошибке или прерывании не начинаем оставшиеся пачки
+                for future in futures:
+                    future.cancel()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from miet_schedule_api import DEFAULT_MAX_CONCURRENCY, MietScheduleClient
+    from schedule_cache import ScheduleCache, default_cache_path
+
+    parser = argparse.ArgumentParser(
+        prog="python -m schedule_teachers",
+        description="Страницы расписания всех преподавателей МИЭТ по одному обходу групп.",
+    )
+    parser.add_argument("output_dir", help="Каталог для страниц")
+    parser.add_argument("--format", choices=RENDER_TARGETS, default="html")
+    parser.add_argument("--processes", type=int, default=None, help="По умолчанию — по числу ядер")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--full", action="store_true", help="Перезаписать все страницы")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--base-url", default=None, help="Адрес API расписания")
+    args = parser.parse_args(argv)
+
+    # Дисковый кэш: перезапуск после сбоя не обходит заново все группы на сайте
+    client_kwargs: Dict[str, Any] = {"cache": ScheduleCache(default_cache_path())}
+    if args.base_url:
+        client_kwargs["base_url"] = args.base_url
+    client = MietScheduleClient(**client_kwargs)
+    groups = client.get_all_groups()
+    if not groups:
+        parser.exit(1, "Не удалось получить список групп.\n")
+
+    def crawl():
+        for i, result in enumerate(
+            client.get_schedules_for_groups(groups, max_concurrency=args.concurrency)
+        ):
+            print(f"\rЗагружено групп: {i + 1}/{len(groups)}", end="", flush=True)
+            yield result.group, result.data
+        print()
+
+    def progress(done: int, total: int) -> None:
+        print(f"\rЗаписано страниц: {done}/{total}", end="", flush=True)
+
+    # HTML-страницы публикуются как есть, поэтому — полноценными документами
+    renderer_kwargs = {"standalone": True} if args.format == "html" else {}
+    materializer = TeacherMaterializer(
+        args.output_dir,
+        target=args.format,
+        processes=args.processes,
+        batch_size=args.batch_size,
+        incremental=not args.full,
+        progress=progress,
+        **renderer_kwargs,
+    )
+    result = materializer.run(crawl())
+    if result.written:
+        print()
+    print(
+        f"Преподавателей: {len(result.written) + len(result.unchanged)} "
+        f"(записано: {len(result.written)}, без изменений: {len(result.unchanged)}, "
+        f"удалено: {len(result.removed)}), занятий: {result.lessons}"
+    )
+    if result.skipped_groups:
+        print(f"Не удалось загрузить: {', '.join(sorted(result.skipped_groups))}")
+
+
+if __name__ == "__main__":
+    main()
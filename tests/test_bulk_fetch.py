@@ -0,0 +1,56 @@
+# tests/test_bulk_fetch.py
+import unittest
+
+from benchmarks.fixtures import synthesize
+from benchmarks.stand_in_server import StandInServer
+from miet_schedule_api import MietNetworkError, MietScheduleClient
+
+
+class BulkFetchTest(unittest.TestCase):
+    """Массовая загрузка расписаний через локальный сервер-заглушку."""
+
+    def setUp(self):
+        self.group_names, self.responses = synthesize(groups=12, lessons_per_group=5)
+        # Первая группа отвечает заметно дольше остальных
+        self.slow_group = self.group_names[0]
+        self.server = StandInServer(
+            (self.group_names, self.responses), latency=0.02, delays={self.slow_group: 0.3}
+        ).start()
+        self.client = MietScheduleClient(base_url=self.server.base_url, max_concurrency=2)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_results_in_completion_order(self):
+        results = list(self.client.get_schedules_for_groups(self.group_names, max_concurrency=4))
+        self.assertEqual(sorted(r.group for r in results), sorted(self.group_names))
+        self.assertTrue(all(r.ok for r in results))
+        for result in results:
+            self.assertEqual(result.data, self.responses[result.group])
+        # Медленная группа запрошена первой, но готова последней
+        self.assertEqual(results[-1].group, self.slow_group)
+
+    def test_in_flight_requests_are_bounded(self):
+        groups = iter(self.group_names)
+        results = list(self.client.get_schedules_for_groups(groups, max_concurrency=3))
+        self.assertEqual(len(results), len(self.group_names))
+        self.assertLessEqual(self.server.max_active, 3)
+        self.assertGreater(self.server.max_active, 1)
+
+    def test_failed_group_does_not_stop_others(self):
+        groups = self.group_names[1:4] + ["НЕТ-99"]
+        results = {r.group: r for r in self.client.get_schedules_for_groups(groups)}
+        self.assertEqual(set(results), set(groups))
+        self.assertIsInstance(results["НЕТ-99"].error, MietNetworkError)
+        self.assertIsNone(results["НЕТ-99"].data)
+        self.assertTrue(all(results[group].ok for group in groups[:-1]))
+
+    def test_pool_grows_for_larger_concurrency(self):
+        list(self.client.get_schedules_for_groups(self.group_names[1:], max_concurrency=6))
+        adapter = self.client.session.get_adapter(self.server.base_url)
+        self.assertEqual(adapter._pool_maxsize, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
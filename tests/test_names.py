@@ -0,0 +1,89 @@
+# tests/test_names.py
+import unittest
+
+from schedule_models import Lesson
+from schedule_names import GROUP, TEACHER, NameResolver, normalize_key
+
+GROUPS = ["ИВТ-13", "ИВТ-11", "ИВТ-21", "ПИН-13", "БИ-11", "МП-21"]
+TEACHERS = [
+    "Иванов Иван Иванович",
+    "Петрова Мария Сергеевна",
+    "Константинопольский-Водовозов Александр-Максимилиан Вячеславович Младший",
+]
+
+
+class NameResolverTest(unittest.TestCase):
+    def setUp(self):
+        self.resolver = NameResolver.from_names(GROUPS, TEACHERS)
+
+    def best_name(self, query, kind=None):
+        match = self.resolver.best(query, kind)
+        return match.name if match is not None else None
+
+    def test_normalize_key(self):
+        self.assertEqual(normalize_key("ИВТ-13"), normalize_key("ивт 13"))
+        self.assertEqual(normalize_key("ИВТ-13"), normalize_key("ИBT13"))  # Латинская B
+        self.assertEqual(normalize_key("Ёлкин"), "елкин")
+
+    def test_exact(self):
+        match = self.resolver.best("ИВТ-13")
+        self.assertEqual((match.name, match.kind, match.score), ("ИВТ-13", GROUP, 1.0))
+        self.assertEqual(self.best_name("ивт13"), "ИВТ-13")
+
+    def test_typos(self):
+        self.assertEqual(self.best_name("Иваов"), "Иванов Иван Иванович")
+        self.assertEqual(self.best_name("петрва мария"), "Петрова Мария Сергеевна")
+        self.assertEqual(self.best_name("пин13"), "ПИН-13")
+
+    def test_english_layout(self):
+        match = self.resolver.best("bdn-13")
+        self.assertEqual(match.name, "ИВТ-13")
+        self.assertLess(match.score, 1.0)
+        self.assertEqual(self.best_name("gtnhjdf"), "Петрова Мария Сергеевна")
+
+    def test_kind_filter(self):
+        self.assertEqual(self.best_name("Иванов", TEACHER), "Иванов Иван Иванович")
+        self.assertIsNone(self.best_name("Иванов", GROUP))
+        self.assertTrue(all(m.kind == GROUP for m in self.resolver.resolve("ивт", GROUP)))
+
+    def test_no_match(self):
+        self.assertEqual(self.resolver.resolve("Шкловский"), [])
+        self.assertEqual(self.resolver.resolve(""), [])
+        self.assertEqual(self.resolver.resolve("--"), [])
+
+    def test_query_longer_than_64_characters(self):
+        name = TEACHERS[2]
+        self.assertGreater(len(normalize_key(name)), 64)
+        self.assertEqual(self.resolver.best(name).score, 1.0)
+        # Опечатка после 64-го символа и лишний хвост запроса
+        typo = name[:-4] + "и" + name[-3:]
+        self.assertNotEqual(typo, name)
+        self.assertEqual(self.best_name(typo), name)
+        self.assertEqual(self.best_name(f"{name} кафедра ВМ"), name)
+        self.assertEqual(self.resolver.resolve("ж" * 200), [])
+
+    def test_from_lessons_short_name_leads_to_full(self):
+        lesson = Lesson(
+            group="ИВТ-13",
+            day=1,
+            day_number=0,
+            time_code=1,
+            time_label="1 пара",
+            time_from="",
+            time_to="",
+            class_name="Физика [Лек]",
+            subject="Физика",
+            class_type="Лек",
+            is_distant=False,
+            teacher="Иванов И.И.",
+            teacher_full="Иванов Иван Иванович",
+            room="1201",
+        )
+        resolver = NameResolver.from_lessons([lesson], groups=["ПИН-13"])
+        match = resolver.best("Иванов И.И.", TEACHER)
+        self.assertEqual((match.name, match.matched), ("Иванов Иван Иванович", "Иванов И.И."))
+        self.assertEqual(resolver.best("пин-13").name, "ПИН-13")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# tests/test_rooms.py
+import unittest
+
+from schedule_models import Lesson
+from schedule_rooms import (SLOT_COUNT, RoomOccupancy, slot_at, slot_index,
+                            slots_mask)
+
+
+def lesson(room: str, day_number: int, day: int, time_code: int) -> Lesson:
+    return Lesson(
+        group="ИВТ-11",
+        day=day,
+        day_number=day_number,
+        time_code=time_code,
+        time_label=f"{time_code} пара",
+        time_from="",
+        time_to="",
+        class_name="Физика [Лек]",
+        subject="Физика",
+        class_type="Лек",
+        is_distant=False,
+        teacher="",
+        teacher_full="",
+        room=room,
+    )
+
+
+class SlotTest(unittest.TestCase):
+    def test_round_trip(self):
+        indexes = set()
+        for day_number in range(4):
+            for day in range(1, 8):
+                for time_code in range(1, 9):
+                    index = slot_index(day_number, day, time_code)
+                    self.assertEqual(slot_at(index), (day_number, day, time_code))
+                    indexes.add(index)
+        self.assertEqual(indexes, set(range(SLOT_COUNT)))
+
+    def test_out_of_range(self):
+        for slot in ((4, 1, 1), (-1, 1, 1), (0, 0, 1), (0, 8, 1), (0, 1, 0), (0, 1, 9)):
+            with self.subTest(slot=slot), self.assertRaises(ValueError):
+                slot_index(*slot)
+
+
+class RoomOccupancyTest(unittest.TestCase):
+    def setUp(self):
+        self.occupancy = RoomOccupancy.from_lessons(
+            [
+                lesson("1201", 0, 1, 1),
+                lesson("1201", 0, 1, 2),
+                lesson("3103", 0, 1, 2),
+                lesson("4320", 0, 1, 1),
+                lesson("", 0, 1, 3),  # Без аудитории
+                lesson("1201", 0, 1, 9),  # Пара вне сетки
+            ]
+        )
+
+    def test_skipped(self):
+        self.assertEqual(self.occupancy.skipped, 2)
+        self.assertEqual(self.occupancy.rooms, ["1201", "3103", "4320"])
+
+    def test_free_rooms_in_requested_order(self):
+        self.assertEqual(self.occupancy.free_rooms(0, 1, 1), ["3103"])
+        self.assertEqual(self.occupancy.free_rooms(0, 1, 3), ["1201", "3103", "4320"])
+        self.assertEqual(
+            self.occupancy.free_rooms(0, 1, 3, ["4320", "9999", "1201", "4320"]),
+            ["4320", "1201"],
+        )
+        self.assertEqual(self.occupancy.free_rooms(0, 1, 2, ["4320", "3103", "1201"]), ["4320"])
+
+    def test_first_free_slot(self):
+        self.assertEqual(self.occupancy.first_free_slot(["1201", "4320"]), (0, 1, 3))
+        self.assertEqual(
+            self.occupancy.first_free_slot(["1201", "4320"], require_all=False), (0, 1, 2)
+        )
+        self.assertEqual(self.occupancy.first_free_slot(["3103"], start=(0, 1, 2)), (0, 1, 3))
+        self.assertEqual(self.occupancy.first_free_slot(["3103"], start=(1, 2, 5)), (1, 2, 5))
+        self.assertIsNone(self.occupancy.first_free_slot([]))
+
+    def test_first_free_slot_within(self):
+        saturday = slots_mask(days=[6])
+        self.assertEqual(self.occupancy.first_free_slot(["1201"], within=saturday), (0, 6, 1))
+        only_busy = slots_mask(day_numbers=[0], days=[1], time_codes=[1, 2])
+        self.assertIsNone(self.occupancy.first_free_slot(["1201"], within=only_busy))
+        # Воскресенье вне области поиска по умолчанию
+        self.assertIsNone(self.occupancy.first_free_slot(["1201"], start=(3, 7, 1)))
+        self.assertEqual(
+            self.occupancy.first_free_slot(["1201"], start=(3, 7, 1), within=slots_mask()),
+            (3, 7, 1),
+        )
+
+    def test_busy_slots(self):
+        self.assertEqual(self.occupancy.busy_slots("1201"), [(0, 1, 1), (0, 1, 2)])
+        self.assertEqual(self.occupancy.busy_slots("9999"), [])
+        self.assertFalse(self.occupancy.is_free("3103", 0, 1, 2))
+        self.assertTrue(self.occupancy.is_free("3103", 0, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+# tests/test_snapshot.py
+import copy
+import os
+import struct
+import tempfile
+import unittest
+
+from benchmarks.fixtures import synthesize
+from schedule_models import parse_lessons
+from schedule_snapshot import FORMAT_VERSION, MAGIC, SharedTimetable, write_snapshot
+
+
+class SnapshotTest(unittest.TestCase):
+    """Запись снимка и чтение через SharedTimetable."""
+
+    def setUp(self):
+        self.group_names, self.responses = synthesize(groups=6, lessons_per_group=12)
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "schedule.timetable")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, responses=None):
+        responses = responses or self.responses
+        return write_snapshot(self.path, ((name, responses[name]) for name in self.group_names))
+
+    def expected(self, group_name, responses=None):
+        data = (responses or self.responses)[group_name]
+        return sorted(parse_lessons(data, group_name), key=lambda lesson: lesson.sort_key)
+
+    def test_round_trip(self):
+        summary = self.write()
+        timetable = SharedTimetable(self.path)
+        self.assertEqual(summary.groups, len(self.group_names))
+        self.assertEqual(timetable.groups(), sorted(self.group_names))
+        for group_name in self.group_names:
+            self.assertEqual(timetable.lessons(group_name), self.expected(group_name))
+            self.assertEqual(timetable.semestr(group_name), self.responses[group_name]["Semestr"])
+        self.assertEqual(timetable.lessons("НЕТ-99"), [])
+
+    def test_signed_time_code(self):
+        responses = copy.deepcopy(self.responses)
+        group_name = self.group_names[0]
+        items = responses[group_name]["Data"]
+        items[0]["Time"]["Code"] = -3
+        items[1]["Time"]["Code"] = 300
+        self.write(responses)
+        lessons = SharedTimetable(self.path).lessons(group_name)
+        self.assertEqual(lessons, self.expected(group_name, responses))
+        self.assertIn(-3, [lesson.time_code for lesson in lessons])
+        self.assertIn(300, [lesson.time_code for lesson in lessons])
+
+    def test_search(self):
+        self.write()
+        timetable = SharedTimetable(self.path)
+        room = self.expected(self.group_names[0])[0].room
+        expected = [
+            lesson
+            for group_name in sorted(self.group_names)
+            for lesson in self.expected(group_name)
+            if lesson.room == room
+        ]
+        self.assertEqual(timetable.search("room", lambda value: value == room), expected)
+        self.assertEqual(timetable.search("teacher", lambda value: False), [])
+        with self.assertRaises(ValueError):
+            timetable.search("subject", lambda value: True)
+
+    def test_string_cache_is_bounded(self):
+        self.write()
+        timetable = SharedTimetable(self.path, string_cache_size=8)
+        for group_name in self.group_names:
+            timetable.lessons(group_name)
+        self.assertLessEqual(len(timetable._snapshot._strings), 8)
+        self.assertEqual(timetable.lessons(self.group_names[0]), self.expected(self.group_names[0]))
+
+    def test_reload_after_atomic_replace(self):
+        self.write()
+        timetable = SharedTimetable(self.path, check_interval=3600)
+        group_name = self.group_names[0]
+        before = timetable.lessons(group_name)
+
+        responses = copy.deepcopy(self.responses)
+        responses[group_name]["Data"] = responses[group_name]["Data"][:3]
+        self.write(responses)
+        # Открытый снимок не меняется, пока его не перечитали
+        self.assertEqual(timetable.lessons(group_name), before)
+        self.assertFalse(os.path.exists(f"{self.path}.{os.getpid()}.tmp"))
+
+        self.assertTrue(timetable.reload())
+        self.assertEqual(timetable.lessons(group_name), self.expected(group_name, responses))
+        self.assertFalse(timetable.reload())
+
+    def test_missing_file_keeps_current_snapshot(self):
+        self.write()
+        timetable = SharedTimetable(self.path, check_interval=0)
+        group_name = self.group_names[0]
+        os.remove(self.path)
+        self.assertEqual(timetable.lessons(group_name), self.expected(group_name))
+
+    def test_version_mismatch(self):
+        self.write()
+        with open(self.path, "r+b") as f:
+            f.seek(len(MAGIC))
+            f.write(struct.pack("<I", FORMAT_VERSION + 1))
+        with self.assertRaises(ValueError):
+            SharedTimetable(self.path)
+
+    def test_truncated_file(self):
+        self.write()
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(ValueError):
+            SharedTimetable(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
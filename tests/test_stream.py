@@ -0,0 +1,103 @@
+# tests/test_stream.py
+import json
+import unittest
+
+from benchmarks.fixtures import synthesize
+from schedule_models import parse_lessons
+from schedule_stream import JsonStreamError, ScheduleStream, iter_object_array
+
+# Строки с экранированием и многобайтными символами, числа с дробью и экспонентой
+DOCUMENT = {
+    "Times": [{"Time": "1 пара", "Code": 1}],
+    "Data": [
+        {
+            "Day": 1,
+            "Code": -12.5e3,
+            "Class": {"Name": "Физика \"ядро\" [Лек]", "Form": False},
+            "Room": {"Name": "3103\\A\n\tб"},
+            "Escaped": "Абв 😀 é",
+            "Numbers": [0, -0.25, 1234567890, 1e-7, 6.02E+23],
+            "Empty": {},
+            "Missing": None,
+            "Flag": True,
+        },
+        [],
+        "строка",
+        42,
+        3.5,
+    ],
+    "Semestr": "Весна 2025 г.",
+}
+
+
+def split_at(data: bytes, *positions: int):
+    bounds = [0, *positions, len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+class StreamTest(unittest.TestCase):
+    """Потоковый разбор ответа по кускам произвольной длины."""
+
+    def parse(self, chunks):
+        meta = {}
+        items = list(iter_object_array(chunks, "Data", meta))
+        return items, meta
+
+    def assert_parsed(self, chunks, encoded):
+        expected = json.loads(encoded)
+        items, meta = self.parse(chunks)
+        self.assertEqual(items, expected["Data"])
+        self.assertEqual(meta, {key: value for key, value in expected.items() if key != "Data"})
+
+    def test_every_single_split(self):
+        for encoded in (
+            json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8"),
+            json.dumps(DOCUMENT, ensure_ascii=True).encode("utf-8"),
+        ):
+            for position in range(1, len(encoded)):
+                with self.subTest(position=position, text=encoded[position - 5 : position + 5]):
+                    self.assert_parsed(split_at(encoded, position), encoded)
+
+    def test_small_chunks(self):
+        encoded = json.dumps(DOCUMENT, ensure_ascii=False, indent=1).encode("utf-8")
+        for size in range(1, 8):
+            with self.subTest(size=size):
+                chunks = [encoded[i : i + size] for i in range(0, len(encoded), size)]
+                self.assert_parsed(chunks, encoded)
+
+    def test_number_at_end_of_chunk(self):
+        encoded = b'{"Data": [12, -3.5e+2, 7], "N": 100}'
+        for position in range(encoded.index(b"12"), encoded.index(b"7") + 1):
+            with self.subTest(position=position):
+                self.assert_parsed(split_at(encoded, position), encoded)
+
+    def test_empty_array_and_object(self):
+        self.assertEqual(self.parse([b'{"Data": []}']), ([], {}))
+        self.assertEqual(self.parse([b"{}"]), ([], {}))
+
+    def test_truncated(self):
+        encoded = json.dumps(DOCUMENT, ensure_ascii=False).encode("utf-8")
+        for position in (1, len(encoded) // 2, len(encoded) - 1):
+            with self.subTest(position=position), self.assertRaises(JsonStreamError):
+                self.parse([encoded[:position]])
+
+    def test_invalid_utf8(self):
+        with self.assertRaises(JsonStreamError):
+            self.parse([b'{"Data": ["\xff\xfe"]}'])
+
+    def test_schedule_stream(self):
+        group_names, responses = synthesize(groups=1, lessons_per_group=8)
+        group_name = group_names[0]
+        encoded = json.dumps(responses[group_name], ensure_ascii=False).encode("utf-8")
+        chunks = [encoded[i : i + 13] for i in range(0, len(encoded), 13)]
+        closed = []
+        stream = ScheduleStream(chunks, group_name, on_close=lambda: closed.append(True))
+        self.assertEqual(list(stream), parse_lessons(responses[group_name], group_name))
+        self.assertEqual(stream.semestr, responses[group_name]["Semestr"])
+        self.assertEqual(closed, [True])
+        with self.assertRaises(RuntimeError):
+            list(stream)
+
+
+if __name__ == "__main__":
+    unittest.main()